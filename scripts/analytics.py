@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Performance Analytics
+Month/year/weekday breakdowns, rolling Sharpe and drawdown duration from stored daily P&L
+"""
+
+import os
+import sqlite3
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+import results_store
+from candle_series import day_key_str, list_symbols
+from session_summary import load_sessions
+
+INITIAL_CAPITAL = 500000
+TRADING_DAYS_PER_YEAR = 252
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+
+# ============================================
+# Daily Series
+# ============================================
+# Every saved run stores one row per (config, symbol, traded day) in
+# results_store's equity_points table. DailyReturns loads those rows as
+# parallel NumPy columns so all breakdowns are group-bys over arrays;
+# nothing is re-run. Days without a trade have no row (zero P&L), so the
+# risk statistics first put the P&L on the store's trading calendar.
+
+class DailyReturns:
+    """Columnar (run_id, config_id, symbol, day, pnl) rows"""
+
+    def __init__(self, run_ids: np.ndarray, config_ids: np.ndarray, symbols: np.ndarray,
+                 days: np.ndarray, pnl: np.ndarray):
+        self.run_id = run_ids
+        self.config_id = config_ids
+        self.symbol = symbols
+        self.day = days  # datetime64[D]
+        self.pnl = pnl
+
+    def __len__(self):
+        return len(self.pnl)
+
+    def select(self, mask: np.ndarray) -> 'DailyReturns':
+        return DailyReturns(self.run_id[mask], self.config_id[mask], self.symbol[mask],
+                            self.day[mask], self.pnl[mask])
+
+    def pairs(self) -> List[Tuple[int, int]]:
+        """Distinct (run_id, config_id) pairs, sorted"""
+        if len(self) == 0:
+            return []
+        return [tuple(p) for p in np.unique(np.stack([self.run_id, self.config_id], axis=1), axis=0).tolist()]
+
+    def for_config(self, run_id: int, config_id: int) -> 'DailyReturns':
+        return self.select((self.run_id == run_id) & (self.config_id == config_id))
+
+
+def _one_config(daily: DailyReturns):
+    """Portfolio sums are per (run, config); a sweep's configs must not be added together"""
+    pairs = daily.pairs()
+    if len(pairs) > 1:
+        raise ValueError(f"Daily returns cover {len(pairs)} (run, config) pairs - "
+                         f"select one with for_config(run_id, config_id)")
+
+
+def load_daily_returns(conn: sqlite3.Connection, run_id: int = None,
+                       symbols: Sequence[str] = None) -> DailyReturns:
+    """Daily P&L rows for one run (or all runs), optionally limited to symbols"""
+    sql = "SELECT run_id, config_id, symbol, date, pnl FROM equity_points"
+    where, params = [], []
+    if run_id is not None:
+        where.append("run_id = ?")
+        params.append(run_id)
+    if symbols:
+        where.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+        params.extend(symbols)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        return DailyReturns(np.zeros(0, np.int64), np.zeros(0, np.int64), np.zeros(0, dtype='U1'),
+                            np.zeros(0, dtype='datetime64[D]'), np.zeros(0))
+    run_ids, config_ids, syms, dates, pnl = zip(*rows)
+    return DailyReturns(np.array(run_ids, dtype=np.int64), np.array(config_ids, dtype=np.int64),
+                        np.array(syms), np.array(dates, dtype='datetime64[D]'),
+                        np.array(pnl, dtype=np.float64))
+
+# ============================================
+# Group-bys
+# ============================================
+
+def period_keys(days: np.ndarray, period: str) -> np.ndarray:
+    """Group key per day: 'month' -> YYYY-MM, 'year' -> YYYY, 'weekday' -> 0 (Mon)..6"""
+    if period == 'month':
+        return days.astype('datetime64[M]').astype(str)
+    if period == 'year':
+        return days.astype('datetime64[Y]').astype(str)
+    if period == 'weekday':
+        # 1970-01-01 was a Thursday
+        return (days.astype(np.int64) + 3) % 7
+    raise ValueError(f"Unknown period '{period}', expected month, year or weekday")
+
+
+def period_table(daily: DailyReturns, period: str = 'month',
+                 capital: float = INITIAL_CAPITAL) -> List[Dict]:
+    """P&L, traded days, winning days and return % per period for one (run, config), summed over symbols"""
+    if len(daily) == 0:
+        return []
+    _one_config(daily)
+    # Collapse symbols first so win days count portfolio days, not symbol-days
+    days, pnl = portfolio_series(daily)
+    keys, inverse = np.unique(period_keys(days, period), return_inverse=True)
+    period_pnl = np.bincount(inverse, weights=pnl, minlength=len(keys))
+    traded = np.bincount(inverse, minlength=len(keys))
+    winning = np.bincount(inverse, weights=pnl > 0, minlength=len(keys))
+
+    table = []
+    for i, key in enumerate(keys.tolist()):
+        table.append({
+            'period': WEEKDAYS[key] if period == 'weekday' else key,
+            'pnl': float(period_pnl[i]),
+            'days': int(traded[i]),
+            'win_days': int(winning[i]),
+            'return_pct': float(period_pnl[i] / capital * 100),
+        })
+    return table
+
+
+def portfolio_series(daily: DailyReturns, calendar: np.ndarray = None):
+    """(sorted days, P&L summed over symbols on each day) for one (run, config).
+
+    Without a calendar only traded days are returned; with one every
+    calendar day is (0 where nothing was traded), plus any traded day the
+    calendar lacks.
+    """
+    _one_config(daily)
+    days = np.unique(daily.day) if calendar is None else np.union1d(calendar, daily.day)
+    inverse = np.searchsorted(days, daily.day)
+    return days, np.bincount(inverse, weights=daily.pnl, minlength=len(days))
+
+
+def symbol_totals(daily: DailyReturns) -> Dict[str, float]:
+    """Total P&L per symbol for one (run, config)"""
+    _one_config(daily)
+    symbols, inverse = np.unique(daily.symbol, return_inverse=True)
+    totals = np.bincount(inverse, weights=daily.pnl, minlength=len(symbols))
+    return dict(zip(symbols.tolist(), totals.tolist()))
+
+# ============================================
+# Trading Calendar
+# ============================================
+# Sharpe and drawdown are per trading day: a flat day is a zero return and
+# a day under water whether or not the strategy traded. The calendar is
+# every session day in the run's candle store (via the session cache, so no
+# JSON is parsed once the cache is warm).
+
+def trading_calendar(data_dir: str, symbols: Sequence[str] = None) -> np.ndarray:
+    """Sorted session days (datetime64[D]) of ``symbols`` (default: all) in a store directory"""
+    keys = []
+    for symbol in symbols if symbols is not None else list_symbols(data_dir):
+        file_path = os.path.join(data_dir, f"{symbol}.json")
+        if os.path.exists(file_path):
+            keys.append(load_sessions(file_path).day_key)
+    if not keys:
+        return np.zeros(0, dtype='datetime64[D]')
+    keys = np.unique(np.concatenate(keys))
+    return np.array([day_key_str(k) for k in keys.tolist()], dtype='datetime64[D]')
+
+
+def run_calendar(conn: sqlite3.Connection, run_id: int, daily: DailyReturns) -> np.ndarray:
+    """Trading calendar of a saved run: its data_dir, limited to the symbols in ``daily``"""
+    row = conn.execute("SELECT data_dir FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+    if row is None or not row['data_dir'] or not os.path.isdir(row['data_dir']):
+        return None
+    return trading_calendar(row['data_dir'], np.unique(daily.symbol).tolist())
+
+# ============================================
+# Risk Series
+# ============================================
+
+def rolling_sharpe(pnl: np.ndarray, window: int = 63, capital: float = INITIAL_CAPITAL) -> np.ndarray:
+    """Annualised Sharpe of daily returns over a trailing window (NaN until full)"""
+    returns = np.asarray(pnl, dtype=np.float64) / capital
+    out = np.full(len(returns), np.nan)
+    if len(returns) < window:
+        return out
+    csum = np.concatenate(([0.0], np.cumsum(returns)))
+    csum_sq = np.concatenate(([0.0], np.cumsum(returns * returns)))
+    total = csum[window:] - csum[:-window]
+    total_sq = csum_sq[window:] - csum_sq[:-window]
+    mean = total / window
+    var = np.maximum(total_sq / window - mean * mean, 0) * window / (window - 1)
+    std = np.sqrt(var)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(TRADING_DAYS_PER_YEAR), np.nan)
+    out[window - 1:] = sharpe
+    return out
+
+
+def drawdown_stats(pnl: np.ndarray, capital: float = INITIAL_CAPITAL) -> Dict:
+    """Max drawdown % and longest/current drawdown duration (in days of ``pnl``)"""
+    equity = capital + np.cumsum(np.asarray(pnl, dtype=np.float64))
+    if len(equity) == 0:
+        return {'max_dd': 0.0, 'max_duration': 0, 'current_duration': 0}
+    peak = np.maximum.accumulate(np.maximum(equity, capital))
+    drawdown = (peak - equity) / peak
+
+    # Duration = days since the last new high; runs restart at every new high
+    underwater = drawdown > 0
+    idx = np.arange(len(equity))
+    last_high = np.maximum.accumulate(np.where(underwater, -1, idx))
+    duration = np.where(underwater, idx - last_high, 0)
+    return {
+        'max_dd': float(drawdown.max() * 100),
+        'max_duration': int(duration.max()),
+        'current_duration': int(duration[-1]),
+    }
+
+
+def run_summary(daily: DailyReturns, capital: float = INITIAL_CAPITAL,
+                calendar: np.ndarray = None) -> List[Dict]:
+    """One row per (run, config): P&L, days, Sharpe and drawdown stats.
+
+    Pass the run's ``calendar`` so no-trade days count as zero returns;
+    without it the statistics only see traded days.
+    """
+    summaries = []
+    for run_id, config_id in daily.pairs():
+        subset = daily.for_config(run_id, config_id)
+        _, pnl = portfolio_series(subset, calendar)
+        returns = pnl / capital
+        std = returns.std(ddof=1) if len(returns) > 1 else 0
+        summary = {
+            'run_id': int(run_id),
+            'config_id': int(config_id),
+            'pnl': float(pnl.sum()),
+            'days': len(pnl),
+            'traded_days': len(np.unique(subset.day)),
+            'sharpe': float(returns.mean() / std * np.sqrt(TRADING_DAYS_PER_YEAR)) if std > 0 else 0.0,
+        }
+        summary.update(drawdown_stats(pnl, capital))
+        summaries.append(summary)
+    return summaries
+
+
+def compare_years(conn: sqlite3.Connection, run_id: int, years: Sequence[int],
+                  symbols: Sequence[str] = None) -> List[Dict]:
+    """Trades, wins, P&L and profit factor per year for one run - a single grouped query"""
+    sql = ("SELECT substr(date, 1, 4) AS year, COUNT(*) AS trades, SUM(pnl > 0) AS wins, "
+           "SUM(pnl) AS pnl, SUM(CASE WHEN pnl > 0 THEN pnl ELSE 0 END) AS gross_profit, "
+           "SUM(CASE WHEN pnl <= 0 THEN -pnl ELSE 0 END) AS gross_loss "
+           "FROM trades WHERE run_id = ? AND date >= ? AND date < ?")
+    params = [run_id, f"{min(years)}-01-01", f"{max(years) + 1}-01-01"]
+    if symbols:
+        sql += f" AND symbol IN ({', '.join('?' * len(symbols))})"
+        params.extend(symbols)
+    sql += " GROUP BY year ORDER BY year"
+
+    rows = []
+    for row in conn.execute(sql, params):
+        item = dict(row)
+        item['profit_factor'] = item['gross_profit'] / item['gross_loss'] if item['gross_loss'] > 0 else 0
+        item['win_rate'] = item['wins'] / item['trades'] * 100 if item['trades'] else 0
+        rows.append(item)
+    return rows
+
+# ============================================
+# Reports
+# ============================================
+
+def print_period_table(table: List[Dict], title: str):
+    print(f"\n{title}")
+    print(f"{'Period':<8} | {'P&L':>12} | {'Days':>5} | {'Win days':>8} | {'Return':>7}")
+    print("-" * 52)
+    for row in table:
+        print(f"{row['period']:<8} | ₹{row['pnl']:>11,.0f} | {row['days']:>5} | "
+              f"{row['win_days']:>8} | {row['return_pct']:>6.2f}%")
+
+
+def main():
+    conn = results_store.connect()
+    run_id = results_store.latest_run(conn, kind='backtest')
+    if run_id is None:
+        print("No saved backtest runs - run validate_upgraded.py --save first")
+        return
+
+    daily = load_daily_returns(conn, run_id)
+    print("=" * 70)
+    print(f"PERFORMANCE BREAKDOWN - RUN #{run_id}")
+    print("=" * 70)
+    pairs = daily.pairs()
+    if len(pairs) > 1:
+        print(f"ℹ️ Run has {len(pairs)} configs - breakdown for config #{pairs[0][1]}")
+    if pairs:
+        daily = daily.for_config(*pairs[0])
+    print_period_table(period_table(daily, 'year'), "📅 By year")
+    print_period_table(period_table(daily, 'month'), "📅 By month")
+    print_period_table(period_table(daily, 'weekday'), "📅 By weekday")
+
+    calendar = run_calendar(conn, run_id, daily)
+    if calendar is None:
+        print("\n⚠️ Candle store of this run not found - Sharpe and drawdown use traded days only")
+    _, pnl = portfolio_series(daily, calendar)
+    sharpe = rolling_sharpe(pnl)
+    latest = sharpe[~np.isnan(sharpe)]
+    print(f"\n📈 Rolling 63-day Sharpe: latest {latest[-1]:.2f}" if len(latest) else
+          "\n📈 Rolling 63-day Sharpe: not enough days")
+    for summary in run_summary(daily, calendar=calendar):
+        print(f"📅 {summary['days']} trading days, {summary['traded_days']} with trades")
+        print(f"📉 Max DD {summary['max_dd']:.2f}% | longest drawdown {summary['max_duration']} days | "
+              f"current {summary['current_duration']} days | Sharpe {summary['sharpe']:.2f}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Batched What-If Engine
+Evaluates many configurations of the 8-filter intraday strategy in one pass
+"""
+
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+import results_store
+import validate_upgraded as base
+from candle_series import CandleSeries, format_timestamp, list_symbols, load_series
+from session_summary import SessionSummary, load_sessions
+from vector_indicators import (LOOKBACK_WINDOW, rolling_max, rolling_min, trade_quality, window_adx,
+                               window_atr, window_ema)
+
+# ============================================
+# Configuration
+# ============================================
+# One config = one dict of these keys. Defaults reproduce validate_upgraded.
+
+DEFAULT_CONFIG = {
+    'risk_per_trade': base.RISK_PER_TRADE,
+    'max_trades_per_day': base.MAX_TRADES_PER_DAY,
+    'max_daily_loss': base.MAX_DAILY_LOSS,
+    'kill_switch_dd': base.KILL_SWITCH_DD,
+    'kill_switch_days': base.KILL_SWITCH_DAYS,
+    'min_first_hour_range_atr': base.MIN_FIRST_HOUR_RANGE_ATR,
+    'ema_fast': base.EMA_FAST,
+    'ema_slow': base.EMA_SLOW,
+    'entry_confirmation': True,
+    'adx_trending': 25,
+    'adx_normal': 15,
+    'score_trending': 0.4,
+    'score_normal': 0.6,
+    'stop_atr_mult': 0.5,
+    'trailing_atr_mult': base.TRAILING_ATR_MULT,
+    'break_even_r': 1.0,
+    'max_hold_bars': 40,
+}
+
+LOOKBACK_BARS = LOOKBACK_WINDOW - 1  # lookback = candles[g-60:g+1]
+FIRST_HOUR_BARS = 4
+MIN_DAY_BARS = 20
+
+
+def make_config(**overrides) -> Dict:
+    """DEFAULT_CONFIG with overrides applied"""
+    unknown = set(overrides) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise KeyError(f"Unknown config keys: {sorted(unknown)}")
+    config = dict(DEFAULT_CONFIG)
+    config.update(overrides)
+    return config
+
+
+def config_grid(**param_values) -> List[Dict]:
+    """Cartesian product of parameter values, e.g. config_grid(ema_fast=[9, 15], risk_per_trade=[...])"""
+    names = list(param_values)
+    return [make_config(**dict(zip(names, combo)))
+            for combo in itertools.product(*(param_values[n] for n in names))]
+
+# ============================================
+# Shared Features
+# ============================================
+
+class SymbolFeatures:
+    """Per-bar indicator arrays for one symbol, computed once per distinct period"""
+
+    def __init__(self, series: CandleSeries, sessions: SessionSummary = None):
+        self.series = series
+        self.n = len(series)
+        high, low, close = series.high, series.low, series.close
+
+        self.adx = window_adx(high, low, close)
+        self.atr = window_atr(high, low, close)
+        self.swing_high = rolling_max(high, 10)
+        self.swing_low = rolling_min(low, 10)
+        self._ema = {}
+        self._quality = {}
+
+        # Bar-level checks shared by all configs
+        self.color_up = close > series.open
+        self.color_down = close < series.open
+        prev_high = np.concatenate(([np.inf], high[:-1]))
+        prev_low = np.concatenate(([-np.inf], low[:-1]))
+        self.confirm_up = close > prev_high
+        self.confirm_down = close < prev_low
+
+        # Python lists for the scalar parts of the state machine
+        self.open_list = series.open.tolist()
+        self.high_list = high.tolist()
+        self.low_list = low.tolist()
+        self.close_list = close.tolist()
+        self.atr_list = self.atr.tolist()
+        self.swing_high_list = self.swing_high.tolist()
+        self.swing_low_list = self.swing_low.tolist()
+
+        self.day_offsets = series.day_offsets.tolist()
+        self.day_keys = [b[2] for b in series.day_bounds]
+        # First-hour range and full-day ATR per day (volatility filter inputs)
+        if sessions is None:
+            sessions = SessionSummary.from_series(series, FIRST_HOUR_BARS)
+        self.day_range = sessions.first_hour_range.tolist()
+        self.day_atr = sessions.atr.tolist()
+
+    def ema(self, period: int) -> np.ndarray:
+        if period not in self._ema:
+            self._ema[period] = window_ema(self.series.close, period)
+        return self._ema[period]
+
+    def pullback_signals(self, ema_fast: int, ema_slow: int, confirmation: bool = True):
+        """(long, short) bar masks for trend + pullback + candle colour (+ pullback break)"""
+        if ema_slow + 5 > LOOKBACK_WINDOW:
+            empty = np.zeros(self.n, dtype=bool)
+            return empty, empty
+        close = self.series.close
+        fast = self.ema(ema_fast)
+        slow = self.ema(ema_slow)
+        up = (fast > slow) & (close > slow) & (close < fast) & (close > slow)
+        down = (fast < slow) & (close < slow) & (close > fast) & (close < slow)
+        valid = np.arange(self.n) >= LOOKBACK_BARS
+        long_sig = up & self.color_up & valid
+        short_sig = down & self.color_down & valid
+        if confirmation:
+            long_sig &= self.confirm_up
+            short_sig &= self.confirm_down
+        return long_sig, short_sig
+
+    def quality(self, ema_fast: int, ema_slow: int) -> np.ndarray:
+        """calculate_trade_quality(lookback) for every bar, cached per EMA pair"""
+        key = (ema_fast, ema_slow)
+        if key not in self._quality:
+            series = self.series
+            self._quality[key] = trade_quality(series.close, series.high, series.low, series.volume,
+                                               self.ema(ema_fast), self.ema(ema_slow), separation_scale=200)
+        return self._quality[key]
+
+    def simulate_exit(self, g: int, day_end: int, trend: str, entry_price: float, stop: float,
+                      slip: float, risk: float, atr: float, config: Dict) -> float:
+        """Trailing stop + break-even exit from bar g+1 (same rules as validate_upgraded)"""
+        exit_price = self.close_list[day_end - 1]
+        trailing_stop = stop
+        trail_dist = atr * config['trailing_atr_mult']
+        be_triggered = False
+        cost_buffer = entry_price * 0.001
+        be_level = entry_price + cost_buffer if trend == 'UP' else entry_price - cost_buffer
+        highs, lows, opens = self.high_list, self.low_list, self.open_list
+
+        for j in range(g + 1, min(g + config['max_hold_bars'], day_end)):
+            if not be_triggered:
+                best_pnl_r = ((highs[j] - entry_price) / risk) if trend == 'UP' else ((entry_price - lows[j]) / risk)
+                if best_pnl_r >= config['break_even_r']:
+                    be_triggered = True
+                    if trend == 'UP':
+                        trailing_stop = max(trailing_stop, be_level)
+                    else:
+                        trailing_stop = min(trailing_stop, be_level)
+
+            if trend == 'UP':
+                if highs[j] > entry_price + trail_dist:
+                    trailing_stop = max(trailing_stop, highs[j] - trail_dist)
+                if lows[j] <= trailing_stop:
+                    exit_price = max(trailing_stop, opens[j]) - slip
+                    break
+            else:
+                if lows[j] < entry_price - trail_dist:
+                    trailing_stop = min(trailing_stop, lows[j] + trail_dist)
+                if highs[j] >= trailing_stop:
+                    exit_price = min(trailing_stop, opens[j]) + slip
+                    break
+        return exit_price
+
+# ============================================
+# Feature Precompute
+# ============================================
+# Building the indicator arrays is NumPy work that releases the GIL, so the
+# features of all symbols can be built on a thread pool inside one process,
+# with no pickling of series or features as a process pool would need.
+# Reading the JSON files holds the GIL, so that happens first, on the
+# calling thread. Each symbol's features are built by a single thread.
+
+def load_symbol(symbol: str, data_dir: str = base.DATA_DIR) -> Optional[Tuple[CandleSeries, SessionSummary]]:
+    """(series, session table) of one symbol, or None without a data file"""
+    file_path = os.path.join(data_dir, f"{symbol}.json")
+    if not os.path.exists(file_path):
+        return None
+    series = load_series(file_path)
+    return series, load_sessions(file_path, series)
+
+
+def warm_features(features: SymbolFeatures, configs: List[Dict]) -> SymbolFeatures:
+    """Compute the EMA and quality arrays every config will ask for"""
+    for pair in sorted({(c['ema_fast'], c['ema_slow']) for c in configs}):
+        features.quality(*pair)
+    return features
+
+
+def precompute_features(data: Dict[str, Tuple[CandleSeries, SessionSummary]], configs: List[Dict],
+                        threads: int = None) -> Dict[str, SymbolFeatures]:
+    """Warmed SymbolFeatures per symbol, built on a pool of ``threads`` threads (None: executor default)"""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        built = pool.map(lambda item: warm_features(SymbolFeatures(*item), configs), data.values())
+        return dict(zip(data, built))
+
+# ============================================
+# Batched State Machine
+# ============================================
+
+def run_batch(symbol: str, configs: List[Dict], data_dir: str = base.DATA_DIR,
+              features: SymbolFeatures = None) -> List[Dict]:
+    """Run every config over one symbol in a single scan; one result dict per config"""
+    if features is None:
+        loaded = load_symbol(symbol, data_dir)
+        if loaded is None:
+            return None
+        features = SymbolFeatures(*loaded)
+
+    K = len(configs)
+    col = lambda key, dtype=np.float64: np.array([c[key] for c in configs], dtype=dtype)
+    risk_per_trade = col('risk_per_trade')
+    max_trades = col('max_trades_per_day', np.int64)
+    max_daily_loss = col('max_daily_loss')
+    kill_dd = col('kill_switch_dd')
+    kill_days = col('kill_switch_days', np.int64)
+    min_range_atr = col('min_first_hour_range_atr')
+    adx_trending = col('adx_trending')
+    score_trending = col('score_trending')
+    score_normal = col('score_normal')
+    stop_mult = col('stop_atr_mult')
+
+    # K-wide signal masks: built once per distinct setup (EMA pair, pullback break,
+    # ADX gate) and shared by every config with that setup
+    pairs = sorted({(c['ema_fast'], c['ema_slow']) for c in configs})
+    pair_index = [pairs.index((c['ema_fast'], c['ema_slow'])) for c in configs]
+    setup_of = [(c['ema_fast'], c['ema_slow'], bool(c['entry_confirmation']), float(c['adx_normal']))
+                for c in configs]
+    setup_signals = {}
+    for setup in sorted(set(setup_of)):
+        long_setup, short_setup = features.pullback_signals(*setup[:3])
+        regime_ok = features.adx >= setup[3]
+        setup_signals[setup] = (long_setup & regime_ok, short_setup & regime_ok)
+    long_sig = np.stack([setup_signals[setup][0] for setup in setup_of])
+    short_sig = np.stack([setup_signals[setup][1] for setup in setup_of])
+    any_sig = (long_sig | short_sig).any(axis=0)
+    pair_quality = [features.quality(*p).tolist() for p in pairs]
+
+    # Per-config state
+    equity = np.full(K, float(base.INITIAL_CAPITAL))
+    peak = equity.copy()
+    rolling_peak = equity.copy()
+    max_dd = np.zeros(K)
+    pnl = np.zeros(K)
+    trades = np.zeros(K, dtype=np.int64)
+    wins = np.zeros(K, dtype=np.int64)
+    gross_profit = np.zeros(K)
+    gross_loss = np.zeros(K)
+    total_r = np.zeros(K)
+    kill_active = np.zeros(K, dtype=bool)
+    kill_end = np.zeros(K, dtype=np.int64)
+    kill_triggers = np.zeros(K, dtype=np.int64)
+    volatility_skips = np.zeros(K, dtype=np.int64)
+    daily_loss_breaches = np.zeros(K, dtype=np.int64)
+    num_days = len(features.day_keys)
+    daily_pnl_matrix = np.zeros((K, num_days))
+    traded_days = np.zeros((K, num_days), dtype=bool)
+    trade_logs = [[] for _ in range(K)]
+
+    exit_cache = {}
+    offsets = features.day_offsets
+
+    for day_idx in range(num_days):
+        d_start, d_end = offsets[day_idx], offsets[day_idx + 1]
+        if d_end - d_start < MIN_DAY_BARS:
+            continue
+
+        # UPGRADE #6: Kill switch (pause, then trigger on rolling drawdown)
+        paused = kill_active & (day_idx < kill_end)
+        kill_active &= paused
+        rolling_dd = np.where(rolling_peak > 0, (rolling_peak - equity) / rolling_peak, 0)
+        trigger = ~paused & (rolling_dd >= kill_dd)
+        kill_active |= trigger
+        kill_end = np.where(trigger, day_idx + kill_days, kill_end)
+        kill_triggers += trigger
+        tradeable = ~paused & ~trigger
+        rolling_peak = np.where(tradeable & (equity > rolling_peak), equity, rolling_peak)
+
+        # UPGRADE #2: Volatility filter
+        atr_day = features.day_atr[day_idx]
+        if atr_day > 0:
+            low_vol = tradeable & (features.day_range[day_idx] < atr_day * min_range_atr)
+            volatility_skips += low_vol
+            tradeable &= ~low_vol
+        if not tradeable.any():
+            continue
+
+        day_done = ~tradeable
+        day_trades = np.zeros(K, dtype=np.int64)
+        daily_pnl = np.zeros(K)
+        last_entry_bar = d_end - 2
+
+        candidates = np.flatnonzero(any_sig[max(d_start, LOOKBACK_BARS):d_end - 1]) + max(d_start, LOOKBACK_BARS)
+        for g in candidates.tolist():
+            if day_done.all():
+                break
+            for trend, sig in (('UP', long_sig), ('DOWN', short_sig)):
+                members = np.flatnonzero(sig[:, g] & ~day_done)
+                if len(members) == 0:
+                    continue
+
+                # UPGRADE #7: Quality score vs regime-adaptive threshold
+                adx = features.adx[g]
+                keep = []
+                for k in members.tolist():
+                    threshold = score_trending[k] if adx >= adx_trending[k] else score_normal[k]
+                    if pair_quality[pair_index[k]][g] >= threshold:
+                        keep.append(k)
+                if not keep:
+                    continue
+
+                # Sizing (depends on each config's equity) and exit (shared per exit params)
+                entry = features.close_list[g]
+                slip = entry * base.SLIPPAGE_PCT
+                entry_price = entry + slip if trend == 'UP' else entry - slip
+                atr = features.atr_list[g]
+                executed = []
+                exits = []
+                qtys = []
+                risk_amounts = []
+                for k in keep:
+                    if trend == 'UP':
+                        stop = features.swing_low_list[g] - atr * stop_mult[k]
+                    else:
+                        stop = features.swing_high_list[g] + atr * stop_mult[k]
+                    risk = abs(entry_price - stop)
+                    if risk <= 0:
+                        continue
+                    risk_amount = equity[k] * risk_per_trade[k]
+                    qty = int(risk_amount / risk)
+                    if qty <= 0:
+                        continue
+                    config = configs[k]
+                    exit_key = (g, trend, stop_mult[k], config['trailing_atr_mult'],
+                                config['break_even_r'], config['max_hold_bars'])
+                    if exit_key not in exit_cache:
+                        exit_cache[exit_key] = features.simulate_exit(
+                            g, d_end, trend, entry_price, stop, slip, risk, atr, config)
+                    executed.append(k)
+                    exits.append(exit_cache[exit_key])
+                    qtys.append(qty)
+                    risk_amounts.append(risk_amount)
+                if not executed:
+                    continue
+
+                idx = np.array(executed)
+                exit_price = np.array(exits)
+                qty = np.array(qtys, dtype=np.int64)
+                if trend == 'UP':
+                    trade_pnl = (exit_price - entry_price) * qty
+                    sell_value = exit_price * qty
+                else:
+                    trade_pnl = (entry_price - exit_price) * qty
+                    sell_value = entry_price * qty
+                net = trade_pnl - ((base.BROKERAGE * 2) + (sell_value * base.STT))
+                r_multiple = net / np.array(risk_amounts)
+
+                timestamp = format_timestamp(int(features.series.epoch[g]))
+                for k, x, q, n_k, r_k in zip(executed, exits, qtys, net.tolist(), r_multiple.tolist()):
+                    trade_logs[k].append({
+                        'date': features.day_keys[day_idx],
+                        'timestamp': timestamp,
+                        'direction': trend,
+                        'entry': entry_price,
+                        'exit': x,
+                        'qty': q,
+                        'pnl': n_k,
+                        'r_multiple': r_k,
+                    })
+
+                total_r[idx] += r_multiple
+                trades[idx] += 1
+                day_trades[idx] += 1
+                pnl[idx] += net
+                daily_pnl[idx] += net
+                equity[idx] += net
+                peak[idx] = np.maximum(peak[idx], equity[idx])
+                max_dd[idx] = np.maximum(max_dd[idx], (peak[idx] - equity[idx]) / peak[idx])
+                won = net > 0
+                wins[idx[won]] += 1
+                gross_profit[idx[won]] += net[won]
+                gross_loss[idx[~won]] += np.abs(net[~won])
+                daily_pnl_matrix[idx, day_idx] += net
+                traded_days[idx, day_idx] = True
+
+                # UPGRADE #1: max trades / daily loss stop the day from the next bar
+                hit_max = day_trades[idx] >= max_trades[idx]
+                hit_loss = ~hit_max & (daily_pnl[idx] <= -(equity[idx] * max_daily_loss[idx]))
+                if g < last_entry_bar:
+                    daily_loss_breaches[idx[hit_loss]] += 1
+                day_done[idx[hit_max | hit_loss]] = True
+
+    results = []
+    for k, config in enumerate(configs):
+        n_trades = int(trades[k])
+        results.append({
+            'symbol': features.series.symbol,
+            'config': config,
+            'trades': n_trades,
+            'wins': int(wins[k]),
+            'win_rate': (wins[k] / n_trades * 100) if n_trades > 0 else 0,
+            'pnl': float(pnl[k]),
+            'total_return': float(pnl[k] / base.INITIAL_CAPITAL * 100),
+            'max_dd': float(max_dd[k] * 100),
+            'avg_trade': float(pnl[k] / n_trades) if n_trades > 0 else 0,
+            'avg_r_multiple': float(total_r[k] / n_trades) if n_trades > 0 else 0,
+            'trading_days': int(traded_days[k].sum()),
+            'daily_returns': {features.day_keys[d]: float(daily_pnl_matrix[k, d])
+                              for d in np.flatnonzero(traded_days[k]).tolist()},
+            'trade_log': trade_logs[k],
+            'risk_metrics': {
+                'volatility_skips': int(volatility_skips[k]),
+                'daily_loss_breaches': int(daily_loss_breaches[k]),
+                'kill_switch_triggers': int(kill_triggers[k]),
+                'gross_profit': float(gross_profit[k]),
+                'gross_loss': float(gross_loss[k]),
+            },
+        })
+    return results
+
+
+def run_sweep(symbols: List[str], configs: List[Dict], data_dir: str = base.DATA_DIR,
+              threads: int = None) -> List[Dict]:
+    """Run all configs over all symbols; returns per-config aggregates with per-symbol results
+
+    With ``threads`` the features of all symbols are precomputed up front on
+    a thread pool of that size (see Feature Precompute).
+    """
+    features = {}
+    if threads:
+        data = {s: loaded for s in symbols if (loaded := load_symbol(s, data_dir)) is not None}
+        features = precompute_features(data, configs, threads)
+    per_config = [{'config': c, 'symbols': {}} for c in configs]
+    for symbol in symbols:
+        results = run_batch(symbol, configs, data_dir, features.get(symbol))
+        if results is None:
+            continue
+        for entry, result in zip(per_config, results):
+            entry['symbols'][symbol] = result
+
+    for entry in per_config:
+        entry.update(aggregate(list(entry['symbols'].values())))
+    return per_config
+
+
+def aggregate(results: List[Dict]) -> Dict:
+    """Portfolio totals over per-symbol results (same formulas as validate_upgraded.main)"""
+    total_trades = sum(r['trades'] for r in results)
+    total_wins = sum(r['wins'] for r in results)
+    total_pnl = sum(r['pnl'] for r in results)
+    gross_profit = sum(r['risk_metrics']['gross_profit'] for r in results)
+    gross_loss = sum(r['risk_metrics']['gross_loss'] for r in results)
+    return {
+        'trades': total_trades,
+        'wins': total_wins,
+        'win_rate': (total_wins / total_trades * 100) if total_trades > 0 else 0,
+        'pnl': total_pnl,
+        'total_return': total_pnl / base.INITIAL_CAPITAL * 100,
+        'profit_factor': (gross_profit / gross_loss) if gross_loss > 0 else 0,
+        'max_dd': max((r['max_dd'] for r in results), default=0),
+        'avg_r_multiple': (sum(r['avg_r_multiple'] * r['trades'] for r in results) / total_trades
+                           if total_trades > 0 else 0),
+    }
+
+# ============================================
+# Demo Sweep
+# ============================================
+
+def demo_configs() -> List[Dict]:
+    """200-config grid over sizing, risk limits and exit parameters"""
+    return config_grid(
+        ema_fast=[9, 15],
+        risk_per_trade=[0.002, 0.003],
+        max_trades_per_day=[1, 2],
+        trailing_atr_mult=[1.5, 2.0, 2.5, 3.0, 3.5],
+        score_normal=[0.4, 0.5, 0.6, 0.7, 0.8],
+    )
+
+
+def main():
+    print("=" * 70)
+    print("BATCHED WHAT-IF SWEEP - 8-FILTER STRATEGY")
+    print("=" * 70)
+
+    symbols = list_symbols(base.DATA_DIR)
+    configs = demo_configs()
+    print(f"\nSymbols: {len(symbols)}, Configs: {len(configs)}")
+
+    t0 = time.perf_counter()
+    single = run_sweep(symbols, [make_config()])
+    single_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    sweep = run_sweep(symbols, configs)
+    sweep_time = time.perf_counter() - t0
+
+    print(f"\n⏱️ 1 config: {single_time:.2f}s | {len(configs)} configs: {sweep_time:.2f}s "
+          f"({sweep_time / single_time:.1f}x a single run)")
+    print(f"   Default config: {single[0]['trades']} trades, P&L ₹{single[0]['pnl']:,.0f}")
+
+    conn = results_store.connect()
+    run_id = results_store.create_run(conn, 'batch_engine demo sweep', kind='sweep', data_dir=base.DATA_DIR)
+    t0 = time.perf_counter()
+    results_store.save_sweep(conn, run_id, sweep)
+    write_time = time.perf_counter() - t0
+    rows = conn.execute("SELECT COUNT(*) FROM trades WHERE run_id = ?", (run_id,)).fetchone()[0]
+    print(f"💾 Saved run #{run_id} to {results_store.RESULTS_DB} in {write_time:.2f}s ({rows:,} trades)")
+
+    print("\n" + "-" * 70)
+    print("TOP 10 CONFIGS BY PROFIT FACTOR (MAX DD < 10%)")
+    print("-" * 70)
+    varied = ['ema_fast', 'risk_per_trade', 'max_trades_per_day', 'trailing_atr_mult', 'score_normal']
+    for entry in results_store.best_configs(conn, run_id, max_dd=10, limit=10):
+        params = ", ".join(f"{k}={entry['config'][k]}" for k in varied)
+        print(f"PF {entry['profit_factor']:5.2f} | Trades {entry['trades']:4} | "
+              f"P&L ₹{entry['pnl']:>10,.0f} | DD {entry['max_dd']:4.1f}% | {params}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Candle Series
+Compact array-backed candle storage with O(1) zero-copy window views
+"""
+
+import hashlib
+import json
+import os
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+DATA_DIRS = ["data/tv_data", "data/tv_data_15min", "data/tv_data_daily"]
+
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+# ============================================
+# Time Keys
+# ============================================
+# Bars are stored with int64 UTC epoch seconds. The JSON files carry naive
+# NSE (IST) wall-clock times, so day/month/year keys are taken in IST.
+
+IST_OFFSET = 19800  # +05:30 in seconds
+IST = timezone(timedelta(seconds=IST_OFFSET))
+
+
+def parse_epochs(timestamps: List[str]) -> np.ndarray:
+    """Naive IST ISO strings -> int64 UTC epoch seconds (one vectorized parse)"""
+    local = np.array(timestamps, dtype='datetime64[s]')
+    return local.astype(np.int64) - IST_OFFSET
+
+
+def format_timestamp(epoch: int) -> str:
+    """int64 UTC epoch -> naive IST ISO string, as stored in the JSON files"""
+    return datetime.fromtimestamp(int(epoch), IST).replace(tzinfo=None).isoformat()
+
+
+def time_keys(epochs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """IST calendar keys per bar: (YYYYMMDD, YYYYMM, YYYY) as int32 arrays"""
+    local = (epochs + IST_OFFSET).astype('datetime64[s]')
+    years = local.astype('datetime64[Y]').astype(np.int32) + 1970
+    months = local.astype('datetime64[M]').astype(np.int32) % 12 + 1
+    day_start = local.astype('datetime64[D]')
+    days = (day_start - day_start.astype('datetime64[M]')).astype(np.int32) + 1
+    month_keys = years * 100 + months
+    return month_keys * 100 + days, month_keys, years
+
+
+def day_offsets(day_keys: np.ndarray) -> np.ndarray:
+    """Boundary offsets of runs of equal day keys: day i is ``[off[i], off[i+1])``"""
+    if len(day_keys) == 0:
+        return np.zeros(1, dtype=np.int64)
+    starts = np.flatnonzero(day_keys[1:] != day_keys[:-1]) + 1
+    return np.concatenate(([0], starts, [len(day_keys)])).astype(np.int64)
+
+
+def day_key_str(day_key: int) -> str:
+    """YYYYMMDD int -> 'YYYY-MM-DD'"""
+    return f"{day_key // 10000:04d}-{day_key // 100 % 100:02d}-{day_key % 100:02d}"
+
+
+def day_key_int(date_str: str) -> int:
+    """'YYYY-MM-DD' (or longer ISO string) -> YYYYMMDD int"""
+    return int(date_str[:4]) * 10000 + int(date_str[5:7]) * 100 + int(date_str[8:10])
+
+# ============================================
+# Candle
+# ============================================
+
+class Candle:
+    """One bar with the same ``['close']`` access as the JSON candle dicts.
+
+    ``__slots__`` drops the per-bar dict; ``symbol`` is a shared reference
+    to the series' symbol string rather than a copy per bar. The bar time
+    is kept as ``epoch``; ``['timestamp']`` formats the original ISO string
+    on demand.
+    """
+
+    __slots__ = ('symbol', 'epoch', 'open', 'high', 'low', 'close', 'volume')
+
+    # c['close'] resolves straight to the slot (C-level, no Python frame)
+    __getitem__ = object.__getattribute__
+
+    def __init__(self, symbol: str, epoch: int, open: float, high: float,
+                 low: float, close: float, volume: int):
+        self.symbol = symbol
+        self.epoch = epoch
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def timestamp(self) -> str:
+        return format_timestamp(self.epoch)
+
+    @classmethod
+    def from_dict(cls, candle: Dict, symbol: str = None) -> 'Candle':
+        epoch = int(parse_epochs([candle['timestamp']])[0])
+        return cls(symbol or candle.get('symbol', ''), epoch, candle['open'],
+                   candle['high'], candle['low'], candle['close'], candle['volume'])
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self) -> Tuple[str, ...]:
+        return ('symbol',) + FIELDS
+
+    def to_dict(self) -> Dict:
+        return {key: getattr(self, key) for key in self.keys()}
+
+    def __repr__(self):
+        return (f"Candle({self.symbol} {self.timestamp} O={self.open} H={self.high} "
+                f"L={self.low} C={self.close} V={self.volume})")
+
+# ============================================
+# Window View
+# ============================================
+
+class CandleWindow:
+    """Read-only view of ``rows[start:stop]`` that never copies.
+
+    Behaves like the list slices the indicator functions were written for:
+    ``len()``, iteration, positive/negative indexing returning a candle
+    with ``['close']`` access, and slicing (which returns another view).
+    """
+
+    __slots__ = ('rows', 'start', 'stop')
+
+    def __init__(self, rows: List, start: int, stop: int):
+        self.rows = rows
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, key):
+        size = self.stop - self.start
+        if isinstance(key, slice):
+            start, stop, step = key.indices(size)
+            if step != 1:
+                return [self.rows[self.start + i] for i in range(start, stop, step)]
+            return CandleWindow(self.rows, self.start + start, self.start + max(start, stop))
+
+        if key < 0:
+            key += size
+        if key < 0 or key >= size:
+            raise IndexError("candle window index out of range")
+        return self.rows[self.start + key]
+
+    def __iter__(self) -> Iterator:
+        return map(self.rows.__getitem__, range(self.start, self.stop))
+
+    def __bool__(self) -> bool:
+        return self.stop > self.start
+
+    def __repr__(self):
+        return f"CandleWindow({self.start}:{self.stop})"
+
+    def column(self, field: str) -> List:
+        """Values of one field over the window (allocates a list)"""
+        return [row[field] for row in self]
+
+# ============================================
+# Series
+# ============================================
+
+SERIES_COLUMNS = ('epoch', 'open', 'high', 'low', 'close', 'volume',
+                  'day_key', 'month_key', 'year', 'day_offsets')
+
+
+class CandleSeries:
+    """All candles of one symbol in time order, stored as per-field arrays.
+
+    Prices are float64 and volume/epoch int64 NumPy arrays (8 bytes per
+    value, no per-bar objects), with int32 IST day/month/year keys and
+    trading-day boundary offsets precomputed at load. Legacy indicator code
+    that wants candle rows gets them through ``window()``/``lookback()``/
+    slicing, backed by ``rows``: Candle objects materialized once on first
+    use and dropped with ``release_rows()``.
+    """
+
+    def __init__(self, symbol: str, epochs: np.ndarray, opens: np.ndarray, highs: np.ndarray,
+                 lows: np.ndarray, closes: np.ndarray, volumes: np.ndarray):
+        self.symbol = symbol
+        self.epoch = np.asarray(epochs, dtype=np.int64)
+        self.open = np.asarray(opens, dtype=np.float64)
+        self.high = np.asarray(highs, dtype=np.float64)
+        self.low = np.asarray(lows, dtype=np.float64)
+        self.close = np.asarray(closes, dtype=np.float64)
+        self.volume = np.asarray(volumes, dtype=np.int64)
+        self.day_key, self.month_key, self.year = time_keys(self.epoch)
+        self.day_offsets = day_offsets(self.day_key)
+        self._rows = None
+
+    @classmethod
+    def from_columns(cls, symbol: str, columns: Dict[str, np.ndarray]) -> 'CandleSeries':
+        """Rebuild from columns() output without copying or recomputing the day keys"""
+        series = cls.__new__(cls)
+        series.symbol = symbol
+        for name in SERIES_COLUMNS:
+            setattr(series, name, columns[name])
+        series._rows = None
+        return series
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Every stored array, including the derived day keys and offsets"""
+        return {name: getattr(self, name) for name in SERIES_COLUMNS}
+
+    @classmethod
+    def from_candles(cls, symbol: str, candles: List[Dict]) -> 'CandleSeries':
+        """Build from a flat, time-ordered candle list (either JSON layout)"""
+        return cls(
+            symbol,
+            parse_epochs([c['timestamp'] for c in candles]),
+            [c['open'] for c in candles],
+            [c['high'] for c in candles],
+            [c['low'] for c in candles],
+            [c['close'] for c in candles],
+            [c['volume'] for c in candles],
+        )
+
+    @classmethod
+    def from_days(cls, symbol: str, days_data: Dict[str, List[Dict]]) -> 'CandleSeries':
+        """Build from the ``{'YYYY-MM-DD': [candles]}`` intraday layout"""
+        candles = []
+        for day_key in sorted(days_data.keys()):
+            candles.extend(days_data[day_key])
+        return cls.from_candles(symbol, candles)
+
+    @property
+    def timestamp(self) -> List[str]:
+        """ISO timestamp strings (formatted on demand)"""
+        return [format_timestamp(e) for e in self.epoch]
+
+    @property
+    def num_days(self) -> int:
+        return len(self.day_offsets) - 1
+
+    @property
+    def day_bounds(self) -> List[Tuple[int, int, str]]:
+        """``(start_idx, end_idx, 'YYYY-MM-DD')`` per trading day"""
+        offsets = self.day_offsets.tolist()
+        keys = self.day_key[self.day_offsets[:-1]].tolist()
+        return [(offsets[i], offsets[i + 1], day_key_str(keys[i])) for i in range(len(keys))]
+
+    def date_range(self, start_date: str, end_date: str) -> Tuple[int, int]:
+        """Index range ``[start, stop)`` of bars dated start_date..end_date inclusive"""
+        start = int(np.searchsorted(self.day_key, day_key_int(start_date), side='left'))
+        stop = int(np.searchsorted(self.day_key, day_key_int(end_date), side='right'))
+        return start, stop
+
+    # ============================================
+    # Row access (legacy indicator functions)
+    # ============================================
+
+    @property
+    def rows(self) -> List[Candle]:
+        """Candle objects for every bar, built on first access"""
+        if self._rows is None:
+            symbol = self.symbol
+            self._rows = [
+                Candle(symbol, e, o, h, l, c, v)
+                for e, o, h, l, c, v in zip(self.epoch.tolist(), self.open.tolist(),
+                                            self.high.tolist(), self.low.tolist(),
+                                            self.close.tolist(), self.volume.tolist())
+            ]
+        return self._rows
+
+    def release_rows(self):
+        """Drop materialized Candle rows, keeping only the arrays"""
+        self._rows = None
+
+    def fingerprint(self, stop: int = None) -> str:
+        """Hash of the first ``stop`` bars (all by default); unchanged when bars are only appended"""
+        digest = hashlib.sha1()
+        for column in (self.epoch, self.open, self.high, self.low, self.close, self.volume):
+            digest.update(np.ascontiguousarray(column[:stop]).tobytes())
+        return digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self.epoch)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self.window(0, len(self))[key]
+        return self.rows[key]
+
+    def __iter__(self) -> Iterator[Candle]:
+        return iter(self.rows)
+
+    def window(self, start: int, stop: int) -> CandleWindow:
+        """Zero-copy view of bars ``start`` (inclusive) to ``stop`` (exclusive)"""
+        return CandleWindow(self.rows, max(start, 0), min(stop, len(self)))
+
+    def lookback(self, idx: int, bars: int) -> CandleWindow:
+        """View of the ``bars`` candles before ``idx`` plus ``idx`` itself"""
+        return self.window(idx - bars, idx + 1)
+
+    def days(self) -> Iterator[Tuple[int, CandleWindow, str]]:
+        """Yield ``(day_start_idx, day_window, day_key)`` per trading day"""
+        rows = self.rows
+        for start, stop, day_key in self.day_bounds:
+            yield start, CandleWindow(rows, start, stop), day_key
+
+    def day_window(self, day_idx: int) -> CandleWindow:
+        """Bars of the ``day_idx``-th trading day"""
+        return CandleWindow(self.rows, int(self.day_offsets[day_idx]),
+                            int(self.day_offsets[day_idx + 1]))
+
+    # ============================================
+    # Column access (vectorized consumers)
+    # ============================================
+
+    def column(self, field: str) -> np.ndarray:
+        """Whole-history array for one field (no copy); 'timestamp' gives epochs"""
+        if field == 'timestamp':
+            return self.epoch
+        if field not in FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def nbytes(self) -> int:
+        """Footprint of the column storage"""
+        return sum(arr.nbytes for arr in (self.epoch, self.open, self.high, self.low, self.close,
+                                          self.volume, self.day_key, self.month_key, self.year,
+                                          self.day_offsets))
+
+# ============================================
+# Loading & Adapters
+# ============================================
+
+def load_series(file_path: str) -> CandleSeries:
+    """Load a tv_data* JSON file (``days`` or ``candles`` layout) as a CandleSeries"""
+    with open(file_path, 'r') as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        candles = data
+        symbol = candles[0]['symbol'] if candles else ''
+        return CandleSeries.from_candles(symbol, candles)
+
+    symbol = data.get('symbol', os.path.splitext(os.path.basename(file_path))[0])
+    if 'days' in data:
+        return CandleSeries.from_days(symbol, data['days'])
+    return CandleSeries.from_candles(symbol, data.get('candles', []))
+
+
+def as_candles(candles):
+    """Adapt a CandleSeries to the candle-list interface the validators expect.
+
+    CandleSeries becomes a full-length CandleWindow; lists of dicts, windows
+    and lists of Candle objects pass through unchanged.
+    """
+    if isinstance(candles, CandleSeries):
+        return candles.window(0, len(candles))
+    return candles
+
+
+def list_symbols(data_dir: str) -> List[str]:
+    """Symbol names with a data file in data_dir"""
+    return sorted(f.replace('.json', '') for f in os.listdir(data_dir)
+                  if f.endswith('.json') and f not in ('summary.json', 'all_symbols.json'))
+
+# ============================================
+# Derived-Data Cache
+# ============================================
+# Arrays derived from a store file (resampled bars, session tables) are
+# cached as .npz under CACHE_DIR together with the source file's
+# (size, mtime_ns); an entry is used only while the source is unchanged.
+
+CACHE_DIR = "data/cache"
+
+
+def source_fingerprint(path: str) -> np.ndarray:
+    stat = os.stat(path)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def read_cache(path: str, fingerprint: np.ndarray) -> Dict[str, np.ndarray]:
+    """Cached arrays, or None if missing or built from a different source version"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as cached:
+        if not np.array_equal(cached['fingerprint'], fingerprint):
+            return None
+        return {key: cached[key] for key in cached.files if key != 'fingerprint'}
+
+
+def write_cache(path: str, arrays: Dict[str, np.ndarray], fingerprint: np.ndarray):
+    """Write atomically, so a concurrent reader never sees a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, fingerprint=fingerprint, **arrays)
+    os.replace(tmp_path, path)
+
+# ============================================
+# Memory Comparison
+# ============================================
+
+def measure_memory(data_dirs: List[str] = DATA_DIRS) -> Dict:
+    """Traced bytes per bar for all data dirs: JSON dicts vs CandleSeries"""
+    file_paths = [os.path.join(d, f"{s}.json") for d in data_dirs if os.path.isdir(d)
+                  for s in list_symbols(d)]
+
+    tracemalloc.start()
+    raw = []
+    for path in file_paths:
+        with open(path, 'r') as f:
+            raw.append(json.load(f))
+    dict_bytes, _ = tracemalloc.get_traced_memory()
+    bars = sum(sum(len(day) for day in d['days'].values()) if 'days' in d else len(d['candles'])
+               for d in raw)
+    del raw
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    series = [load_series(path) for path in file_paths]
+    series_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'files': len(file_paths),
+        'bars': bars,
+        'dict_bytes': dict_bytes,
+        'series_bytes': series_bytes,
+        'dict_bytes_per_bar': dict_bytes / bars if bars else 0,
+        'series_bytes_per_bar': series_bytes / bars if bars else 0,
+        'reduction': dict_bytes / series_bytes if series_bytes else 0,
+    }
+
+
+def main():
+    print("=" * 60)
+    print("CANDLE STORAGE MEMORY - JSON DICTS vs CANDLE SERIES")
+    print("=" * 60)
+    stats = measure_memory()
+    print(f"\nFiles: {stats['files']}, Bars: {stats['bars']:,}")
+    print(f"  List of dicts:  {stats['dict_bytes'] / 1e6:8.1f} MB ({stats['dict_bytes_per_bar']:.0f} B/bar)")
+    print(f"  CandleSeries:   {stats['series_bytes'] / 1e6:8.1f} MB ({stats['series_bytes_per_bar']:.0f} B/bar)")
+    print(f"  Reduction:      {stats['reduction']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Candle Stream
+Chunked, bounded-memory reading of long candle histories for the strategy engine
+"""
+
+import json
+import tracemalloc
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+BLOCK_CHARS = 1 << 16   # characters read from disk per refill
+CHUNK_SIZE = 250        # bars per chunk (about one trading year of daily bars)
+
+# ============================================
+# Incremental JSON Reader
+# ============================================
+# json.load materializes the whole file. The tv_data_daily files are either
+# a bare list of candles or {"symbol": ..., "candles": [...]}; this reader
+# finds the candle array and decodes one candle object at a time from a
+# fixed-size text buffer, so memory does not grow with the file.
+
+def _array_start(buf: str) -> int:
+    """Offset just past the '[' that opens the candle array, or -1 if not in buf yet"""
+    head = buf.lstrip()
+    if head.startswith('['):
+        return len(buf) - len(head) + 1
+    key = buf.find('"candles"')
+    if key < 0:
+        return -1
+    bracket = buf.find('[', key)
+    return bracket + 1 if bracket >= 0 else -1
+
+
+def iter_json_candles(file_path: str, block_chars: int = BLOCK_CHARS) -> Iterator[Dict]:
+    """Yield the candle dicts of a daily-layout JSON file in order, one at a time"""
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r') as f:
+        buf = f.read(block_chars)
+        pos = _array_start(buf)
+        while pos < 0:
+            more = f.read(block_chars)
+            if not more:
+                return
+            buf += more
+            pos = _array_start(buf)
+
+        while True:
+            # Skip separators between objects
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                candle, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                # Object cut off at the buffer end: keep the tail, read more
+                more = f.read(block_chars)
+                if not more:
+                    raise
+                buf = buf[pos:] + more
+                pos = 0
+                continue
+            yield candle
+            pos = end
+
+# ============================================
+# Rolling Candle Window
+# ============================================
+
+class CandleStream:
+    """Candles read chunk by chunk, indexed by global bar number like the full list.
+
+    Only the current chunk plus ``keep`` earlier bars are held; strategies
+    must not look further back than that (their indicator lookback). The
+    engine consumes ``sessions()`` - one session per chunk - and carries
+    open positions across chunks, so a run over a stream matches the
+    in-memory run exactly as long as no per-session limits are used.
+    """
+
+    def __init__(self, candles: Iterable[Dict], chunk_size: int = CHUNK_SIZE, keep: int = 0):
+        self.source = iter(candles)
+        self.chunk_size = chunk_size
+        self.keep = keep
+        self.buffer: List[Dict] = []
+        self.base = 0     # global index of buffer[0]
+        self.count = 0    # bars read so far
+        self.first = None
+        self.max_buffered = 0
+
+    def sessions(self, key: str = '') -> Iterator[Tuple[int, int, str]]:
+        """Read the next chunk (evicting bars beyond ``keep``) and yield its (start, end, key)"""
+        while True:
+            chunk = list(islice(self.source, self.chunk_size))
+            if not chunk:
+                return
+            if self.first is None:
+                self.first = chunk[0]
+            drop = len(self.buffer) - self.keep
+            if drop > 0:
+                del self.buffer[:drop]
+                self.base += drop
+            start = self.count
+            self.buffer.extend(chunk)
+            self.count += len(chunk)
+            self.max_buffered = max(self.max_buffered, len(self.buffer))
+            yield start, self.count, key
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _offset(self, idx: int) -> int:
+        offset = idx - self.base
+        if offset < 0:
+            raise IndexError(f"bar {idx} was evicted (holding bars {self.base}..{self.count - 1})")
+        return offset
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1) or (key.start or 0) < 0 or (key.stop is not None and key.stop < 0):
+                raise IndexError("streams support forward slices with global, non-negative bounds")
+            start = self._offset(key.start or 0)
+            stop = None if key.stop is None else max(key.stop - self.base, 0)
+            return self.buffer[start:stop]
+        if key < 0:
+            return self.buffer[key]  # relative to the newest bar read
+        return self.buffer[self._offset(key)]
+
+
+def date_filtered(candles: Iterable[Dict], start_date: str, end_date: str) -> Iterator[Dict]:
+    """Candles dated start_date..end_date inclusive; stops reading after end_date"""
+    for c in candles:
+        day = c['timestamp'][:10]
+        if day > end_date:
+            return
+        if day >= start_date:
+            yield c
+
+# ============================================
+# Memory Check
+# ============================================
+
+def peak_memory(run, *args, **kwargs) -> Tuple[object, int]:
+    """(result, peak traced bytes) of one call"""
+    tracemalloc.start()
+    try:
+        result = run(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
@@ -1,15 +1,35 @@
+#!/usr/bin/env python3
+"""
+Monthly Performance Check
+Month-by-month P&L of the latest saved validate_upgraded run
+"""
 
-import json
-import os
-from datetime import datetime
+import analytics
+import results_store
+import validate_upgraded
+
+
+def latest_backtest(conn) -> int:
+    """run_id of the latest saved backtest, running and saving one if there is none"""
+    run_id = results_store.latest_run(conn, kind='backtest')
+    if run_id is None:
+        validate_upgraded.main(save=True)
+        run_id = results_store.latest_run(conn, kind='backtest')
+    return run_id
 
-DATA_DIR = "data/tv_data_15min"
-INITIAL_CAPITAL = 500000
 
 def get_monthly_stats():
-    # We will use the results from the latest run conceptually or analyze the daily_returns if we had them.
-    # Since I don't have the daily_returns dictionary saved in a file, I will do a quick run on one symbol (ITC or WIPRO)
-    # to see monthly performance.
-    pass
+    conn = results_store.connect()
+    run_id = latest_backtest(conn)
+    daily = analytics.load_daily_returns(conn, run_id)
+
+    table = analytics.period_table(daily, 'month')
+    analytics.print_period_table(table, f"📅 Monthly P&L - run #{run_id}")
+
+    positive = sum(1 for row in table if row['pnl'] > 0)
+    print(f"\nProfitable months: {positive}/{len(table)}")
+    conn.close()
+
 
-# This is a scratchpad script. I'll just explain the logic in the thought.
+if __name__ == "__main__":
+    get_monthly_stats()
@@ -1,24 +1,31 @@
+#!/usr/bin/env python3
+"""
+Real Profit Check - 2024 vs 2025
+Production logic (8 filters) per year, from the latest saved validate_upgraded run
+"""
+
+import analytics
+import results_store
+from check_monthly import latest_backtest
+
+SYMBOLS = ["RELIANCE", "ITC", "HDFCBANK", "INFY", "TCS"]
+YEARS = [2024, 2025]
 
-import os
-import json
-from validate_upgraded import process_symbol_with_filters, INITIAL_CAPITAL
 
 def run_yearly_comparison():
-    DATA_DIR = "data/tv_data_15min"
-    symbols = ["RELIANCE", "ITC", "HDFCBANK", "INFY", "TCS"]
-    
-    yearly_stats = {} # {year: {pnl: 0, trades: 0}}
-    
-    print("🚀 RUNNING REAL PRODUCTION LOGIC (8 FILTERS) BY YEAR...")
-    
-    for symbol in symbols:
-        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-        if not os.path.exists(file_path): continue
-        
-        # We need to run the actual logic but filter the results by year
-        # I'll just run the process function and look at the daily_returns keys
-        # Wait, process_symbol_with_filters doesn't return date-level PnL in the summary, 
-        # but I can modify a copy to do it.
-        pass
+    print("🚀 REAL PRODUCTION LOGIC (8 FILTERS) BY YEAR...")
+    conn = results_store.connect()
+    run_id = latest_backtest(conn)
+
+    rows = analytics.compare_years(conn, run_id, YEARS, SYMBOLS)
+    print(f"\nRun #{run_id} | Symbols: {', '.join(SYMBOLS)}")
+    print(f"{'Year':<6} | {'Trades':>6} | {'Win Rate':>8} | {'P&L':>12} | {'PF':>5}")
+    print("-" * 50)
+    for row in rows:
+        print(f"{row['year']:<6} | {row['trades']:>6} | {row['win_rate']:>7.1f}% | "
+              f"₹{row['pnl']:>11,.0f} | {row['profit_factor']:>5.2f}")
+    conn.close()
+
 
-# I will write a script that actually executes the logic for 2024 vs 2025.
+if __name__ == "__main__":
+    run_yearly_comparison()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Checkpoint Store
+End-of-run engine checkpoints on disk, so a backtest only simulates days appended since the last run
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+from results_store import config_hash
+
+CHECKPOINT_DIR = "results/checkpoints"
+
+# ============================================
+# Files
+# ============================================
+# One JSON file per (runner, symbol, config): the config hash is part of the
+# file name, the data hash of the covered bars is inside the checkpoint and
+# is checked by the engine (strategy_engine.can_resume) before resuming.
+
+def checkpoint_path(name: str, symbol: str, config: Dict, checkpoint_dir: str = CHECKPOINT_DIR) -> str:
+    return os.path.join(checkpoint_dir, name, f"{symbol}-{config_hash(config)[:16]}.json")
+
+
+def load_checkpoint(name: str, symbol: str, config: Dict,
+                    checkpoint_dir: str = CHECKPOINT_DIR) -> Optional[Dict]:
+    """Last saved checkpoint for this runner, symbol and config, or None"""
+    path = checkpoint_path(name, symbol, config, checkpoint_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_checkpoint(name: str, symbol: str, config: Dict, checkpoint: Dict,
+                    checkpoint_dir: str = CHECKPOINT_DIR):
+    """Write atomically, replacing the previous checkpoint"""
+    if checkpoint is None:
+        return
+    path = checkpoint_path(name, symbol, config, checkpoint_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
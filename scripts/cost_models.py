@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Trade Cost Models
+Per-trade charges for the strategy engine, and bulk re-costing of stored trade logs with NumPy
+"""
+
+import sqlite3
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import results_store
+
+# ============================================
+# Fee Schedules (NSE equity, discount broker)
+# ============================================
+# Rates are fractions of traded value. Brokerage is charged per executed
+# order (entry and exit legs) as min(rate * leg value, cap). GST applies to
+# brokerage + exchange + SEBI charges; stamp duty only to the buy leg.
+
+INTRADAY_FEES = {
+    'brokerage_rate': 0.0003,      # 0.03% per order ...
+    'brokerage_cap': 20.0,         # ... capped at ₹20
+    'stt_buy': 0.0,
+    'stt_sell': 0.00025,           # 0.025% on the sell leg
+    'exchange': 0.0000297,         # NSE transaction charge, both legs
+    'sebi': 0.000001,              # ₹10 per crore, both legs
+    'gst': 0.18,
+    'stamp_buy': 0.00003,          # 0.003% on the buy leg
+    'slippage': 0.0,               # extra per-leg slippage, on traded value (see IndianEquityCosts)
+}
+
+DELIVERY_FEES = {
+    'brokerage_rate': 0.0,
+    'brokerage_cap': 0.0,
+    'stt_buy': 0.001,              # 0.1% on both legs
+    'stt_sell': 0.001,
+    'exchange': 0.0000297,
+    'sebi': 0.000001,
+    'gst': 0.18,
+    'stamp_buy': 0.00015,          # 0.015% on the buy leg
+    'slippage': 0.0,
+}
+
+FEE_SCHEDULES = {'intraday': INTRADAY_FEES, 'delivery': DELIVERY_FEES}
+
+# ============================================
+# Columnar Trade Log
+# ============================================
+
+class TradeColumns:
+    """Trades as parallel arrays: side (+1 long / -1 short), entry, exit, qty, stored net pnl"""
+
+    def __init__(self, side: np.ndarray, entry: np.ndarray, exit: np.ndarray, qty: np.ndarray,
+                 pnl: np.ndarray, symbol: np.ndarray = None):
+        self.side = side
+        self.entry = entry
+        self.exit = exit
+        self.qty = qty
+        self.pnl = pnl
+        self.symbol = symbol if symbol is not None else np.full(len(pnl), '')
+
+    @classmethod
+    def from_log(cls, trade_log: List[Dict], symbol: str = '') -> 'TradeColumns':
+        """From a validator/engine trade_log (dicts with direction, entry, exit, qty, pnl)"""
+        return cls(np.array([1 if t['direction'] == 'UP' else -1 for t in trade_log], dtype=np.int8),
+                   np.array([t['entry'] for t in trade_log], dtype=np.float64),
+                   np.array([t['exit'] for t in trade_log], dtype=np.float64),
+                   np.array([t['qty'] for t in trade_log], dtype=np.float64),
+                   np.array([t['pnl'] for t in trade_log], dtype=np.float64),
+                   np.full(len(trade_log), symbol))
+
+    def __len__(self):
+        return len(self.pnl)
+
+    @property
+    def is_long(self) -> np.ndarray:
+        return self.side > 0
+
+    @property
+    def gross_pnl(self) -> np.ndarray:
+        # Same operand order as the engine so re-costing reproduces stored P&L exactly
+        return np.where(self.is_long, (self.exit - self.entry) * self.qty, (self.entry - self.exit) * self.qty)
+
+    @property
+    def buy_value(self) -> np.ndarray:
+        return np.where(self.is_long, self.entry * self.qty, self.exit * self.qty)
+
+    @property
+    def sell_value(self) -> np.ndarray:
+        return np.where(self.is_long, self.exit * self.qty, self.entry * self.qty)
+
+
+def load_trades(conn: sqlite3.Connection, run_id: int, config_id: int = None) -> TradeColumns:
+    """All stored trades of a run (optionally one config) as columns"""
+    sql = "SELECT direction, entry, exit, qty, pnl, symbol FROM trades WHERE run_id = ?"
+    params = [run_id]
+    if config_id is not None:
+        sql += " AND config_id = ?"
+        params.append(config_id)
+    rows = conn.execute(sql, params).fetchall()
+    if not rows:
+        empty = np.zeros(0)
+        return TradeColumns(np.zeros(0, np.int8), empty, empty, empty, empty, np.zeros(0, dtype='U1'))
+    direction, entry, exit, qty, pnl, symbol = zip(*rows)
+    return TradeColumns(np.where(np.array(direction) == 'UP', 1, -1).astype(np.int8),
+                        np.array(entry, dtype=np.float64), np.array(exit, dtype=np.float64),
+                        np.array(qty, dtype=np.float64), np.array(pnl, dtype=np.float64),
+                        np.array(symbol))
+
+# ============================================
+# Cost Models
+# ============================================
+# cost(direction, entry, exit, qty, pnl) returns the rupee charges for one
+# round trip (used inside the engine loop); cost_many(trades) returns the
+# same charges for every row of a TradeColumns at once. The first three
+# classes reproduce the formulas the validators used.
+
+class PnlSTT:
+    """Flat brokerage per leg + STT on |gross P&L| (validate_intraday/regime/trending/daily_simple)"""
+
+    def __init__(self, brokerage: float, stt: float):
+        self.brokerage = brokerage
+        self.stt = stt
+
+    def cost(self, direction: str, entry: float, exit: float, qty: int, pnl: float) -> float:
+        return self.brokerage * 2 + abs(pnl) * self.stt
+
+    def cost_many(self, trades: TradeColumns) -> np.ndarray:
+        return self.brokerage * 2 + np.abs(trades.gross_pnl) * self.stt
+
+
+class SellSideSTT:
+    """Flat brokerage per leg + STT on the sell-leg value (validate_upgraded).
+
+    ``entry_slippage_pct`` additionally charges slippage on the entry value
+    (validate_base_comparison, which fills at the raw close).
+    """
+
+    def __init__(self, brokerage: float, stt: float, entry_slippage_pct: float = 0.0):
+        self.brokerage = brokerage
+        self.stt = stt
+        self.entry_slippage_pct = entry_slippage_pct
+
+    def cost(self, direction: str, entry: float, exit: float, qty: int, pnl: float) -> float:
+        sell_value = exit * qty if direction == 'UP' else entry * qty
+        costs = (self.brokerage * 2) + (sell_value * self.stt)
+        if self.entry_slippage_pct:
+            costs += entry * qty * self.entry_slippage_pct
+        return costs
+
+    def cost_many(self, trades: TradeColumns) -> np.ndarray:
+        costs = (self.brokerage * 2) + (trades.sell_value * self.stt)
+        if self.entry_slippage_pct:
+            costs = costs + trades.entry * trades.qty * self.entry_slippage_pct
+        return costs
+
+
+class TurnoverSTT:
+    """STT on buy + sell turnover, no brokerage (validate_swing, delivery)"""
+
+    def __init__(self, stt: float):
+        self.stt = stt
+
+    def cost(self, direction: str, entry: float, exit: float, qty: int, pnl: float) -> float:
+        return (entry + exit) * qty * self.stt
+
+    def cost_many(self, trades: TradeColumns) -> np.ndarray:
+        return (trades.entry + trades.exit) * trades.qty * self.stt
+
+
+class IndianEquityCosts:
+    """Full NSE charge sheet: brokerage, STT, exchange, SEBI, GST, stamp duty and slippage.
+
+    ``segment`` picks INTRADAY_FEES or DELIVERY_FEES; keyword overrides
+    replace individual rates (e.g. slippage=0.0005). The validators already
+    fill entries and exits at slipped prices, so their stored trades carry
+    the simulated slippage: keep ``slippage`` at its default 0 when
+    re-costing them, and set it only to stress-test slippage beyond that.
+    """
+
+    def __init__(self, segment: str = 'intraday', **overrides):
+        if segment not in FEE_SCHEDULES:
+            raise ValueError(f"Unknown segment '{segment}', expected one of {sorted(FEE_SCHEDULES)}")
+        unknown = set(overrides) - set(FEE_SCHEDULES[segment])
+        if unknown:
+            raise ValueError(f"Unknown fee keys: {sorted(unknown)}")
+        self.segment = segment
+        self.fees = {**FEE_SCHEDULES[segment], **overrides}
+
+    def breakdown(self, buy_value, sell_value) -> Dict[str, np.ndarray]:
+        """Charges per component; works on scalars or arrays of leg values"""
+        fees = self.fees
+        buy_value = np.asarray(buy_value, dtype=np.float64)
+        sell_value = np.asarray(sell_value, dtype=np.float64)
+        turnover = buy_value + sell_value
+        cap = fees['brokerage_cap']
+        brokerage = (np.minimum(buy_value * fees['brokerage_rate'], cap) +
+                     np.minimum(sell_value * fees['brokerage_rate'], cap))
+        exchange = turnover * fees['exchange']
+        sebi = turnover * fees['sebi']
+        return {
+            'brokerage': brokerage,
+            'stt': buy_value * fees['stt_buy'] + sell_value * fees['stt_sell'],
+            'exchange': exchange,
+            'sebi': sebi,
+            'gst': (brokerage + exchange + sebi) * fees['gst'],
+            'stamp': buy_value * fees['stamp_buy'],
+            'slippage': turnover * fees['slippage'],
+        }
+
+    def cost(self, direction: str, entry: float, exit: float, qty: int, pnl: float) -> float:
+        buy, sell = (entry * qty, exit * qty) if direction == 'UP' else (exit * qty, entry * qty)
+        return float(sum(self.breakdown(buy, sell).values()))
+
+    def cost_many(self, trades: TradeColumns) -> np.ndarray:
+        return sum(self.breakdown(trades.buy_value, trades.sell_value).values())
+
+# ============================================
+# Re-costing
+# ============================================
+# Stored P&L is net of the costs the run was simulated with; the gross P&L
+# is rebuilt from entry/exit/qty, so any model can be swapped in afterwards
+# without re-simulating. (Position sizing is not revisited: same trades,
+# same quantities, different charges.) Stored prices already include the
+# simulated slippage, so a model's own slippage rate is charged on top.
+
+def recost(trades: TradeColumns, model) -> np.ndarray:
+    """Net P&L of every trade under ``model``"""
+    return trades.gross_pnl - model.cost_many(trades)
+
+
+def cost_summary(trades: TradeColumns, net_pnl: np.ndarray) -> Dict:
+    """Trades, win rate, P&L, total charges and profit factor for one set of net P&Ls"""
+    wins = net_pnl > 0
+    gross_profit = float(net_pnl[wins].sum())
+    gross_loss = float(-net_pnl[~wins].sum())
+    return {
+        'trades': len(net_pnl),
+        'win_rate': float(wins.mean() * 100) if len(net_pnl) else 0.0,
+        'pnl': float(net_pnl.sum()),
+        'costs': float((trades.gross_pnl - net_pnl).sum()),
+        'profit_factor': gross_profit / gross_loss if gross_loss > 0 else 0,
+    }
+
+
+def symbol_pnl(trades: TradeColumns, net_pnl: np.ndarray) -> Dict[str, float]:
+    symbols, inverse = np.unique(trades.symbol, return_inverse=True)
+    totals = np.bincount(inverse, weights=net_pnl, minlength=len(symbols))
+    return dict(zip(symbols.tolist(), totals.tolist()))
+
+
+def main():
+    conn = results_store.connect()
+    run_id = results_store.latest_run(conn, kind='backtest')
+    if run_id is None:
+        print("No saved backtest runs - run validate_upgraded.py --save first")
+        return
+    trades = load_trades(conn, run_id)
+    conn.close()
+
+    print("=" * 70)
+    print(f"RE-COSTING RUN #{run_id} - {len(trades)} TRADES")
+    print("=" * 70)
+
+    models = {
+        'stored (as simulated)': None,
+        'flat ₹20 + sell STT': SellSideSTT(20, 0.00025),
+        'NSE intraday': IndianEquityCosts('intraday'),
+        'NSE intraday +0.05% extra slip': IndianEquityCosts('intraday', slippage=0.0005),
+        'NSE delivery': IndianEquityCosts('delivery'),
+    }
+    print(f"\n{'Schedule':<28} | {'P&L':>12} | {'Charges':>10} | {'Win%':>6} | {'PF':>5} | {'Time':>7}")
+    print("-" * 82)
+    for name, model in models.items():
+        t0 = time.perf_counter()
+        net = trades.pnl if model is None else recost(trades, model)
+        summary = cost_summary(trades, net)
+        elapsed = (time.perf_counter() - t0) * 1000
+        print(f"{name:<28} | ₹{summary['pnl']:>11,.0f} | ₹{summary['costs']:>9,.0f} | "
+              f"{summary['win_rate']:>5.1f}% | {summary['profit_factor']:>5.2f} | {elapsed:>5.1f}ms")
+
+    parts = IndianEquityCosts('intraday').breakdown(trades.buy_value, trades.sell_value)
+    print("\n💸 NSE intraday charges by component:")
+    for name, values in parts.items():
+        print(f"  {name:<10} ₹{values.sum():>10,.0f}")
+
+
+if __name__ == "__main__":
+    main()
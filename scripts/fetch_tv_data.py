@@ -9,6 +9,10 @@ import os
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
+
+from candle_series import day_key_str, day_offsets, parse_epochs, time_keys
+
 try:
     from tvDatafeed import TvDatafeed, Interval
 except ImportError:
@@ -68,17 +72,27 @@ def fetch_symbol_data(tv: TvDatafeed, symbol: str, bars: int = BARS_PER_SYMBOL)
 
 
 def group_by_day(candles: list) -> dict:
-    """Group candles by trading day"""
-    days = {}
-    for candle in candles:
-        dt = datetime.fromisoformat(candle["timestamp"])
-        day_key = dt.strftime("%Y-%m-%d")
-        
-        if day_key not in days:
-            days[day_key] = []
-        days[day_key].append(candle)
+    """Group candles by trading day (IST day keys, one vectorized pass)
+
+    Input need not be time-ordered (e.g. merged fetches): candles are
+    stable-sorted by time first, so every day is one contiguous run and
+    keeps all its bars.
+    """
+    if not candles:
+        return {}
+    
+    epochs = parse_epochs([c["timestamp"] for c in candles])
+    if (epochs[1:] < epochs[:-1]).any():
+        order = np.argsort(epochs, kind='stable')
+        candles = [candles[i] for i in order.tolist()]
+        epochs = epochs[order]
+    day_keys, _, _ = time_keys(epochs)
+    offsets = day_offsets(day_keys).tolist()
     
-    return days
+    return {
+        day_key_str(int(day_keys[start])): candles[start:end]
+        for start, end in zip(offsets, offsets[1:])
+    }
 
 
 def main():
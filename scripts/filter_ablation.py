@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Filter Ablation
+All 2^k on/off combinations of the 8 risk filters in one batched run, with each filter's contribution
+"""
+
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+import results_store
+import validate_upgraded as base
+from batch_engine import make_config, run_sweep
+from candle_series import list_symbols
+
+# ============================================
+# Filters
+# ============================================
+# Bit i of a combination mask switches ABLATION_FILTERS[i] on. Switching a
+# filter off is a config override whose threshold can never trigger, so
+# every combination is just another config for the batched state machine.
+# The entry filters' pass masks are built once per distinct signal setup
+# and shared by all combinations that use it (batch_engine.run_batch).
+
+ABLATION_FILTERS = [
+    'volatility',          # #2 first-hour range vs day ATR
+    'regime',              # ADX gate (choppy bars then use the normal-regime score)
+    'entry_confirmation',  # #4 pullback break
+    'quality',             # #7 regime-adaptive quality score
+    'daily_loss',          # #1 daily loss limit
+    'max_trades',          # #1 max trades per day
+    'kill_switch',         # #6 drawdown kill switch
+    'break_even',          # #5 break-even stop at +1R
+]
+
+FILTER_OFF = {
+    'volatility': {'min_first_hour_range_atr': 0.0},
+    'regime': {'adx_normal': 0},
+    'entry_confirmation': {'entry_confirmation': False},
+    'quality': {'score_trending': 0.0, 'score_normal': 0.0},
+    'daily_loss': {'max_daily_loss': float('inf')},
+    'max_trades': {'max_trades_per_day': 10**6},
+    'kill_switch': {'kill_switch_dd': float('inf')},
+    'break_even': {'break_even_r': float('inf')},
+}
+
+METRICS = ('pnl', 'profit_factor', 'max_dd', 'win_rate', 'trades')
+
+
+def combo_config(mask: int, filters: List[str] = ABLATION_FILTERS) -> Dict:
+    """Default config with every filter whose bit is clear switched off"""
+    overrides = {}
+    for bit, name in enumerate(filters):
+        if not mask >> bit & 1:
+            overrides.update(FILTER_OFF[name])
+    return make_config(**overrides)
+
+
+def combo_label(mask: int, filters: List[str] = ABLATION_FILTERS) -> str:
+    names = [name for bit, name in enumerate(filters) if mask >> bit & 1]
+    if len(names) == len(filters):
+        return 'all'
+    return '+'.join(names) if names else 'none'
+
+# ============================================
+# Ablation Run
+# ============================================
+
+def run_ablation(symbols: List[str], filters: List[str] = ABLATION_FILTERS) -> Dict:
+    """Aggregate metrics of every combination, as arrays indexed by combination mask"""
+    masks = range(1 << len(filters))
+    sweep = run_sweep(symbols, [combo_config(m, filters) for m in masks])
+    table = {metric: np.array([entry[metric] for entry in sweep], dtype=np.float64) for metric in METRICS}
+    table['filters'] = list(filters)
+    table['sweep'] = sweep
+    return table
+
+
+def contributions(table: Dict, metric: str = 'pnl') -> List[Dict]:
+    """Per filter: effect of removing it from all, adding it to none, and its average marginal effect.
+
+    The marginal effect averages metric[m | bit] - metric[m] over every
+    combination m without the filter (2^(k-1) pairs).
+    """
+    values = table[metric]
+    k = len(table['filters'])
+    all_on = (1 << k) - 1
+    masks = np.arange(1 << k)
+    rows = []
+    for bit, name in enumerate(table['filters']):
+        flag = 1 << bit
+        without = masks[(masks & flag) == 0]
+        marginal = values[without | flag] - values[without]
+        rows.append({
+            'filter': name,
+            'leave_one_out': float(values[all_on] - values[all_on ^ flag]),
+            'alone': float(values[flag] - values[0]),
+            'marginal': float(marginal.mean()),
+            'helps': float((marginal > 0).mean() * 100),
+        })
+    return rows
+
+
+def main(save: bool = False):
+    print("=" * 70)
+    print("FILTER ABLATION - ALL ON/OFF COMBINATIONS OF THE 8 RISK FILTERS")
+    print("=" * 70)
+    symbols = list_symbols(base.DATA_DIR)
+    n_combos = 1 << len(ABLATION_FILTERS)
+    print(f"\nSymbols: {len(symbols)}, Combinations: {n_combos}")
+
+    t0 = time.perf_counter()
+    single = run_sweep(symbols, [make_config()])
+    single_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    table = run_ablation(symbols)
+    ablation_time = time.perf_counter() - t0
+    all_on = n_combos - 1
+    print(f"\n⏱️ 1 config: {single_time:.2f}s | {n_combos} combinations: {ablation_time:.2f}s "
+          f"({ablation_time / single_time:.1f}x a single run)")
+    check = '✅' if table['pnl'][all_on] == single[0]['pnl'] else '❌'
+    print(f"   {check} All filters on: {int(table['trades'][all_on])} trades, P&L ₹{table['pnl'][all_on]:,.0f}")
+    print(f"   No filters:     {int(table['trades'][0])} trades, P&L ₹{table['pnl'][0]:,.0f}")
+
+    print("\n" + "-" * 70)
+    print("CONTRIBUTION PER FILTER (P&L; positive = filter adds profit)")
+    print("-" * 70)
+    pf = {row['filter']: row for row in contributions(table, 'profit_factor')}
+    dd = {row['filter']: row for row in contributions(table, 'max_dd')}
+    print(f"{'Filter':<20} | {'Remove from all':>15} | {'Add to none':>12} | {'Avg marginal':>12} | "
+          f"{'Helps':>6} | {'ΔPF':>6} | {'ΔDD':>6}")
+    for row in contributions(table, 'pnl'):
+        name = row['filter']
+        print(f"{name:<20} | ₹{row['leave_one_out']:>14,.0f} | ₹{row['alone']:>11,.0f} | "
+              f"₹{row['marginal']:>11,.0f} | {row['helps']:>5.0f}% | {pf[name]['marginal']:>+6.2f} | "
+              f"{dd[name]['marginal']:>+5.1f}%")
+
+    print("\n" + "-" * 70)
+    print("TOP 10 COMBINATIONS BY PROFIT FACTOR (MIN 30 TRADES)")
+    print("-" * 70)
+    eligible = np.flatnonzero(table['trades'] >= 30)
+    for m in eligible[np.argsort(-table['profit_factor'][eligible], kind='stable')][:10].tolist():
+        print(f"PF {table['profit_factor'][m]:5.2f} | Trades {int(table['trades'][m]):4} | "
+              f"P&L ₹{table['pnl'][m]:>10,.0f} | DD {table['max_dd'][m]:4.1f}% | {combo_label(m)}")
+
+    if save:
+        conn = results_store.connect()
+        run_id = results_store.create_run(conn, 'filter ablation', kind='sweep', data_dir=base.DATA_DIR)
+        results_store.save_sweep(conn, run_id, table['sweep'])
+        conn.close()
+        print(f"\n💾 Saved run #{run_id} to {results_store.RESULTS_DB}")
+
+
+if __name__ == "__main__":
+    main(save='--save' in sys.argv)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Entry Filter Pipeline
+Declarative filter stages evaluated cheapest-first, respecting dependencies
+"""
+
+import heapq
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from filter_profiler import FilterProfiler, now_ns
+
+# ============================================
+# Stage Definition
+# ============================================
+
+class FilterStage:
+    """One entry filter.
+
+    ``predicate(ctx)`` returns True to let the bar through. Stages may write
+    values into ``ctx`` (listed in ``provides``) for later stages that name
+    them in ``requires``. ``cost`` is a relative per-call cost estimate
+    (profile with FilterProfiler to calibrate).
+
+    ``vector(features)``, if given, is the same test for every bar at once:
+    it reads whole-history arrays from ``features``, may publish its
+    ``provides`` keys there as arrays, and returns a boolean mask that must
+    agree with ``predicate`` bar for bar.
+    """
+
+    def __init__(self, name: str, predicate: Callable[[Dict], bool], cost: float,
+                 requires: Sequence[str] = (), provides: Sequence[str] = (),
+                 vector: Callable[[Dict], np.ndarray] = None):
+        self.name = name
+        self.predicate = predicate
+        self.cost = cost
+        self.requires = tuple(requires)
+        self.provides = tuple(provides)
+        self.vector = vector
+
+    def __repr__(self):
+        return f"FilterStage({self.name!r}, cost={self.cost})"
+
+# ============================================
+# Pipeline
+# ============================================
+
+class FilterPipeline:
+    """AND of filter stages with short-circuit evaluation.
+
+    With ``reorder=True`` stages run cheapest-first among those whose
+    requirements are already provided; otherwise in declaration order.
+    Since every stage is a pure predicate over the same bar, any valid order
+    accepts exactly the same bars - only the stage blamed for a skip changes.
+    """
+
+    def __init__(self, stages: List[FilterStage], reorder: bool = True):
+        self.stages = list(stages)
+        self.order = self._schedule(reorder)
+
+    def _schedule(self, reorder: bool) -> List[FilterStage]:
+        providers = {}
+        for stage in self.stages:
+            for key in stage.provides:
+                providers[key] = stage.name
+
+        deps = {}
+        for stage in self.stages:
+            missing = [k for k in stage.requires if k not in providers]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' requires {missing} which no stage provides")
+            deps[stage.name] = {providers[k] for k in stage.requires}
+
+        position = {stage.name: idx for idx, stage in enumerate(self.stages)}
+        by_name = {stage.name: stage for stage in self.stages}
+        done = set()
+        order = []
+
+        if not reorder:
+            for stage in self.stages:
+                if not deps[stage.name] <= done:
+                    raise ValueError(f"Stage '{stage.name}' runs before its dependencies")
+                done.add(stage.name)
+                order.append(stage)
+            return order
+
+        # Kahn's algorithm, picking the cheapest ready stage (declaration order breaks ties)
+        ready = [(s.cost, position[s.name], s.name) for s in self.stages if not deps[s.name]]
+        queued = {item[2] for item in ready}
+        heapq.heapify(ready)
+        while ready:
+            _, _, name = heapq.heappop(ready)
+            done.add(name)
+            order.append(by_name[name])
+            for stage in self.stages:
+                if stage.name not in queued and deps[stage.name] <= done:
+                    queued.add(stage.name)
+                    heapq.heappush(ready, (stage.cost, position[stage.name], stage.name))
+
+        if len(order) != len(self.stages):
+            raise ValueError("Filter stages have a dependency cycle")
+        return order
+
+    def run(self, ctx: Dict, profiler: FilterProfiler = None) -> Optional[str]:
+        """Evaluate stages on ``ctx``; return the failing stage name or None if all pass"""
+        if profiler is None:
+            for stage in self.order:
+                if not stage.predicate(ctx):
+                    return stage.name
+            return None
+
+        for stage in self.order:
+            t0 = now_ns()
+            passed = stage.predicate(ctx)
+            profiler.record(stage.name, passed, now_ns() - t0)
+            if not passed:
+                return stage.name
+        return None
+
+    def rejections(self, features: Dict, n: int) -> Tuple[np.ndarray, List[str]]:
+        """First rejecting stage of every bar, from the vector forms.
+
+        Covers the leading stages of the evaluation order that have a vector
+        form; returns (index into the returned stage names per bar, -1 where
+        a bar passes them all, names). A bar marked -1 is a candidate that
+        still has to go through run() for the remaining stages.
+        """
+        first = np.full(n, -1, dtype=np.int64)
+        names = []
+        for stage in self.order:
+            if stage.vector is None:
+                break
+            rejected = (first < 0) & ~stage.vector(features)
+            first[rejected] = len(names)
+            names.append(stage.name)
+        return first, names
+
+    def describe(self) -> str:
+        """Evaluation order, for logging"""
+        return " → ".join(stage.name for stage in self.order)
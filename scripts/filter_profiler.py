@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Filter Stage Profiler
+Opt-in per-filter timing and skip attribution for the backtest hot path
+"""
+
+import os
+from time import perf_counter_ns
+from typing import Dict, List
+
+# Stage order used for reports (matches the order filters run in the validators)
+STAGE_ORDER = [
+    'volatility',
+    'candle_body',
+    'regime',
+    'trend_pullback',
+    'candle_color',
+    'entry_confirmation',
+    'quality',
+    'sizing',
+    'exit_sim',
+]
+
+# ============================================
+# Profiler
+# ============================================
+
+class FilterProfiler:
+    """Collects invocation count, pass/skip count and cumulative ns per stage.
+
+    Validators take ``profiler=None`` and only touch the clock when one is
+    passed in, so the disabled path costs a single ``is not None`` check.
+    """
+
+    def __init__(self):
+        # stage -> [calls, passes, skips, total_ns]
+        self.stages: Dict[str, List[int]] = {}
+        # (symbol, stage) -> total_ns, used for the flamegraph trace
+        self.by_symbol: Dict[tuple, int] = {}
+        self.symbol = ''
+
+    def start_symbol(self, symbol: str):
+        """Attribute subsequent records to ``symbol`` in the trace"""
+        self.symbol = symbol
+
+    def record(self, stage: str, passed: bool, elapsed_ns: int):
+        """Record one evaluation of ``stage``"""
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = [0, 0, 0, 0]
+        stats[0] += 1
+        if passed:
+            stats[1] += 1
+        else:
+            stats[2] += 1
+        stats[3] += elapsed_ns
+
+        key = (self.symbol, stage)
+        self.by_symbol[key] = self.by_symbol.get(key, 0) + elapsed_ns
+
+    def merge(self, other: 'FilterProfiler'):
+        """Fold another profiler's counts into this one (e.g. from a worker)"""
+        for stage, (calls, passes, skips, ns) in other.stages.items():
+            stats = self.stages.setdefault(stage, [0, 0, 0, 0])
+            stats[0] += calls
+            stats[1] += passes
+            stats[2] += skips
+            stats[3] += ns
+        for key, ns in other.by_symbol.items():
+            self.by_symbol[key] = self.by_symbol.get(key, 0) + ns
+
+    def ordered_stages(self) -> List[str]:
+        """Known stages in pipeline order, then any extra stages by name"""
+        known = [s for s in STAGE_ORDER if s in self.stages]
+        extra = sorted(s for s in self.stages if s not in STAGE_ORDER)
+        return known + extra
+
+    # ============================================
+    # Reports
+    # ============================================
+
+    def summary_table(self) -> str:
+        """Per-stage table: calls, pass/skip, total ms, ns per call, skip rate"""
+        total_ns = sum(s[3] for s in self.stages.values())
+        lines = [
+            f"{'Stage':<20} | {'Calls':>9} | {'Pass':>9} | {'Skip':>9} | "
+            f"{'Total ms':>10} | {'ns/call':>9} | {'Skip %':>6} | {'Time %':>6}",
+            "-" * 101,
+        ]
+        for stage in self.ordered_stages():
+            calls, passes, skips, ns = self.stages[stage]
+            per_call = ns / calls if calls else 0
+            skip_pct = skips / calls * 100 if calls else 0
+            time_pct = ns / total_ns * 100 if total_ns else 0
+            lines.append(
+                f"{stage:<20} | {calls:>9,} | {passes:>9,} | {skips:>9,} | "
+                f"{ns / 1e6:>10.1f} | {per_call:>9,.0f} | {skip_pct:>5.1f}% | {time_pct:>5.1f}%"
+            )
+        lines.append("-" * 101)
+        lines.append(f"{'TOTAL':<20} | {'':>9} | {'':>9} | {'':>9} | {total_ns / 1e6:>10.1f} |")
+        return "\n".join(lines)
+
+    def folded_lines(self, root: str = 'process_symbol_with_filters') -> List[str]:
+        """Collapsed-stack lines (``root;symbol;stage ns``) for flamegraph.pl / speedscope"""
+        lines = []
+        for (symbol, stage), ns in sorted(self.by_symbol.items()):
+            frames = [root, symbol, stage] if symbol else [root, stage]
+            lines.append(f"{';'.join(frames)} {ns}")
+        return lines
+
+    def write(self, output_dir: str, name: str = 'filter_profile'):
+        """Write ``<name>.txt`` summary and ``<name>.folded`` trace to output_dir"""
+        os.makedirs(output_dir, exist_ok=True)
+        summary_path = os.path.join(output_dir, f"{name}.txt")
+        folded_path = os.path.join(output_dir, f"{name}.folded")
+
+        with open(summary_path, 'w') as f:
+            f.write(self.summary_table() + "\n")
+        with open(folded_path, 'w') as f:
+            f.write("\n".join(self.folded_lines()) + "\n")
+
+        return summary_path, folded_path
+
+
+def now_ns() -> int:
+    """Monotonic clock used by all stage timings"""
+    return perf_counter_ns()
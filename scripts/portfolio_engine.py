@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Portfolio Engine
+Several strategy sleeves on one merged bar clock, sized off a shared capital account
+"""
+
+import heapq
+from functools import partial
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from analytics import drawdown_stats
+from candle_series import IST_OFFSET
+from strategy_engine import Strategy, iter_strategy, new_state
+
+REBALANCE_PERIODS = (None, 'daily', 'monthly', 'yearly')
+
+# ============================================
+# Shared Capital
+# ============================================
+# Every (sleeve, symbol) run keeps its own engine state; the account only
+# sums their realized P&L. A sleeve's capital is its weight of account
+# equity at the last rebalance plus the P&L it has made since, so sleeves
+# compound independently between rebalances. Every run in a sleeve sizes,
+# and applies its daily loss limit and kill switch, against that sleeve
+# capital. Open positions are not marked to market (the same convention
+# as the single-symbol engine), but their notional is summed per sleeve so
+# sizing with a max_notional can cap the sleeve's total exposure.
+
+class Account:
+    """Capital split into weighted sleeves, optionally rebalanced each day/month/year"""
+
+    def __init__(self, capital: float, allocations: Dict[str, float], rebalance: str = 'monthly'):
+        if rebalance not in REBALANCE_PERIODS:
+            raise ValueError(f"Unknown rebalance period '{rebalance}', expected one of {REBALANCE_PERIODS}")
+        if sum(allocations.values()) > 1 + 1e-9:
+            raise ValueError(f"Allocations sum to more than 100%: {allocations}")
+        self.capital = capital
+        self.weights = dict(allocations)
+        self.rebalance = rebalance
+        self.states: Dict[str, List[Dict]] = {name: [] for name in allocations}
+        self.base = {name: capital * weight for name, weight in allocations.items()}
+        self.base_pnl = {name: 0.0 for name in allocations}
+        self.day = None
+        self.period = None
+        self.rebalances = 0
+        self.days: List[int] = []  # every day the clock passed (days since epoch, IST)
+
+    def open_state(self, sleeve: str) -> Dict:
+        """Engine state for one more run in ``sleeve``, starting at the sleeve's capital"""
+        state = new_state(self.sleeve_capital(sleeve))
+        self.states[sleeve].append(state)
+        return state
+
+    def sleeve_pnl(self, sleeve: str) -> float:
+        return sum(state['pnl'] for state in self.states[sleeve])
+
+    def sleeve_capital(self, sleeve: str) -> float:
+        return self.base[sleeve] + self.sleeve_pnl(sleeve) - self.base_pnl[sleeve]
+
+    def sleeve_exposure(self, sleeve: str) -> float:
+        """Notional of the sleeve's pending trades and open positions"""
+        return sum(state.get('open_notional', 0.0) for state in self.states[sleeve])
+
+    @property
+    def equity(self) -> float:
+        return self.capital + sum(self.sleeve_pnl(name) for name in self.states)
+
+    def advance(self, epoch: int):
+        """Move the clock to ``epoch``; rebalances on the first bar of a new period"""
+        day = (epoch + IST_OFFSET) // 86400
+        if day == self.day:
+            return
+        self.day = day
+        self.days.append(day)
+        period = self._period_key(day)
+        if self.period is not None and period != self.period:
+            self._rebalance()
+        self.period = period
+
+    def _period_key(self, day: int):
+        if self.rebalance is None:
+            return None
+        if self.rebalance == 'daily':
+            return day
+        unit = 'M' if self.rebalance == 'monthly' else 'Y'
+        return int(np.datetime64(day, 'D').astype(f'datetime64[{unit}]').astype(np.int64))
+
+    def _rebalance(self):
+        equity = self.equity
+        for name, weight in self.weights.items():
+            self.base[name] = equity * weight
+            self.base_pnl[name] = self.sleeve_pnl(name)
+        self.rebalances += 1
+
+# ============================================
+# Sleeves
+# ============================================
+
+class Sleeve:
+    """One strategy over a list of symbols with a capital weight.
+
+    ``make_strategy(symbol)`` returns a fresh Strategy (which must implement
+    bar_time); ``components`` are its run_strategy keyword arguments
+    (sizing, exit_policy, cost_model and optionally limits).
+    """
+
+    def __init__(self, name: str, weight: float, make_strategy: Callable[[str], Strategy],
+                 components: Dict, symbols: List[str]):
+        self.name = name
+        self.weight = weight
+        self.make_strategy = make_strategy
+        self.components = components
+        self.symbols = symbols
+
+# ============================================
+# Merged Clock
+# ============================================
+# Each run is an iter_strategy generator that announces the close time of
+# its next bar before processing it. A heap keyed on (close time, run
+# order) always advances the run with the earliest pending bar, so every
+# sizing decision sees exactly the P&L booked before it - daily bars close
+# at 15:30 and act after that day's intraday bars - while only one pending
+# bar per run is held, never a combined list of all bars. Scan-ahead
+# trades are booked at their exit bar's close, not at entry (see
+# strategy_engine Shared Clock), so that holds for intraday sleeves too.
+
+def run_portfolio(sleeves: List[Sleeve], capital: float, rebalance: str = 'monthly') -> Dict:
+    """Run all sleeves on one timeline with shared capital; returns sleeve and portfolio totals"""
+    account = Account(capital, {s.name: s.weight for s in sleeves}, rebalance)
+
+    runs = []
+    heap = []
+    for sleeve in sleeves:
+        for symbol in sleeve.symbols:
+            state = account.open_state(sleeve.name)
+            steps = iter_strategy(sleeve.make_strategy(symbol), symbol, initial_capital=state['equity'],
+                                  clock=True, state=state, equity=partial(account.sleeve_capital, sleeve.name),
+                                  exposure=partial(account.sleeve_exposure, sleeve.name), **sleeve.components)
+            first = next(steps, None)
+            runs.append({'sleeve': sleeve.name, 'symbol': symbol, 'state': state, 'steps': steps,
+                         'first_bar': first})
+            if first is not None:
+                heapq.heappush(heap, (first, len(runs) - 1))
+
+    bars = 0
+    while heap:
+        epoch, i = heapq.heappop(heap)
+        account.advance(epoch)
+        pending = next(runs[i]['steps'], None)
+        bars += 1
+        if pending is not None:
+            heapq.heappush(heap, (pending, i))
+
+    return summarize(account, runs, bars)
+
+
+def summarize(account: Account, runs: List[Dict], bars: int) -> Dict:
+    """Per-sleeve totals, daily P&L on every day of the clock and portfolio drawdown"""
+    sleeves = {}
+    daily: Dict[str, float] = {}
+    for run in runs:
+        state = run['state']
+        totals = sleeves.setdefault(run['sleeve'], {'trades': 0, 'wins': 0, 'pnl': 0.0, 'symbols': {},
+                                                    'first_bar': None})
+        if run['first_bar'] is not None and (totals['first_bar'] is None or run['first_bar'] < totals['first_bar']):
+            totals['first_bar'] = run['first_bar']
+        totals['trades'] += state['trades']
+        totals['wins'] += state['wins']
+        totals['pnl'] += state['pnl']
+        totals['symbols'][run['symbol']] = state['pnl']
+        for date, pnl in state['daily_returns'].items():
+            daily[date] = daily.get(date, 0) + pnl
+
+    for name, totals in sleeves.items():
+        totals['capital'] = account.sleeve_capital(name)
+
+    # Days without a trade are zero-P&L days of the drawdown, not missing ones
+    clock_days = [str(np.datetime64(day, 'D')) for day in account.days]
+    dates = sorted(set(clock_days).union(daily))
+    daily_pnl = np.array([daily.get(d, 0.0) for d in dates], dtype=np.float64)
+    return {
+        'equity': account.equity,
+        'pnl': account.equity - account.capital,
+        'bars': bars,
+        'rebalances': account.rebalances,
+        'sleeves': sleeves,
+        'dates': dates,
+        'daily_pnl': daily_pnl,
+        'drawdown': drawdown_stats(daily_pnl, account.capital),
+    }
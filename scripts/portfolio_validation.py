@@ -1,9 +1,11 @@
 
-import os
-import json
-from datetime import datetime
-from validate_upgraded import process_symbol_with_filters as run_v3
-from validate_daily_simple import calculate_ema, calculate_atr, calculate_adx
+import time
+
+from candle_series import format_timestamp
+import validate_daily_simple as v2
+import validate_upgraded as v3
+from portfolio_engine import Sleeve, run_portfolio
+from strategy_engine import RiskSizing
 
 # ============================================
 # PORTFOLIO CONFIG
@@ -11,106 +13,72 @@ from validate_daily_simple import calculate_ema, calculate_atr, calculate_adx
 TOTAL_CAPITAL = 500000
 SWING_ALLOCATION = 0.70  # 70% to V2
 INTRADAY_ALLOCATION = 0.30 # 30% to V3
+REBALANCE = 'monthly'  # None, 'daily', 'monthly' or 'yearly'
+MAX_NOTIONAL = 1.0  # open notional per sleeve as a multiple of its capital (no leverage)
 
 SWING_CAPITAL = TOTAL_CAPITAL * SWING_ALLOCATION
 INTRADAY_CAPITAL = TOTAL_CAPITAL * INTRADAY_ALLOCATION
 
-DATA_DIR_15M = "data/tv_data_15min"
-DATA_DIR_DAILY = "data/tv_data_daily"
+# V2 runs the full daily history; V3 trades from the start of the 15-min data
+SWING_START = "2005-11-11"
+SWING_END = "2026-02-02"
 
-def run_v2_overlap(symbol, start_date, end_date):
-    """Run V2 (Daily Simple) on the specific overlap period"""
-    file_path = os.path.join(DATA_DIR_DAILY, f"{symbol}.json")
-    if not os.path.exists(file_path): return None
-    with open(file_path, 'r') as f: data = json.load(f)
-    
-    # Filter candles
-    candles = [c for c in data['candles'] if start_date <= c['timestamp'][:10] <= end_date]
-    if len(candles) < 20: return None
-    
-    # Run simple V2 logic (EMA 9/21 cross + ADX > 20)
-    # Copied logic from validate_daily_simple.py
-    pnl = 0
-    trades = 0
-    wins = 0
-    equity = SWING_CAPITAL
-    in_pos = False
-    
-    # Simplified loop for comparison
-    for i in range(25, len(candles)):
-        lookback = candles[i-25:i]
-        closes = [c['close'] for c in lookback]
-        f_ema = calculate_ema(closes, 9)
-        s_ema = calculate_ema(closes, 21)
-        adx = calculate_adx(lookback)
-        curr = candles[i]
-        
-        if not in_pos:
-            if f_ema > s_ema and adx > 20 and curr['close'] > f_ema:
-                in_pos = True
-                entry = curr['close']
-                atr = calculate_atr(lookback)
-                stop = entry - atr * 2
-                risk = entry - stop
-                qty = int((equity * 0.01) / risk) if risk > 0 else 0
-                if qty <= 0: in_pos = False
-        else:
-            if curr['low'] <= stop or i == len(candles)-1:
-                exit = curr['close']
-                net = (exit - entry) * qty
-                costs = (entry + exit) * qty * 0.001
-                pnl += (net - costs)
-                in_pos = False
-                trades += 1
-                if (net-costs) > 0: wins += 1
-                
-    return {'pnl': pnl, 'trades': trades, 'wins': wins}
+SYMBOLS = ["RELIANCE", "TCS", "INFY", "HDFCBANK", "ITC", "ICICIBANK", "AXISBANK", "WIPRO", "LT", "SBIN"]
+
+def capped(components, risk_per_trade):
+    """Engine components with sizing limited to MAX_NOTIONAL of the sleeve's capital"""
+    return {**components, 'sizing': RiskSizing(risk_per_trade, MAX_NOTIONAL)}
+
+def portfolio_sleeves(symbols=SYMBOLS):
+    """V3 intraday first, so on equal close times intraday bars are processed before daily ones"""
+    return [
+        Sleeve('V3 intraday', INTRADAY_ALLOCATION, lambda s: v3.UpgradedStrategy(s),
+               capped(v3.engine_components(), v3.RISK_PER_TRADE), symbols),
+        Sleeve('V2 swing', SWING_ALLOCATION, lambda s: v2.DailyCrossoverStrategy(SWING_START, SWING_END),
+               capped(v2.engine_components(), v2.RISK_PER_TRADE), symbols),
+    ]
 
 def generate_portfolio_report():
-    symbols = ["RELIANCE", "TCS", "INFY", "HDFCBANK", "ITC", "ICICIBANK", "AXISBANK", "WIPRO", "LT", "SBIN"]
+    print(f"🚀 Running Portfolio Simulation (70% Swing / 30% Intraday, {REBALANCE} rebalance, "
+          f"open notional ≤ {MAX_NOTIONAL:.0%} of each sleeve)...")
     
-    start_date = "2025-10-27"
-    end_date = "2026-02-02"
+    t0 = time.perf_counter()
+    result = run_portfolio(portfolio_sleeves(), TOTAL_CAPITAL, REBALANCE)
+    elapsed = time.perf_counter() - t0
     
-    results_v2 = []
-    results_v3 = []
+    swing = result['sleeves']['V2 swing']
+    intraday = result['sleeves']['V3 intraday']
+    total_pnl = result['pnl']
+    dd = result['drawdown']
     
-    print(f"🚀 Running Portfolio Simulation (70% Swing / 30% Intraday)...")
-    
-    for s in symbols:
-        # Run V2
-        res2 = run_v2_overlap(s, start_date, end_date)
-        if res2: results_v2.append(res2)
-        
-        # Run V3 (Using the exported function from validate_upgraded)
-        # Note: validate_upgraded uses global INITIAL_CAPITAL, so we need to scale its net result
-        res3 = run_v3(s) # This runs the full 8 filters on the 10 month period
-        if res3: 
-            # Scale PnL from 500k global to 150k intraday allocation
-            res3['scaled_pnl'] = res3['pnl'] * (INTRADAY_CAPITAL / 500000)
-            results_v3.append(res3)
-
-    v2_pnl = sum(r['pnl'] for r in results_v2)
-    v3_pnl = sum(r['scaled_pnl'] for r in results_v3)
-    total_pnl = v2_pnl + v3_pnl
+    # Overlap window: from the first bar the intraday sleeve evaluated
+    first_intraday = None
+    if intraday['first_bar'] is not None:
+        first_intraday = format_timestamp(intraday['first_bar'])[:10]
+    overlap_pnl = sum(p for d, p in zip(result['dates'], result['daily_pnl'].tolist())
+                      if first_intraday and d >= first_intraday)
     
     print("\n" + "="*50)
-    print("💎 PORTFOLIO PERFORMANCE REPORT (OCT 2025 - FEB 2026)")
+    print(f"💎 PORTFOLIO PERFORMANCE REPORT ({SWING_START} - {SWING_END})")
     print("="*50)
-    print(f"Capital Allocation:")
-    print(f"  V2 Swing Engine (70%): ₹{SWING_CAPITAL:,.0f}")
-    print(f"  V3 Safety Engine (30%): ₹{INTRADAY_CAPITAL:,.0f}")
+    print(f"Capital Allocation (shared account, {REBALANCE} rebalance):")
+    print(f"  V2 Swing Engine (70%): ₹{SWING_CAPITAL:,.0f} → ₹{swing['capital']:,.0f}")
+    print(f"  V3 Safety Engine (30%): ₹{INTRADAY_CAPITAL:,.0f} → ₹{intraday['capital']:,.0f}")
     print("-" * 50)
     print(f"Strategy Performance:")
-    print(f"  V2 Swing P&L:     ₹{v2_pnl:,.0f} ({v2_pnl/SWING_CAPITAL*100:.1f}%)")
-    print(f"  V3 Intraday P&L:  ₹{v3_pnl:,.0f} ({v3_pnl/INTRADAY_CAPITAL*100:.1f}%)")
+    print(f"  V2 Swing P&L:     ₹{swing['pnl']:,.0f} ({swing['trades']} trades)")
+    print(f"  V3 Intraday P&L:  ₹{intraday['pnl']:,.0f} ({intraday['trades']} trades)")
     print("-" * 50)
     print(f"COMBINED TOTAL P&L: ₹{total_pnl:,.0f}")
     print(f"COMBINED RETURN %: {total_pnl/TOTAL_CAPITAL*100:+.2f}%")
+    if first_intraday:
+        print(f"Since {first_intraday} (both engines live): ₹{overlap_pnl:,.0f}")
+    print(f"Max DD: {dd['max_dd']:.2f}% | longest drawdown {dd['max_duration']} trading days")
+    print(f"Rebalances: {result['rebalances']} | {result['bars']:,} bars on the merged clock in {elapsed:.1f}s")
     print("="*50)
     
-    if total_pnl > v2_pnl:
-        print("✅ DIVERSIFICATION BENEFIT: Intraday safety reduced drawdowns!")
+    if intraday['pnl'] > 0:
+        print("✅ DIVERSIFICATION BENEFIT: Intraday sleeve added to swing returns!")
     else:
         print("⚠️ Intraday safety slightly lagged but protected capital in chop.")
 
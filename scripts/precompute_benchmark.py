@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Feature Precompute Benchmark
+Per-symbol indicator and feature arrays built on one thread, a thread pool and a process pool
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import validate_upgraded as base
+from batch_engine import (SymbolFeatures, demo_configs, load_symbol, precompute_features, run_sweep,
+                          warm_features)
+from candle_series import CandleSeries, list_symbols
+from session_summary import SessionSummary
+
+FEATURE_ARRAYS = ('adx', 'atr', 'swing_high', 'swing_low')
+
+# ============================================
+# Modes
+# ============================================
+# All modes start from the same loaded (series, sessions) pairs, so only
+# the feature build is timed. The process pool has to pickle every series
+# to a worker and the finished features (arrays and their list copies)
+# back, which the thread pool never does.
+
+def _build(item: Tuple[CandleSeries, SessionSummary], configs: List[Dict]) -> SymbolFeatures:
+    return warm_features(SymbolFeatures(*item), configs)
+
+
+def precompute_serial(data: Dict, configs: List[Dict]) -> Dict[str, SymbolFeatures]:
+    return {symbol: _build(item, configs) for symbol, item in data.items()}
+
+
+def precompute_processes(data: Dict, configs: List[Dict], workers: int = None) -> Dict[str, SymbolFeatures]:
+    with ProcessPoolExecutor(workers) as pool:
+        return dict(zip(data, pool.map(partial(_build, configs=configs), data.values())))
+
+
+def same_features(a: Dict[str, SymbolFeatures], b: Dict[str, SymbolFeatures], configs: List[Dict]) -> bool:
+    """Bit-identical indicator, EMA and quality arrays for every symbol"""
+    pairs = sorted({(c['ema_fast'], c['ema_slow']) for c in configs})
+    for symbol, fa in a.items():
+        fb = b[symbol]
+        arrays = [(getattr(fa, name), getattr(fb, name)) for name in FEATURE_ARRAYS]
+        arrays += [(fa.quality(*p), fb.quality(*p)) for p in pairs]
+        if not all(np.array_equal(x, y, equal_nan=True) for x, y in arrays):
+            return False
+    return True
+
+
+def _timed(fn, repeats: int = 3):
+    """(best wall time, last result)"""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main(threads: int = None):
+    cpus = os.cpu_count() or 1
+    print("=" * 70)
+    print(f"FEATURE PRECOMPUTE - THREADS VS PROCESSES ({cpus} CPUs)")
+    print("=" * 70)
+    symbols = list_symbols(base.DATA_DIR)
+    configs = demo_configs()
+    data = {s: loaded for s in symbols if (loaded := load_symbol(s)) is not None}
+    bars = sum(len(series) for series, _ in data.values())
+    pairs = len({(c['ema_fast'], c['ema_slow']) for c in configs})
+    print(f"\nSymbols: {len(data)}, Bars: {bars:,}, EMA pairs: {pairs}")
+
+    serial_time, reference = _timed(lambda: precompute_serial(data, configs))
+    print(f"\n{'Mode':<20} {'Time':>8} {'vs 1 thread':>12}  Identical")
+    print(f"{'1 thread (serial)':<20} {serial_time * 1000:>6.0f}ms {1:>11.2f}x  ✅")
+    sizes = [threads] if threads else sorted({2, 4, cpus})
+    for kind, build in (('thread', precompute_features), ('process', precompute_processes)):
+        for size in sizes:
+            elapsed, built = _timed(lambda: build(data, configs, size))
+            check = '✅' if same_features(reference, built, configs) else '❌'
+            label = f"{size} {kind}{'' if size == 1 else 'es' if kind == 'process' else 's'}"
+            print(f"{label:<20} {elapsed * 1000:>6.0f}ms {serial_time / elapsed:>11.2f}x  {check}")
+
+    size = threads or cpus
+    t0 = time.perf_counter()
+    plain = run_sweep(symbols, configs)
+    plain_time = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    threaded = run_sweep(symbols, configs, threads=size)
+    threaded_time = time.perf_counter() - t0
+    check = '✅' if threaded == plain else '❌'
+    print(f"\n{check} Full sweep: {plain_time:.2f}s per-symbol | {threaded_time:.2f}s with features "
+          f"precomputed on {size} thread(s)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[sys.argv.index('--threads') + 1]) if '--threads' in sys.argv else None)
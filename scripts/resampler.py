@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Timeframe Resampler
+Builds 15-min, hourly and daily bars from the 5-min store in one vectorized pass, with a disk cache
+"""
+
+import os
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+
+from candle_series import (CACHE_DIR as STORE_CACHE_DIR, CandleSeries, IST_OFFSET, list_symbols,
+                           load_series, read_cache, source_fingerprint, write_cache)
+
+SOURCE_DIR = "data/tv_data"        # 5-min bars
+CACHE_DIR = os.path.join(STORE_CACHE_DIR, "resampled")
+
+SESSION_OPEN = 9 * 3600 + 15 * 60  # NSE 09:15 IST, seconds after midnight
+
+# Bucket width in seconds; None = one bar per trading session
+TIMEFRAMES = {
+    '15min': 15 * 60,
+    '30min': 30 * 60,
+    '1h': 60 * 60,
+    '1d': None,
+}
+
+# ============================================
+# Resampling
+# ============================================
+# Every bar gets a bucket number counted from its day's 09:15 open
+# (floor((t - open) / width)), so hourly bars run 09:15-10:15, ...,
+# 15:15-15:30. Bars are time-ordered, so each (day, bucket) is a contiguous
+# run and ufunc.reduceat over the run offsets gives all OHLCV columns at
+# once. New bars are stamped with their bucket start, like the fetched
+# stores (daily bars at 09:15).
+
+def bucket_offsets(series: CandleSeries, width: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(run start offsets including len(series), bucket start epoch per run)"""
+    local = series.epoch + IST_OFFSET
+    day_open = local - local % 86400 + SESSION_OPEN
+    if width is None:
+        bucket_start = day_open
+    else:
+        bucket_start = day_open + (local - day_open) // width * width
+    if len(bucket_start) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], np.flatnonzero(bucket_start[1:] != bucket_start[:-1]) + 1))
+    offsets = np.concatenate((starts, [len(bucket_start)])).astype(np.int64)
+    return offsets, bucket_start[starts] - IST_OFFSET
+
+
+def resample(series: CandleSeries, timeframe: str) -> CandleSeries:
+    """Coarser bars from ``series`` (open=first, high=max, low=min, close=last, volume=sum)"""
+    if timeframe not in TIMEFRAMES:
+        raise ValueError(f"Unknown timeframe '{timeframe}', expected one of {sorted(TIMEFRAMES)}")
+    offsets, epochs = bucket_offsets(series, TIMEFRAMES[timeframe])
+    if len(epochs) == 0:
+        return CandleSeries(series.symbol, epochs, [], [], [], [], [])
+    starts = offsets[:-1]
+    return CandleSeries(
+        series.symbol,
+        epochs,
+        series.open[starts],
+        np.maximum.reduceat(series.high, starts),
+        np.minimum.reduceat(series.low, starts),
+        series.close[offsets[1:] - 1],
+        np.add.reduceat(series.volume, starts),
+    )
+
+# ============================================
+# Disk Cache
+# ============================================
+# One .npz per (symbol, timeframe) via candle_series.read_cache/write_cache,
+# tagged with the 5-min source file's fingerprint, so refetching the store
+# invalidates everything built from it.
+
+def cache_path(symbol: str, timeframe: str, cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, timeframe, f"{symbol}.npz")
+
+
+def load_timeframe(symbol: str, timeframe: str, source_dir: str = SOURCE_DIR,
+                   cache_dir: str = CACHE_DIR) -> CandleSeries:
+    """``symbol`` at ``timeframe`` built from the 5-min store, via the disk cache"""
+    source = os.path.join(source_dir, f"{symbol}.json")
+    fingerprint = source_fingerprint(source)
+    path = cache_path(symbol, timeframe, cache_dir)
+    cached = read_cache(path, fingerprint)
+    if cached is not None:
+        return CandleSeries(str(cached['symbol']), cached['epoch'], cached['open'], cached['high'],
+                            cached['low'], cached['close'], cached['volume'])
+    series = resample(load_series(source), timeframe)
+    write_cache(path, {'symbol': np.array(series.symbol), 'epoch': series.epoch, 'open': series.open,
+                       'high': series.high, 'low': series.low, 'close': series.close,
+                       'volume': series.volume}, fingerprint)
+    return series
+
+# ============================================
+# Coverage Check
+# ============================================
+
+def compare_with_store(built: CandleSeries, fetched: CandleSeries) -> Dict:
+    """Bars at the same timestamps in both series and how many values agree per field.
+
+    Intraday timeframes agree on every field. Fetched daily bars do not
+    match bars built from 5-min data exactly: they carry the exchange's
+    official open/close (auction prices) and full-day volume, and their
+    high/low include prints outside the 09:15-15:30 continuous session
+    (pre-open call auction, closing session) that no 5-min bar contains.
+    So their range can only be wider: ``wider`` counts bars where the
+    fetched high is above or the low below the built one, and ``narrower``
+    the reverse, which would point to missing or wrong 5-min data.
+    """
+    common, i, j = np.intersect1d(built.epoch, fetched.epoch, return_indices=True)
+    stats = {'built': len(built), 'fetched': len(fetched), 'common': len(common)}
+    for field in ('open', 'high', 'low', 'close'):
+        stats[field] = int(np.isclose(getattr(built, field)[i], getattr(fetched, field)[j]).sum())
+    stats['volume'] = int((built.volume[i] == fetched.volume[j]).sum())
+    b_high, b_low, f_high, f_low = built.high[i], built.low[i], fetched.high[j], fetched.low[j]
+    higher = ~np.isclose(b_high, f_high) & (f_high > b_high)
+    lower = ~np.isclose(b_low, f_low) & (f_low < b_low)
+    inside = (~np.isclose(b_high, f_high) & (f_high < b_high)) | (~np.isclose(b_low, f_low) & (f_low > b_low))
+    stats['wider'] = int((higher | lower).sum())
+    stats['narrower'] = int(inside.sum())
+    return stats
+
+
+def main():
+    print("=" * 70)
+    print("RESAMPLING 5-MIN STORE → 15-MIN / HOURLY / DAILY")
+    print("=" * 70)
+    symbols = list_symbols(SOURCE_DIR)
+
+    for timeframe in ('15min', '1h', '1d'):
+        t0 = time.perf_counter()
+        built = {s: load_timeframe(s, timeframe) for s in symbols}
+        first = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        for s in symbols:
+            load_timeframe(s, timeframe)
+        cached = time.perf_counter() - t0
+        bars = sum(len(series) for series in built.values())
+        print(f"\n{timeframe:>5}: {bars:,} bars for {len(symbols)} symbols | "
+              f"first call {first * 1000:.0f}ms | cached {cached * 1000:.0f}ms")
+
+    print("\nAgreement with separately fetched stores (RELIANCE, overlapping bars):")
+    for timeframe, store in (('15min', "data/tv_data_15min"), ('1d', "data/tv_data_daily")):
+        fetched_path = os.path.join(store, "RELIANCE.json")
+        if not os.path.exists(fetched_path):
+            continue
+        stats = compare_with_store(load_timeframe('RELIANCE', timeframe), load_series(fetched_path))
+        agree = ' '.join(f"{field} {stats[field]}" for field in ('open', 'high', 'low', 'close', 'volume'))
+        print(f"  {timeframe:>5} vs {store}: {stats['common']} common bars | agree: {agree}")
+        if stats['wider'] or stats['narrower']:
+            print(f"        high/low differ on {stats['wider'] + stats['narrower']} bars: {stats['wider']} where the "
+                  f"fetched range is wider (pre-open/closing-session prints outside the 5-min bars), "
+                  f"{stats['narrower']} narrower")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Backtest Results Store
+SQLite database of runs, configs, per-symbol metrics, trades and equity points
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+RESULTS_DB = "results/backtests.db"  # relative to the repo root, like the data dirs
+
+# ============================================
+# Schema
+# ============================================
+# One run = one invocation (a validator or a sweep). A run evaluates one or
+# more configs over many symbols; configs are deduplicated across runs by a
+# hash of their parameters. Dates are 'YYYY-MM-DD' IST day keys.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    data_dir    TEXT,
+    notes       TEXT
+);
+CREATE TABLE IF NOT EXISTS configs (
+    config_id   INTEGER PRIMARY KEY,
+    config_hash TEXT NOT NULL UNIQUE,
+    params      TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbol_metrics (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    config_id   INTEGER NOT NULL REFERENCES configs(config_id),
+    symbol      TEXT NOT NULL,
+    trades      INTEGER,
+    wins        INTEGER,
+    win_rate    REAL,
+    pnl         REAL,
+    total_return REAL,
+    max_dd      REAL,
+    avg_trade   REAL,
+    avg_r_multiple REAL,
+    trading_days INTEGER,
+    gross_profit REAL,
+    gross_loss  REAL,
+    PRIMARY KEY (run_id, config_id, symbol)
+);
+CREATE TABLE IF NOT EXISTS config_metrics (
+    run_id      INTEGER NOT NULL REFERENCES runs(run_id),
+    config_id   INTEGER NOT NULL REFERENCES configs(config_id),
+    symbols     INTEGER,
+    trades      INTEGER,
+    wins        INTEGER,
+    win_rate    REAL,
+    pnl         REAL,
+    profit_factor REAL,
+    max_dd      REAL,
+    avg_r_multiple REAL,
+    PRIMARY KEY (run_id, config_id)
+);
+CREATE TABLE IF NOT EXISTS trades (
+    run_id      INTEGER NOT NULL,
+    config_id   INTEGER NOT NULL,
+    symbol      TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    timestamp   TEXT,
+    direction   TEXT,
+    entry       REAL,
+    exit        REAL,
+    qty         INTEGER,
+    pnl         REAL,
+    r_multiple  REAL
+);
+CREATE TABLE IF NOT EXISTS equity_points (
+    run_id      INTEGER NOT NULL,
+    config_id   INTEGER NOT NULL,
+    symbol      TEXT NOT NULL,
+    date        TEXT NOT NULL,
+    pnl         REAL,
+    cum_pnl     REAL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_run_symbol_date ON trades(run_id, symbol, date);
+CREATE INDEX IF NOT EXISTS idx_equity_run_symbol_date ON equity_points(run_id, symbol, date);
+CREATE INDEX IF NOT EXISTS idx_config_metrics_pf ON config_metrics(run_id, profit_factor);
+CREATE INDEX IF NOT EXISTS idx_trades_run_config_symbol ON trades(run_id, config_id, symbol);
+CREATE INDEX IF NOT EXISTS idx_equity_run_config_symbol ON equity_points(run_id, config_id, symbol);
+"""
+
+# Per-config totals rolled up from symbol_metrics (same formulas as the validators' aggregate)
+ROLLUP_SQL = """
+INSERT OR REPLACE INTO config_metrics
+SELECT run_id, config_id, COUNT(*), SUM(trades), SUM(wins),
+       CASE WHEN SUM(trades) > 0 THEN SUM(wins) * 100.0 / SUM(trades) ELSE 0 END,
+       SUM(pnl),
+       CASE WHEN SUM(gross_loss) > 0 THEN SUM(gross_profit) / SUM(gross_loss) ELSE 0 END,
+       MAX(max_dd),
+       CASE WHEN SUM(trades) > 0 THEN SUM(avg_r_multiple * trades) / SUM(trades) ELSE 0 END
+FROM symbol_metrics WHERE run_id = ? GROUP BY run_id, config_id
+"""
+
+METRIC_COLUMNS = ('trades', 'wins', 'win_rate', 'pnl', 'profit_factor', 'max_dd', 'avg_r_multiple')
+
+
+def connect(db_path: str = RESULTS_DB) -> sqlite3.Connection:
+    """Open (and create if needed) the results database"""
+    folder = os.path.dirname(db_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def config_hash(config: Dict) -> str:
+    """Stable hash of a config's parameters"""
+    payload = json.dumps(config, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+# ============================================
+# Writes
+# ============================================
+
+def create_run(conn: sqlite3.Connection, name: str, kind: str = 'backtest',
+               data_dir: str = '', notes: str = '') -> int:
+    """Register a run and return its run_id"""
+    with conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (name, kind, created_at, data_dir, notes) VALUES (?, ?, ?, ?, ?)",
+            (name, kind, datetime.now().isoformat(timespec='seconds'), data_dir, notes))
+    return cursor.lastrowid
+
+
+def _config_id(conn: sqlite3.Connection, config: Dict) -> int:
+    key = config_hash(config)
+    conn.execute("INSERT OR IGNORE INTO configs (config_hash, params) VALUES (?, ?)",
+                 (key, json.dumps(config, sort_keys=True, default=str)))
+    return conn.execute("SELECT config_id FROM configs WHERE config_hash = ?", (key,)).fetchone()[0]
+
+
+def _rows(run_id: int, config_id: int, results: Iterable[Dict]) -> Tuple[list, list, list]:
+    """symbol_metrics, trades and equity_points rows for one config's per-symbol results"""
+    metric_rows, trade_rows, equity_rows = [], [], []
+    for r in results:
+        symbol = r['symbol']
+        risk = r.get('risk_metrics', {})
+        metric_rows.append((
+            run_id, config_id, symbol, r['trades'], r['wins'], r['win_rate'], r['pnl'],
+            r['total_return'], r['max_dd'], r['avg_trade'], r['avg_r_multiple'], r['trading_days'],
+            risk.get('gross_profit', 0), risk.get('gross_loss', 0),
+        ))
+        for t in r.get('trade_log', ()):
+            trade_rows.append((run_id, config_id, symbol, t['date'], t['timestamp'], t['direction'],
+                               t['entry'], t['exit'], t['qty'], t['pnl'], t['r_multiple']))
+        cum_pnl = 0.0
+        for date, day_pnl in sorted(r.get('daily_returns', {}).items()):
+            cum_pnl += day_pnl
+            equity_rows.append((run_id, config_id, symbol, date, day_pnl, cum_pnl))
+    return metric_rows, trade_rows, equity_rows
+
+
+def save_sweep(conn: sqlite3.Connection, run_id: int, sweep: List[Dict], rollup: bool = True):
+    """Store sweep entries ({'config', 'symbols': {symbol: result}}) in one transaction
+
+    Writers that stream many partial sweeps into one run can pass
+    rollup=False and call rollup() once at the end. Saving a (run, config,
+    symbol) again replaces its metrics, trades and equity points (a retried
+    or resumed save, or a config listed twice).
+    """
+    with conn:
+        latest = {}
+        for entry in sweep:
+            config_id = _config_id(conn, entry['config'])
+            for symbol, result in entry['symbols'].items():
+                latest[(config_id, symbol)] = result
+        keys = [(run_id, config_id, symbol) for config_id, symbol in latest]
+        conn.executemany("DELETE FROM trades WHERE run_id = ? AND config_id = ? AND symbol = ?", keys)
+        conn.executemany("DELETE FROM equity_points WHERE run_id = ? AND config_id = ? AND symbol = ?", keys)
+
+        metric_rows, trade_rows, equity_rows = [], [], []
+        for (config_id, _), result in latest.items():
+            m, t, e = _rows(run_id, config_id, [result])
+            metric_rows += m
+            trade_rows += t
+            equity_rows += e
+        conn.executemany("INSERT OR REPLACE INTO symbol_metrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                         metric_rows)
+        conn.executemany("INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", trade_rows)
+        conn.executemany("INSERT INTO equity_points VALUES (?, ?, ?, ?, ?, ?)", equity_rows)
+        if rollup:
+            conn.execute(ROLLUP_SQL, (run_id,))
+
+
+def rollup(conn: sqlite3.Connection, run_id: int):
+    """Recompute the run's config_metrics from its symbol_metrics"""
+    with conn:
+        conn.execute(ROLLUP_SQL, (run_id,))
+
+
+def save_results(conn: sqlite3.Connection, run_id: int, config: Dict, results: List[Dict]):
+    """Store one config's per-symbol results (a single validator run)"""
+    save_sweep(conn, run_id, [{'config': config, 'symbols': {r['symbol']: r for r in results}}])
+
+# ============================================
+# Queries
+# ============================================
+
+def list_runs(conn: sqlite3.Connection) -> List[Dict]:
+    return [dict(row) for row in conn.execute("SELECT * FROM runs ORDER BY run_id")]
+
+
+def latest_run(conn: sqlite3.Connection, kind: str = None) -> int:
+    """run_id of the most recent run (optionally of one kind), or None"""
+    if kind is None:
+        row = conn.execute("SELECT MAX(run_id) FROM runs").fetchone()
+    else:
+        row = conn.execute("SELECT MAX(run_id) FROM runs WHERE kind = ?", (kind,)).fetchone()
+    return row[0]
+
+
+def best_configs(conn: sqlite3.Connection, run_id: int = None, order_by: str = 'profit_factor',
+                 max_dd: float = None, min_trades: int = 0, limit: int = 10) -> List[Dict]:
+    """Top configs by ``order_by``, e.g. best profit factor with max_dd < 10"""
+    if order_by not in METRIC_COLUMNS:
+        raise ValueError(f"Unknown metric '{order_by}', expected one of {METRIC_COLUMNS}")
+    where = ["m.trades >= ?"]
+    params = [min_trades]
+    if run_id is not None:
+        where.append("m.run_id = ?")
+        params.append(run_id)
+    if max_dd is not None:
+        where.append("m.max_dd < ?")
+        params.append(max_dd)
+    sql = (f"SELECT m.*, c.params FROM config_metrics m JOIN configs c USING (config_id) "
+           f"WHERE {' AND '.join(where)} ORDER BY m.{order_by} DESC LIMIT ?")
+    params.append(limit)
+
+    rows = []
+    for row in conn.execute(sql, params):
+        item = dict(row)
+        item['config'] = json.loads(item.pop('params'))
+        rows.append(item)
+    return rows
+
+
+def symbol_results(conn: sqlite3.Connection, run_id: int, config_id: int = None) -> List[Dict]:
+    """Per-symbol metrics of a run (optionally one config)"""
+    sql = "SELECT * FROM symbol_metrics WHERE run_id = ?"
+    params = [run_id]
+    if config_id is not None:
+        sql += " AND config_id = ?"
+        params.append(config_id)
+    return [dict(row) for row in conn.execute(sql + " ORDER BY config_id, symbol", params)]
+
+
+def trades_for(conn: sqlite3.Connection, run_id: int, symbol: str = None, start_date: str = None,
+               end_date: str = None, config_id: int = None) -> List[Dict]:
+    """Trades of a run filtered by symbol and inclusive date range"""
+    where = ["run_id = ?"]
+    params = [run_id]
+    for clause, value in (("symbol = ?", symbol), ("date >= ?", start_date),
+                          ("date <= ?", end_date), ("config_id = ?", config_id)):
+        if value is not None:
+            where.append(clause)
+            params.append(value)
+    sql = f"SELECT * FROM trades WHERE {' AND '.join(where)} ORDER BY symbol, date, timestamp"
+    return [dict(row) for row in conn.execute(sql, params)]
+
+
+def equity_curve(conn: sqlite3.Connection, run_id: int, config_id: int, symbol: str) -> List[Tuple[str, float]]:
+    """(date, cumulative P&L) points for one symbol"""
+    return [tuple(row) for row in conn.execute(
+        "SELECT date, cum_pnl FROM equity_points WHERE run_id = ? AND config_id = ? AND symbol = ? ORDER BY date",
+        (run_id, config_id, symbol))]
+
+
+def main():
+    conn = connect()
+    runs = list_runs(conn)
+    print(f"📁 {RESULTS_DB}: {len(runs)} runs")
+    for run in runs:
+        best = best_configs(conn, run['run_id'], limit=1)
+        pf = f"best PF {best[0]['profit_factor']:.2f}" if best else "no configs"
+        print(f"  #{run['run_id']:<4} {run['created_at']} | {run['kind']:<8} | {run['name']:<28} | {pf}")
+
+
+if __name__ == "__main__":
+    main()
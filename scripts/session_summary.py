@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Session Summary
+One row per trading day (OHLCV, first-hour range, ATR, gap) built in one vectorized pass and cached
+"""
+
+import os
+import time
+from typing import Dict
+
+import numpy as np
+
+from candle_series import (CACHE_DIR, CandleSeries, day_key_str, list_symbols, load_series, read_cache,
+                           source_fingerprint, write_cache)
+
+SESSION_CACHE_DIR = os.path.join(CACHE_DIR, "sessions")
+INTRADAY_DIR = "data/tv_data_15min"
+
+FIRST_HOUR_BARS = 4   # 4 * 15min = 1 hour
+ATR_PERIOD = 14
+
+COLUMNS = ('day_key', 'start', 'bars', 'open', 'high', 'low', 'close', 'volume',
+           'first_hour_high', 'first_hour_low', 'first_hour_range', 'atr', 'prior_atr', 'gap_pct')
+
+# ============================================
+# Vectorized Build
+# ============================================
+# Sessions are the contiguous runs given by CandleSeries.day_offsets, so
+# OHLCV is one reduceat per column. The first-hour and ATR columns need the
+# first / last few bars of each day; they are built column by column over a
+# fixed number of positions (4 and 14), masked where a day is shorter. The
+# ATR adds the same true ranges in the same left-to-right order as
+# validate_upgraded.calculate_atr over the day's candles, so the volatility
+# filter decisions are identical to the per-day loop.
+
+def _true_ranges(series: CandleSeries) -> np.ndarray:
+    """TR of bar i+1 against bar i, for i in 0..n-2"""
+    high, low, prev_close = series.high[1:], series.low[1:], series.close[:-1]
+    return np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def _day_atr(tr: np.ndarray, starts: np.ndarray, ends: np.ndarray, period: int) -> np.ndarray:
+    """Mean of each day's last min(period, bars - 1) in-day true ranges (0 for single-bar days)"""
+    count = np.minimum(ends - starts - 1, period)
+    first = ends - 1 - count
+    total = np.zeros(len(starts))
+    for j in range(period):
+        use = j < count
+        total = total + np.where(use, tr[np.where(use, first + j, 0)] if len(tr) else 0.0, 0.0)
+    return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+
+class SessionSummary:
+    """Per-day columns for one symbol; row d is the series' d-th trading day.
+
+    ``atr`` is the in-day ATR the first-hour volatility filter compares
+    against; ``prior_atr`` is the previous session's, and ``gap_pct`` the
+    open versus the previous session's close (both NaN on the first day).
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        for name in COLUMNS:
+            setattr(self, name, columns[name])
+
+    @classmethod
+    def from_series(cls, series: CandleSeries, first_hour_bars: int = FIRST_HOUR_BARS,
+                    period: int = ATR_PERIOD) -> 'SessionSummary':
+        offsets = series.day_offsets
+        starts, ends = offsets[:-1], offsets[1:]
+        if len(starts) == 0:
+            empty = np.zeros(0)
+            return cls({name: empty for name in COLUMNS})
+        bars = ends - starts
+
+        fh_high = np.full(len(starts), -np.inf)
+        fh_low = np.full(len(starts), np.inf)
+        for j in range(first_hour_bars):
+            use = j < bars
+            idx = np.where(use, starts + j, starts)
+            fh_high = np.where(use, np.maximum(fh_high, series.high[idx]), fh_high)
+            fh_low = np.where(use, np.minimum(fh_low, series.low[idx]), fh_low)
+
+        close = series.close[ends - 1]
+        atr = _day_atr(_true_ranges(series), starts, ends, period)
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+        opens = series.open[starts]
+        return cls({
+            'day_key': series.day_key[starts],
+            'start': starts,
+            'bars': bars,
+            'open': opens,
+            'high': np.maximum.reduceat(series.high, starts),
+            'low': np.minimum.reduceat(series.low, starts),
+            'close': close,
+            'volume': np.add.reduceat(series.volume, starts),
+            'first_hour_high': fh_high,
+            'first_hour_low': fh_low,
+            'first_hour_range': fh_high - fh_low,
+            'atr': atr,
+            'prior_atr': np.concatenate(([np.nan], atr[:-1])),
+            'gap_pct': (opens - prev_close) / prev_close * 100,
+        })
+
+    def __len__(self) -> int:
+        return len(self.day_key)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in COLUMNS}
+
+    def low_volatility(self, min_range_atr: float) -> np.ndarray:
+        """validate_upgraded.is_low_volatility_day for every day at once"""
+        return (self.atr > 0) & (self.first_hour_range < self.atr * min_range_atr)
+
+# ============================================
+# Disk Cache
+# ============================================
+# Stored next to the other derived data, one .npz per (store, symbol),
+# tagged with the source JSON's fingerprint. Reading the .npz is slower
+# than building the table from a loaded series, so the cache only serves
+# callers that have not loaded the series (it saves parsing the JSON).
+
+def cache_path(file_path: str, cache_dir: str = SESSION_CACHE_DIR) -> str:
+    store = os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+    return os.path.join(cache_dir, store, os.path.basename(file_path).replace('.json', '.npz'))
+
+
+def load_sessions(file_path: str, series: CandleSeries = None,
+                  cache_dir: str = SESSION_CACHE_DIR) -> SessionSummary:
+    """Session table for a store file: built from ``series`` if already loaded, else via the cache"""
+    if series is not None:
+        return SessionSummary.from_series(series)
+    fingerprint = source_fingerprint(file_path)
+    path = cache_path(file_path, cache_dir)
+    cached = read_cache(path, fingerprint)
+    if cached is not None:
+        return SessionSummary(cached)
+    summary = SessionSummary.from_series(load_series(file_path))
+    write_cache(path, summary.columns(), fingerprint)
+    return summary
+
+
+def main():
+    import validate_upgraded as upgraded
+
+    print("=" * 70)
+    print("SESSION SUMMARY - PER-DAY TABLE FROM THE 15-MIN STORE")
+    print("=" * 70)
+    symbols = list_symbols(INTRADAY_DIR)
+    series = {s: load_series(os.path.join(INTRADAY_DIR, f"{s}.json")) for s in symbols}
+
+    t0 = time.perf_counter()
+    loop_flags = {}
+    for s, ser in series.items():
+        flags = []
+        for d in range(ser.num_days):
+            day = ser.day_window(d)
+            flags.append(upgraded.is_low_volatility_day(day[:FIRST_HOUR_BARS], upgraded.calculate_atr(day)))
+        loop_flags[s] = flags
+    loop_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    tables = {s: SessionSummary.from_series(ser) for s, ser in series.items()}
+    build_time = time.perf_counter() - t0
+    for s in symbols:
+        load_sessions(os.path.join(INTRADAY_DIR, f"{s}.json"))  # fills the cache
+    t0 = time.perf_counter()
+    for s in symbols:
+        load_sessions(os.path.join(INTRADAY_DIR, f"{s}.json"))
+    cached_time = time.perf_counter() - t0
+
+    mismatches = sum(int((tables[s].low_volatility(upgraded.MIN_FIRST_HOUR_RANGE_ATR) != np.array(loop_flags[s])).sum())
+                     for s in symbols)
+    days = sum(len(t) for t in tables.values())
+    print(f"\n{days:,} sessions for {len(symbols)} symbols")
+    print(f"  per-day loop (volatility filter) : {loop_time * 1000:7.1f}ms")
+    print(f"  vectorized build (all columns)   : {build_time * 1000:7.1f}ms")
+    print(f"  cached load (no series loaded)   : {cached_time * 1000:7.1f}ms")
+    print(f"  {'✅' if mismatches == 0 else '❌'} low-volatility days differing from the loop: {mismatches}")
+
+    if 'RELIANCE' in tables:
+        t = tables['RELIANCE']
+        print(f"\nRELIANCE, last 5 sessions:")
+        print(f"{'Date':<11} {'Open':>9} {'High':>9} {'Low':>9} {'Close':>9} {'FH Range':>9} {'ATR':>7} {'Gap%':>6}")
+        for d in range(max(len(t) - 5, 0), len(t)):
+            print(f"{day_key_str(int(t.day_key[d])):<11} {t.open[d]:>9.2f} {t.high[d]:>9.2f} {t.low[d]:>9.2f} "
+                  f"{t.close[d]:>9.2f} {t.first_hour_range[d]:>9.2f} {t.atr[d]:>7.2f} {t.gap_pct[d]:>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Shared Candle Store
+Every symbol loaded once into a shared-memory block that process-pool workers attach to without copying
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import validate_upgraded as base
+from batch_engine import SymbolFeatures, aggregate, demo_configs, run_batch, run_sweep
+from candle_series import CandleSeries, list_symbols, load_series
+from session_summary import SessionSummary, load_sessions
+
+ALIGN = 64  # byte alignment of every array in the block
+
+# ============================================
+# Broadcast
+# ============================================
+# The parent lays every array (candle columns with their day keys, and the
+# session table) end to end in one SharedMemory block and gives workers a
+# handle: the block name plus a {symbol: {part: {column: (offset, dtype,
+# shape)}}} layout. Attaching maps the block and wraps read-only NumPy
+# views around it, so N workers hold one copy of the data and parse no
+# files. Only the owner unlinks the block (SharedStore.close, also when a
+# ``with`` body raises); workers' mappings go away when they exit.
+
+def _layout(arrays: Dict[str, Dict[str, Dict[str, np.ndarray]]]) -> Tuple[Dict, int]:
+    layout, size = {}, 0
+    for symbol, parts in arrays.items():
+        layout[symbol] = {}
+        for part, columns in parts.items():
+            layout[symbol][part] = {}
+            for name, array in columns.items():
+                layout[symbol][part][name] = (size, array.dtype.str, array.shape)
+                size += -(-array.nbytes // ALIGN) * ALIGN
+    return layout, size
+
+
+def _views(buf, layout: Dict) -> Dict:
+    return {symbol: {part: {name: np.ndarray(shape, dtype, buffer=buf, offset=offset)
+                            for name, (offset, dtype, shape) in columns.items()}
+                     for part, columns in parts.items()}
+            for symbol, parts in layout.items()}
+
+
+def _fill(buf, layout: Dict, arrays: Dict):
+    views = _views(buf, layout)
+    for symbol, parts in arrays.items():
+        for part, columns in parts.items():
+            for name, array in columns.items():
+                views[symbol][part][name][...] = array
+
+
+class SharedStore:
+    """Owner of the block; use as a context manager so it is unlinked even on errors"""
+
+    def __init__(self, arrays: Dict[str, Dict[str, Dict[str, np.ndarray]]]):
+        layout, size = _layout(arrays)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            _fill(self.shm.buf, layout, arrays)
+        except BaseException:
+            # The traceback still references views into the block, so it cannot
+            # be closed yet; removing the name is what must not be skipped
+            self.shm.unlink()
+            raise
+        self.nbytes = size
+        self.handle = {'name': self.shm.name, 'layout': layout}
+
+    @classmethod
+    def load(cls, symbols: List[str], data_dir: str = base.DATA_DIR) -> 'SharedStore':
+        """Candle columns and session table of every symbol with a data file"""
+        arrays = {}
+        for symbol in symbols:
+            file_path = os.path.join(data_dir, f"{symbol}.json")
+            if not os.path.exists(file_path):
+                continue
+            series = load_series(file_path)
+            arrays[symbol] = {'series': series.columns(),
+                              'sessions': load_sessions(file_path, series).columns()}
+        return cls(arrays)
+
+    def close(self):
+        if self.shm is None:
+            return
+        try:
+            self.shm.close()
+        finally:
+            self.shm.unlink()
+            self.shm = None
+
+    def __enter__(self) -> 'SharedStore':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(handle: Dict) -> Tuple[shared_memory.SharedMemory, Dict[str, Tuple[CandleSeries, SessionSummary]]]:
+    """Map a SharedStore's block; returns it (keep it alive) and (series, sessions) per symbol"""
+    shm = shared_memory.SharedMemory(name=handle['name'])
+    data = {}
+    for symbol, parts in _views(shm.buf, handle['layout']).items():
+        for view in (*parts['series'].values(), *parts['sessions'].values()):
+            view.flags.writeable = False
+        data[symbol] = (CandleSeries.from_columns(symbol, parts['series']), SessionSummary(parts['sessions']))
+    return shm, data
+
+# ============================================
+# Pool Workers
+# ============================================
+# A worker's data is set up once by the pool initializer: attached from the
+# shared block, or (for comparison) parsed from the symbol files by every
+# worker. Tasks are (symbol, config chunk) pairs run with batch_engine.
+
+_worker_data: Dict[str, Tuple[CandleSeries, SessionSummary]] = {}
+_worker_shm = None
+_setup_time = 0.0
+
+
+def _attach_worker(handle: Dict):
+    global _worker_shm, _worker_data, _setup_time
+    t0 = time.perf_counter()
+    _worker_shm, _worker_data = attach(handle)
+    _setup_time = time.perf_counter() - t0
+
+
+def _load_worker(symbols: List[str], data_dir: str):
+    global _worker_data, _setup_time
+    t0 = time.perf_counter()
+    for symbol in symbols:
+        file_path = os.path.join(data_dir, f"{symbol}.json")
+        if os.path.exists(file_path):
+            series = load_series(file_path)
+            _worker_data[symbol] = (series, load_sessions(file_path, series))
+    _setup_time = time.perf_counter() - t0
+
+
+def _run_task(symbol: str, configs: List[Dict]) -> List[Dict]:
+    if symbol not in _worker_data:
+        return None
+    series, sessions = _worker_data[symbol]
+    return run_batch(symbol, configs, features=SymbolFeatures(series, sessions))
+
+
+def _memory_kb() -> Dict[str, int]:
+    """Private resident memory of this process (Linux; empty elsewhere)"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                if name in ('Private_Clean', 'Private_Dirty'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        return {}
+    return {'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)}
+
+
+def _probe(_) -> Dict:
+    time.sleep(0.05)  # hold the worker so the other probes land elsewhere
+    return {'pid': os.getpid(), 'setup': _setup_time, **_memory_kb()}
+
+# ============================================
+# Parallel Sweep
+# ============================================
+
+def run_sweep_parallel(symbols: List[str], configs: List[Dict], workers: int = None,
+                       data_dir: str = base.DATA_DIR, shared: bool = True,
+                       worker_stats: List[Dict] = None) -> List[Dict]:
+    """batch_engine.run_sweep on a process pool, with identical results.
+
+    Configs are split into one chunk per worker, so every worker runs every
+    symbol. With ``shared=False`` each worker parses all symbol files itself
+    instead of attaching the shared block. Pass a list as ``worker_stats``
+    to receive each worker's setup time and memory.
+    """
+    workers = workers or os.cpu_count() or 1
+    size = max(-(-len(configs) // workers), 1)
+    chunks = [(a, configs[a:a + size]) for a in range(0, len(configs), size)]
+    per_config = [{'config': c, 'symbols': {}} for c in configs]
+
+    store = SharedStore.load(symbols, data_dir) if shared else None
+    try:
+        if shared:
+            initializer, initargs = _attach_worker, (store.handle,)
+        else:
+            initializer, initargs = _load_worker, (symbols, data_dir)
+        with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as pool:
+            try:
+                futures = [(symbol, a, pool.submit(_run_task, symbol, chunk))
+                           for symbol in symbols for a, chunk in chunks]
+                for symbol, a, future in futures:
+                    results = future.result()
+                    if results is None:
+                        continue
+                    for k, result in enumerate(results, a):
+                        per_config[k]['symbols'][symbol] = result
+                if worker_stats is not None:
+                    seen = {}
+                    for stats in pool.map(_probe, range(workers * 4)):
+                        seen.setdefault(stats['pid'], stats)
+                    worker_stats.extend(seen.values())
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+    finally:
+        if store is not None:
+            store.close()
+
+    for entry in per_config:
+        entry.update(aggregate(list(entry['symbols'].values())))
+    return per_config
+
+
+def main(workers: int = None):
+    workers = workers or os.cpu_count() or 1
+    print("=" * 70)
+    print(f"PROCESS-POOL SWEEP - SHARED MEMORY VS PER-WORKER LOADING ({workers} workers)")
+    print("=" * 70)
+    symbols = list_symbols(base.DATA_DIR)
+    configs = demo_configs()
+
+    t0 = time.perf_counter()
+    serial = run_sweep(symbols, configs)
+    serial_time = time.perf_counter() - t0
+    print(f"\nSymbols: {len(symbols)}, Configs: {len(configs)} | in-process sweep {serial_time:.2f}s")
+
+    with SharedStore.load(symbols) as store:
+        print(f"📦 Shared block: {store.nbytes / 1e6:.1f} MB for all symbols")
+
+    print(f"\n{'Mode':<14} {'Total':>7} {'Setup/worker':>13} {'Private/worker':>15}  Match")
+    for shared in (False, True):
+        stats = []
+        t0 = time.perf_counter()
+        sweep = run_sweep_parallel(symbols, configs, workers, shared=shared, worker_stats=stats)
+        elapsed = time.perf_counter() - t0
+        match = all(a['pnl'] == b['pnl'] and a['trades'] == b['trades'] and a['max_dd'] == b['max_dd']
+                    for a, b in zip(sweep, serial))
+        setup = max(s['setup'] for s in stats) * 1000
+        private = max(s.get('private', 0) for s in stats) / 1024
+        print(f"{'shared memory' if shared else 'files':<14} {elapsed:>6.2f}s {setup:>11.1f}ms "
+              f"{private:>13.1f}MB  {'✅' if match else '❌'}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[sys.argv.index('--workers') + 1]) if '--workers' in sys.argv else None)
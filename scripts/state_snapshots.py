@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+State Snapshots
+Compact engine state every N trading days in a columnar file, to restart a backtest at any date
+"""
+
+import bisect
+import contextlib
+import io
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from results_store import config_hash
+from strategy_engine import TOTALS
+
+SNAPSHOT_DIR = "results/snapshots"
+
+# Columns next to the TOTALS; position and strategy state are JSON strings
+ENGINE_COLUMNS = ('sessions', 'start', 'end', 'key', 'trade_count', 'day_count',
+                  'kill_switch_triggers', 'daily_loss_breaches', 'kill_active', 'kill_end', 'rolling_peak',
+                  'position', 'strategy')
+INT_COLUMNS = {'trades', 'wins', 'sessions', 'start', 'end', 'trade_count', 'day_count',
+               'kill_switch_triggers', 'daily_loss_breaches', 'kill_end'}
+
+# ============================================
+# Recording
+# ============================================
+# Passed to run_strategy(snapshots=...), the engine hands over a compact
+# checkpoint (strategy_engine.compact_state: scalar totals and the lengths
+# of the trade log and daily returns) before every ``every``-th session -
+# for the daily and intraday runners every ``every`` trading days. Rows are
+# flattened as they arrive, since the engine keeps mutating the open
+# position afterwards.
+
+class SnapshotLog:
+    """Snapshots of one run, saved as one .npz with a column per field"""
+
+    def __init__(self, every: int):
+        if every < 1:
+            raise ValueError(f"Snapshot interval must be at least 1 session, got {every}")
+        self.every = every
+        self.rows: List[Dict] = []
+
+    def record(self, snapshot: Dict):
+        start, end, key = snapshot['last_session']
+        row = dict(snapshot['state'])
+        row.update({
+            'sessions': snapshot['sessions'], 'start': start, 'end': end, 'key': key,
+            'kill_switch_triggers': snapshot['kill_switch_triggers'],
+            'daily_loss_breaches': snapshot['daily_loss_breaches'],
+            'kill_active': snapshot['kill_active'], 'kill_end': snapshot['kill_end'],
+            'rolling_peak': snapshot['rolling_peak'],
+            'position': json.dumps(snapshot['position']), 'strategy': json.dumps(snapshot['strategy']),
+        })
+        self.rows.append(row)
+
+    def save(self, path: str, data_hash: str):
+        """Write atomically; ``data_hash`` is the strategy's data_hash up to the last snapshot's bars"""
+        columns = {name: np.array([row[name] for row in self.rows]) for name in TOTALS + ENGINE_COLUMNS}
+        columns['data_hash'] = np.array(data_hash)
+        columns['bars'] = np.array(self.bars)
+        columns['every'] = np.array(self.every)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, **columns)
+        os.replace(tmp_path, path)
+
+    @property
+    def bars(self) -> int:
+        """Bars covered by the latest snapshot"""
+        return self.rows[-1]['end'] if self.rows else 0
+
+# ============================================
+# Restart
+# ============================================
+# A snapshot becomes an ordinary engine checkpoint (see strategy_engine
+# Checkpoints) with an empty trade log and daily returns: every total,
+# limit counter and the open position match the full run at that day, so
+# the restarted run ends with the same totals. Its trade_log and
+# daily_returns only cover the days after the snapshot; ``trade_count``
+# and ``day_count`` say how many entries came before.
+
+class SnapshotTable:
+    """Snapshots of one run, loaded column-wise; row i is the i-th snapshot"""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.keys = columns['key'].tolist()
+        self.data_hash = str(columns['data_hash'])
+        self.bars = int(columns['bars'])
+        self.every = int(columns['every'])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def nearest(self, date: str) -> Optional[int]:
+        """Row of the latest snapshot whose last simulated day is before ``date``"""
+        i = bisect.bisect_left(self.keys, date) - 1
+        return i if i >= 0 else None
+
+    def resume(self, i: int) -> Dict:
+        """Snapshot i as a run_strategy(resume=...) checkpoint"""
+        row = {}
+        for name in TOTALS + ENGINE_COLUMNS:
+            value = self.columns[name][i].item()
+            row[name] = int(value) if name in INT_COLUMNS else value
+        state = {name: row[name] for name in TOTALS}
+        state.update({'daily_returns': {}, 'trade_log': []})
+        return {
+            'sessions': row['sessions'], 'last_session': [row['start'], row['end'], row['key']],
+            'bars': self.bars, 'data_hash': self.data_hash,
+            'kill_switch_triggers': row['kill_switch_triggers'],
+            'daily_loss_breaches': row['daily_loss_breaches'],
+            'kill_active': bool(row['kill_active']), 'kill_end': row['kill_end'],
+            'rolling_peak': row['rolling_peak'],
+            'position': json.loads(row['position']), 'strategy': json.loads(row['strategy']),
+            'state': state, 'trade_count': row['trade_count'], 'day_count': row['day_count'],
+        }
+
+    def resume_before(self, date: str) -> Optional[Dict]:
+        """Checkpoint of the nearest snapshot before ``date`` (None: start from the beginning)"""
+        i = self.nearest(date)
+        return None if i is None else self.resume(i)
+
+
+def snapshot_path(name: str, symbol: str, config: Dict, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, name, f"{symbol}-{config_hash(config)[:16]}.npz")
+
+
+def load_snapshots(path: str) -> Optional[SnapshotTable]:
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return SnapshotTable({name: data[name] for name in data.files})
+
+
+def record_run(run, path: str, every: int) -> Optional[Dict]:
+    """Full run with snapshots every ``every`` sessions, saved to ``path``.
+
+    ``run(snapshots=..., resume=...)`` runs the backtest and returns
+    ``(strategy, result)``; the strategy's data_hash tags the file.
+    """
+    log = SnapshotLog(every)
+    strategy, result = run(snapshots=log, resume=None)
+    if result is not None and log.rows:
+        log.save(path, strategy.data_hash(log.bars))
+    return result
+
+
+def run_from(run, path: str, date: str) -> Optional[Dict]:
+    """Run restarted from the nearest snapshot before ``date``.
+
+    Falls back to a full run when there is no snapshot file, no snapshot
+    early enough, or the data under the snapshots changed (the engine
+    rejects the checkpoint; ``resumed_from`` is then 0).
+    """
+    table = load_snapshots(path)
+    resume = table.resume_before(date) if table is not None else None
+    _, result = run(snapshots=None, resume=resume)
+    if result is not None and result['resumed_from']:
+        result['trade_offset'] = resume['trade_count']
+    return result
+
+
+def main():
+    import validate_daily_simple as daily
+
+    print("=" * 70)
+    print("STATE SNAPSHOTS - RESTART A 20-YEAR DAILY BACKTEST AT ANY DATE")
+    print("=" * 70)
+    symbol, start_date, end_date = 'RELIANCE', '2005-11-11', '2026-02-02'
+    every = 20
+    config = {'strategy': 'daily crossover', 'start_date': start_date, 'end_date': end_date,
+              'initial_capital': daily.INITIAL_CAPITAL}
+    path = snapshot_path('validate_daily_simple', symbol, config)
+
+    def run(snapshots=None, resume=None):
+        strategy = daily.DailyCrossoverStrategy(start_date, end_date)
+        with contextlib.redirect_stdout(io.StringIO()):  # data summary on every load
+            result = daily.run_strategy(strategy, symbol, initial_capital=daily.INITIAL_CAPITAL,
+                                        resume=resume, snapshots=snapshots, **daily.engine_components())
+        return strategy, result
+
+    t0 = time.perf_counter()
+    full = record_run(run, path, every)
+    full_time = time.perf_counter() - t0
+    table = load_snapshots(path)
+    print(f"\n📸 {len(table)} snapshots (every {every} trading days) → {path} "
+          f"({os.path.getsize(path) / 1024:.0f} KB) | full run {full_time * 1000:.0f}ms")
+
+    print(f"\n{'Restart at':<12} {'From':<12} {'Skipped':>8} {'Time':>8} | {'Trades':>6} {'P&L':>12}  Match")
+    for date in ('2010-01-01', '2020-03-23', '2025-10-01', '2025-12-15'):
+        t0 = time.perf_counter()
+        result = run_from(run, path, date)
+        elapsed = time.perf_counter() - t0
+        match = all(result[name] == full[name] for name in TOTALS)
+        start_key = table.keys[table.nearest(date)]
+        print(f"{date:<12} {start_key:<12} {result['resumed_from']:>8} "
+              f"{elapsed * 1000:>6.1f}ms | {result['trades']:>6} ₹{result['pnl']:>11,.0f}  "
+              f"{'✅' if match else '❌'}")
+    print(f"\nFull run: {full['trades']} trades, P&L ₹{full['pnl']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
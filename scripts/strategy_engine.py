@@ -0,0 +1,595 @@
+#!/usr/bin/env python3
+"""
+Strategy Engine
+One backtest loop for every validator: strategies plug in signals, sizing, exits and costs
+"""
+
+from bisect import insort
+from itertools import islice
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from filter_profiler import FilterProfiler, now_ns
+
+# ============================================
+# Strategy Interface
+# ============================================
+# A strategy supplies the market data, decides which bars it looks at and
+# turns a bar into an entry signal. Everything else - sizing, exits, costs,
+# daily limits and bookkeeping - is a separate object the engine drives, so
+# the validators differ only in configuration.
+#
+# A signal is a dict with at least 'direction' ('UP'/'DOWN'), 'entry_price',
+# 'stop', 'slip' and 'atr'; strategies may add their own keys (e.g. the
+# regime) and read them back in on_trade().
+
+class Strategy:
+    """Base class; override load() and on_bar(), the rest is optional"""
+
+    # Sessions shorter than this are skipped entirely
+    min_session_bars = 0
+
+    def load(self, symbol: str) -> Tuple[Sequence, List[Tuple[int, int, str]]]:
+        """(candles, sessions) where sessions are (start, end, key) index ranges"""
+        raise NotImplementedError
+
+    def bar_range(self, start: int, end: int) -> range:
+        """Bar indices evaluated within a session"""
+        return range(start, end)
+
+    def on_session(self, start: int, end: int, key: str) -> bool:
+        """Session-level filter (e.g. volatility); False skips the session"""
+        return True
+
+    def bar_context(self, g: int, position: Optional[Dict]) -> Optional[Dict]:
+        """Per-bar values shared by entry and position management; None skips the bar"""
+        return {}
+
+    def on_bar(self, g: int, ctx: Dict) -> Optional[Dict]:
+        """Entry signal for bar g, or None"""
+        raise NotImplementedError
+
+    def on_trade(self, signal: Dict, trade: Dict):
+        """Called after a trade from ``signal`` is booked"""
+
+    def candidate_bars(self, bars: range) -> Optional[Sequence[int]]:
+        """Ascending bars of ``bars`` where on_bar can return a signal, or None to visit every bar.
+
+        Only asked for scan-ahead exits without a clock or profiler; the
+        engine then calls on_bar only at these bars and reports the rest
+        through skip_bars().
+        """
+        return None
+
+    def skip_bars(self, start: int, stop: int):
+        """Bars start..stop-1 were passed over because candidate_bars() excluded them"""
+
+    def bar_time(self, g: int) -> int:
+        """UTC epoch at which bar g closes (only needed on a shared clock)"""
+        raise NotImplementedError
+
+    def data_hash(self, stop: int) -> str:
+        """Fingerprint of the loaded bars before ``stop`` (only needed for checkpoints)"""
+        raise NotImplementedError
+
+    def save_state(self) -> Dict:
+        """The strategy's own running counters, as JSON-compatible values"""
+        return {}
+
+    def restore_state(self, saved: Dict):
+        """Undo save_state() when resuming from a checkpoint"""
+
+# ============================================
+# Sizing
+# ============================================
+
+class RiskSizing:
+    """Fixed fraction of current equity at risk between entry and stop.
+
+    With ``max_notional`` the quantity is also cut so that open notional
+    (``exposure`` plus this entry) stays within that multiple of equity;
+    a cut trade's risk_amount is what it actually risks.
+    """
+
+    def __init__(self, risk_per_trade: float, max_notional: float = None):
+        self.risk_per_trade = risk_per_trade
+        self.max_notional = max_notional
+
+    def size(self, equity: float, signal: Dict, exposure: float = 0.0) -> Tuple[int, float]:
+        """(qty, risk_amount); qty 0 means no trade"""
+        risk = abs(signal['entry_price'] - signal['stop'])
+        if risk <= 0:
+            return 0, 0
+        risk_amount = equity * self.risk_per_trade
+        qty = int(risk_amount / risk)
+        if self.max_notional is not None:
+            room = equity * self.max_notional - exposure
+            cap = int(room / signal['entry_price']) if room > 0 else 0
+            if cap < qty:
+                return cap, cap * risk
+        return qty, risk_amount
+
+# ============================================
+# Exit Policies
+# ============================================
+# Scan-ahead exits resolve a trade immediately by walking the following bars
+# (entries may overlap, as in the intraday validators). Position exits hold
+# one open position and are updated bar by bar; no entries while it is open.
+
+class TrailingStopExit:
+    """ATR trailing stop from the signal bar, optional break-even, session-close fallback"""
+
+    scan_ahead = True
+
+    def __init__(self, trailing_atr_mult: float, max_hold_bars: int,
+                 break_even_r: float = None, break_even_buffer: float = 0.001):
+        self.trailing_atr_mult = trailing_atr_mult
+        self.max_hold_bars = max_hold_bars
+        self.break_even_r = break_even_r
+        self.break_even_buffer = break_even_buffer
+
+    def exit_price(self, candles: Sequence, g: int, end: int, signal: Dict) -> float:
+        return self.exit_fill(candles, g, end, signal)[0]
+
+    def exit_fill(self, candles: Sequence, g: int, end: int, signal: Dict) -> Tuple[float, int]:
+        """(exit price, bar the trade exits on)"""
+        trend = signal['direction']
+        entry_price = signal['entry_price']
+        slip = signal['slip']
+        risk = abs(entry_price - signal['stop'])
+        exit_price = candles[end - 1]['close']
+        trailing_stop = signal['stop']
+        trail_dist = signal['atr'] * self.trailing_atr_mult
+
+        be_pending = self.break_even_r is not None
+        if be_pending:
+            cost_buffer = entry_price * self.break_even_buffer
+            be_level = entry_price + cost_buffer if trend == 'UP' else entry_price - cost_buffer
+
+        for j in range(g + 1, min(g + self.max_hold_bars, end)):
+            c = candles[j]
+
+            # Break-even once the bar's best price reaches break_even_r
+            if be_pending:
+                best_pnl_r = ((c['high'] - entry_price) / risk) if trend == 'UP' else ((entry_price - c['low']) / risk)
+                if best_pnl_r >= self.break_even_r:
+                    be_pending = False
+                    if trend == 'UP':
+                        trailing_stop = max(trailing_stop, be_level)
+                    else:
+                        trailing_stop = min(trailing_stop, be_level)
+
+            if trend == 'UP':
+                if c['high'] > entry_price + trail_dist:
+                    trailing_stop = max(trailing_stop, c['high'] - trail_dist)
+                if c['low'] <= trailing_stop:
+                    return max(trailing_stop, c['open']) - slip, j
+            else:
+                if c['low'] < entry_price - trail_dist:
+                    trailing_stop = min(trailing_stop, c['low'] + trail_dist)
+                if c['high'] >= trailing_stop:
+                    return min(trailing_stop, c['open']) + slip, j
+        return exit_price, end - 1
+
+
+class SessionCloseExit:
+    """Hold to the session's last close"""
+
+    scan_ahead = True
+
+    def exit_price(self, candles: Sequence, g: int, end: int, signal: Dict) -> float:
+        return candles[end - 1]['close']
+
+    def exit_fill(self, candles: Sequence, g: int, end: int, signal: Dict) -> Tuple[float, int]:
+        return candles[end - 1]['close'], end - 1
+
+
+class ChandelierStop:
+    """Position exit: stop ratchets to high - ATR x mult every bar; fills with % slippage"""
+
+    scan_ahead = False
+
+    def __init__(self, trailing_atr_mult: float, slippage_pct: float, close_at_end: bool = True):
+        self.trailing_atr_mult = trailing_atr_mult
+        self.slippage_pct = slippage_pct
+        self.close_at_end = close_at_end
+
+    def update(self, position: Dict, candle, ctx: Dict) -> Optional[float]:
+        trail = ctx['atr'] * self.trailing_atr_mult
+        if position['direction'] == 'UP':
+            new_stop = candle['high'] - trail
+            if new_stop > position['stop']:
+                position['stop'] = new_stop
+            if candle['low'] <= position['stop']:
+                return max(position['stop'], candle['open']) * (1 - self.slippage_pct)
+        else:
+            new_stop = candle['low'] + trail
+            if new_stop < position['stop']:
+                position['stop'] = new_stop
+            if candle['high'] >= position['stop']:
+                return min(position['stop'], candle['open']) * (1 + self.slippage_pct)
+        return None
+
+
+class ActivatedTrailingStop:
+    """Position exit: trail only once price is ATR x mult beyond entry; fills at the stop/open"""
+
+    scan_ahead = False
+
+    def __init__(self, trailing_atr_mult: float, close_at_end: bool = False):
+        self.trailing_atr_mult = trailing_atr_mult
+        self.close_at_end = close_at_end
+
+    def update(self, position: Dict, candle, ctx: Dict) -> Optional[float]:
+        trail = ctx['atr'] * self.trailing_atr_mult
+        if position['direction'] == 'UP':
+            if candle['high'] > position['entry_price'] + trail:
+                position['stop'] = max(position['stop'], candle['high'] - trail)
+            if candle['low'] <= position['stop']:
+                return min(position['stop'], candle['open'])
+        else:
+            if candle['low'] < position['entry_price'] - trail:
+                position['stop'] = min(position['stop'], candle['low'] + trail)
+            if candle['high'] >= position['stop']:
+                return max(position['stop'], candle['open'])
+        return None
+
+# ============================================
+# Risk Limits
+# ============================================
+
+class RiskLimits:
+    """Per-session trade/loss caps and the rolling-drawdown kill switch (None = off)"""
+
+    def __init__(self, max_trades_per_day: int = None, max_daily_loss: float = None,
+                 kill_switch_dd: float = None, kill_switch_days: int = 0):
+        self.max_trades_per_day = max_trades_per_day
+        self.max_daily_loss = max_daily_loss
+        self.kill_switch_dd = kill_switch_dd
+        self.kill_switch_days = kill_switch_days
+
+
+NO_LIMITS = RiskLimits()
+
+# ============================================
+# Engine
+# ============================================
+
+def new_state(initial_capital: float) -> Dict:
+    """Running totals of one backtest (filled in by the engine)"""
+    return {
+        'trades': 0, 'wins': 0, 'pnl': 0, 'equity': initial_capital, 'peak': initial_capital,
+        'max_dd': 0, 'total_r': 0, 'gross_profit': 0, 'gross_loss': 0,
+        'daily_returns': {}, 'trade_log': [],
+    }
+
+
+# Scalar running totals; trade_log and daily_returns are only ever appended to
+TOTALS = ('trades', 'wins', 'pnl', 'equity', 'peak', 'max_dd', 'total_r', 'gross_profit', 'gross_loss')
+
+
+def copy_state(state: Dict) -> Dict:
+    """Copy of the running totals that later trades do not change"""
+    return {**state, 'daily_returns': dict(state['daily_returns']), 'trade_log': list(state['trade_log'])}
+
+
+def compact_state(state: Dict) -> Dict:
+    """Scalar totals plus the lengths of the append-only trade log and daily returns"""
+    compact = {key: state[key] for key in TOTALS}
+    compact['trade_count'] = len(state['trade_log'])
+    compact['day_count'] = len(state['daily_returns'])
+    return compact
+
+
+def run_strategy(strategy: Strategy, symbol: str, sizing: RiskSizing, exit_policy, cost_model,
+                 initial_capital: float, limits: RiskLimits = NO_LIMITS,
+                 profiler: FilterProfiler = None, resume: Dict = None,
+                 checkpoint: bool = False, snapshots=None) -> Optional[Dict]:
+    """Backtest one symbol; returns raw totals (validators format their own reports)"""
+    steps = iter_strategy(strategy, symbol, sizing, exit_policy, cost_model, initial_capital,
+                          limits, profiler, resume=resume, checkpoint=checkpoint, snapshots=snapshots)
+    # Without a clock the generator never yields: the first next() runs the whole backtest
+    try:
+        next(steps)
+    except StopIteration as done:
+        return done.value
+
+
+def iter_strategy(strategy: Strategy, symbol: str, sizing: RiskSizing, exit_policy, cost_model,
+                  initial_capital: float, limits: RiskLimits = NO_LIMITS,
+                  profiler: FilterProfiler = None, clock: bool = False, state: Dict = None,
+                  equity: Callable[[], float] = None, exposure: Callable[[], float] = None,
+                  resume: Dict = None, checkpoint: bool = False, snapshots=None):
+    """Generator form of run_strategy; returns the final state.
+
+    With ``clock=True`` it yields ``strategy.bar_time(g)`` before processing
+    each bar, so a caller can interleave several runs on one timeline (see
+    portfolio_engine). Without it the generator runs to completion on the
+    first ``next()``. ``state`` lets the caller watch the totals live, and
+    ``equity`` replaces the run's own equity as the capital that sizing,
+    the daily loss limit and the kill switch are measured against.
+    ``exposure`` likewise replaces the run's own open notional for sizing
+    caps (see Shared Clock below).
+
+    Strategies that implement candidate_bars() are stepped from candidate
+    to candidate (see Event Skipping below) with identical results.
+
+    With ``checkpoint=True`` the final state carries a 'checkpoint' (see
+    Checkpoints below); passing it back as ``resume`` on a later run over
+    the same bars plus appended days simulates only the new sessions.
+    ``resumed_from`` in the final state is the number of sessions skipped.
+    ``snapshots`` (a state_snapshots.SnapshotLog) records a compact
+    checkpoint before every ``snapshots.every``-th session.
+    """
+    loaded = strategy.load(symbol)
+    if loaded is None:
+        return None
+    candles, sessions = loaded
+
+    if state is None:
+        state = new_state(initial_capital)
+    if equity is None:
+        equity = lambda: state['equity']
+    kill_switch_triggers = 0
+    daily_loss_breaches = 0
+    kill_active = False
+    kill_end = 0
+    rolling_peak = initial_capital
+    position = None
+    done, last_session = 0, None
+    if resume is not None and can_resume(strategy, sessions, resume):
+        done, last_session = resume['sessions'], tuple(resume['last_session'])
+        state.clear()
+        state.update(copy_state(resume['state']))
+        kill_switch_triggers = resume['kill_switch_triggers']
+        daily_loss_breaches = resume['daily_loss_breaches']
+        kill_active = resume['kill_active']
+        kill_end = resume['kill_end']
+        rolling_peak = resume['rolling_peak']
+        position = resume['position']
+        strategy.restore_state(resume['strategy'])
+    resumed_from = done
+    # Shared Clock: a scan-ahead trade is resolved at entry, but it is held
+    # in ``pending`` (sorted by exit bar) and booked only when the clock
+    # reaches its exit bar's close, so no other run sizes or checks limits
+    # off a P&L that is still in the future. state['open_notional'] is the
+    # notional of pending trades and the open position.
+    pending = []
+    if clock:
+        state['open_notional'] = position['qty'] * position['entry_price'] if position is not None else 0.0
+    if exposure is None:
+        exposure = lambda: state.get('open_notional', 0.0)
+    scan_ahead = exit_policy.scan_ahead
+    max_trades = limits.max_trades_per_day
+    max_daily_loss = limits.max_daily_loss
+    # Event skipping: with scan-ahead exits no state changes between entries,
+    # so only candidate bars need a visit. The daily limits change only when
+    # a trade is booked, and the first visit after a trade is always the bar
+    # the per-bar loop would have checked them on next (next_bar), so a day
+    # stops at the same point and skip_bars() never credits bars beyond it.
+    skipping = scan_ahead and not clock and profiler is None
+
+    for s_idx, (start, end, key) in enumerate(islice(sessions, done, None), done):
+        if snapshots is not None and s_idx % snapshots.every == 0 and s_idx > resumed_from:
+            snapshots.record(_checkpoint(strategy, done, last_session, kill_switch_triggers, daily_loss_breaches,
+                                         kill_active, kill_end, rolling_peak, position, compact_state(state)))
+        done, last_session = s_idx + 1, (start, end, key)
+        if end - start < strategy.min_session_bars:
+            continue
+
+        # Kill switch: pause after a rolling drawdown from the last tradeable peak
+        if limits.kill_switch_dd is not None:
+            if kill_active:
+                if s_idx < kill_end:
+                    continue
+                kill_active = False
+            current = equity()
+            rolling_dd = (rolling_peak - current) / rolling_peak if rolling_peak > 0 else 0
+            if rolling_dd >= limits.kill_switch_dd:
+                kill_active = True
+                kill_end = s_idx + limits.kill_switch_days
+                kill_switch_triggers += 1
+                print(f"  🛑 Kill switch triggered on {key} (DD: {rolling_dd*100:.1f}%)")
+                continue
+            if current > rolling_peak:
+                rolling_peak = current
+
+        if not strategy.on_session(start, end, key):
+            continue
+
+        day_trades = 0
+        daily_pnl = 0
+        bars = strategy.bar_range(start, end)
+        events = strategy.candidate_bars(bars) if skipping else None
+        next_bar = bars.start    # first bar neither visited nor skipped (event mode)
+        for g in (bars if events is None else events):
+            if clock:
+                yield strategy.bar_time(g)
+                if pending:
+                    daily_pnl += _settle(state, pending, g, strategy, cost_model, candles)
+            if scan_ahead:
+                if max_trades is not None and day_trades >= max_trades:
+                    break
+                if max_daily_loss is not None and daily_pnl <= -(equity() * max_daily_loss):
+                    daily_loss_breaches += 1
+                    break
+            if events is not None:
+                strategy.skip_bars(next_bar, g)
+                next_bar = g + 1
+
+            ctx = strategy.bar_context(g, position)
+            if ctx is None:
+                continue
+
+            if position is not None:
+                exit_price = exit_policy.update(position, candles[g], ctx)
+                if exit_price is not None:
+                    trade = _book(state, position, exit_price, cost_model, candles[g])
+                    strategy.on_trade(position, trade)
+                    if clock:
+                        state['open_notional'] -= position['qty'] * position['entry_price']
+                    position = None
+                continue
+
+            signal = strategy.on_bar(g, ctx)
+            if signal is None:
+                continue
+
+            if profiler is not None: t0 = now_ns()
+            qty, risk_amount = sizing.size(equity(), signal, exposure())
+            if profiler is not None: profiler.record('sizing', qty > 0, now_ns() - t0)
+            if qty <= 0:
+                continue
+            signal['qty'] = qty
+            signal['risk_amount'] = risk_amount
+
+            if clock:
+                state['open_notional'] += qty * signal['entry_price']
+            if not scan_ahead:
+                position = signal
+                continue
+
+            if profiler is not None: t0 = now_ns()
+            if clock:
+                exit_price, exit_bar = exit_policy.exit_fill(candles, g, end, signal)
+            else:
+                exit_price = exit_policy.exit_price(candles, g, end, signal)
+            if profiler is not None: profiler.record('exit_sim', True, now_ns() - t0)
+
+            if clock:
+                day_trades += 1
+                insort(pending, (exit_bar, g, signal, exit_price))
+                continue
+
+            trade = _book(state, signal, exit_price, cost_model, candles[g])
+            strategy.on_trade(signal, trade)
+            day_trades += 1
+            daily_pnl += trade['pnl']
+        else:
+            if events is not None and next_bar < bars.stop:
+                # Out of candidates: the rest of the day is skipped unless a limit stops it at next_bar
+                if max_trades is not None and day_trades >= max_trades:
+                    pass
+                elif max_daily_loss is not None and daily_pnl <= -(equity() * max_daily_loss):
+                    daily_loss_breaches += 1
+                else:
+                    strategy.skip_bars(next_bar, bars.stop)
+        # Trades still pending after the last visited bar settle at their own exit bars
+        while pending:
+            yield strategy.bar_time(pending[0][0])
+            _settle(state, pending, pending[0][0], strategy, cost_model, candles)
+
+    saved = None
+    if checkpoint and last_session is not None:
+        saved = _checkpoint(strategy, done, last_session, kill_switch_triggers, daily_loss_breaches,
+                            kill_active, kill_end, rolling_peak, position, copy_state(state))
+        saved['data_hash'] = strategy.data_hash(last_session[1])
+
+    # Liquidate a still-open position at the last close (not counted in drawdown or R)
+    open_position = None
+    if position is not None:
+        if exit_policy.close_at_end:
+            _book(state, position, candles[-1]['close'], cost_model, candles[-1], track_risk=False)
+            if clock:
+                state['open_notional'] -= position['qty'] * position['entry_price']
+        else:
+            open_position = position
+
+    state.update({
+        'kill_switch_triggers': kill_switch_triggers,
+        'daily_loss_breaches': daily_loss_breaches,
+        'open_position': open_position,
+        'resumed_from': resumed_from,
+    })
+    if checkpoint:
+        state['checkpoint'] = saved
+    return state
+
+# ============================================
+# Checkpoints
+# ============================================
+# A checkpoint is the complete engine state after the last session of a
+# run, taken before any end-of-data liquidation: the running totals, the
+# limit and kill-switch bookkeeping (kill_end counts sessions), an open
+# position and the strategy's save_state(). Indicators need no state of
+# their own - strategies recompute them from lookback windows - so a run
+# resumed from a checkpoint reproduces an uninterrupted run exactly, as
+# long as the bars it covered are unchanged; that is what data_hash checks
+# (over the first ``bars`` bars if given, else up to the end of the last session).
+
+def _checkpoint(strategy: Strategy, done: int, last_session: Tuple, kill_switch_triggers: int,
+                daily_loss_breaches: int, kill_active: bool, kill_end: int, rolling_peak: float,
+                position: Optional[Dict], state: Dict) -> Dict:
+    return {
+        'sessions': done, 'last_session': list(last_session),
+        'kill_switch_triggers': kill_switch_triggers, 'daily_loss_breaches': daily_loss_breaches,
+        'kill_active': kill_active, 'kill_end': kill_end, 'rolling_peak': rolling_peak,
+        'position': position, 'strategy': strategy.save_state(), 'state': state,
+    }
+
+
+def can_resume(strategy: Strategy, sessions: Sequence, resume: Dict) -> bool:
+    """Whether ``resume`` was taken on the first sessions of this exact data"""
+    done = resume['sessions']
+    if not isinstance(sessions, Sequence) or len(sessions) < done:
+        return False
+    last = tuple(sessions[done - 1])
+    if last != tuple(resume['last_session']):
+        return False  # the last covered day changed (e.g. bars were added to it)
+    return strategy.data_hash(resume.get('bars', last[1])) == resume['data_hash']
+
+
+def _settle(state: Dict, pending: List, g: int, strategy: Strategy, cost_model, candles: Sequence) -> float:
+    """Book the pending trades that exit on or before bar g; returns their P&L"""
+    pnl = 0.0
+    while pending and pending[0][0] <= g:
+        _, entry, signal, exit_price = pending.pop(0)
+        trade = _book(state, signal, exit_price, cost_model, candles[entry])
+        state['open_notional'] -= signal['qty'] * signal['entry_price']
+        strategy.on_trade(signal, trade)
+        pnl += trade['pnl']
+    return pnl
+
+
+def _book(state: Dict, signal: Dict, exit_price: float, cost_model, candle, track_risk: bool = True) -> Dict:
+    """Apply one closed trade to the running totals and log it"""
+    entry_price = signal['entry_price']
+    qty = signal['qty']
+    direction = signal['direction']
+    trade_pnl = (exit_price - entry_price) * qty if direction == 'UP' else (entry_price - exit_price) * qty
+    net = trade_pnl - cost_model.cost(direction, entry_price, exit_price, qty, trade_pnl)
+
+    state['trades'] += 1
+    state['pnl'] += net
+    state['equity'] += net
+    r_multiple = None
+    if track_risk:
+        r_multiple = net / signal['risk_amount']
+        state['total_r'] += r_multiple
+        equity = state['equity']
+        if equity > state['peak']:
+            state['peak'] = equity
+        dd = (state['peak'] - equity) / state['peak']
+        if dd > state['max_dd']:
+            state['max_dd'] = dd
+
+    if net > 0:
+        state['wins'] += 1
+        state['gross_profit'] += net
+    else:
+        state['gross_loss'] += abs(net)
+
+    timestamp = candle['timestamp']
+    date = timestamp[:10]
+    state['daily_returns'][date] = state['daily_returns'].get(date, 0) + net
+    trade = {
+        'date': date,
+        'timestamp': timestamp,
+        'direction': direction,
+        'entry': entry_price,
+        'exit': exit_price,
+        'qty': qty,
+        'pnl': net,
+        'r_multiple': r_multiple,
+    }
+    state['trade_log'].append(trade)
+    return trade
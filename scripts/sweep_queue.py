@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Sweep Work Queue
+Coordinator hands out (config chunk, symbol batch) tasks to workers on any machine and streams results into the store
+"""
+
+import argparse
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import deque
+from multiprocessing import Process
+from multiprocessing.connection import Client, Listener
+from typing import Dict, List, Optional, Tuple
+
+import batch_engine
+import results_store
+import validate_upgraded as base
+from candle_series import list_symbols, load_series
+from session_summary import load_sessions
+
+DEFAULT_ADDRESS = ('127.0.0.1', 6200)
+LOOPBACK_HOSTS = ('127.0.0.1', 'localhost')
+# Connections are authenticated with a shared key (HMAC challenge) and then
+# carry pickles both ways, so whoever holds the key can run code on the
+# coordinator and every worker. There is no default: coordinator and
+# workers read it from SWEEP_AUTHKEY, and only local mode on the loopback
+# address falls back to a random key made for that one run.
+AUTHKEY_ENV = 'SWEEP_AUTHKEY'
+
+
+def env_authkey() -> Optional[bytes]:
+    """The shared key from SWEEP_AUTHKEY (None if unset or empty)"""
+    key = os.environ.get(AUTHKEY_ENV)
+    return key.encode() if key else None
+
+LEASE_SECONDS = 60.0
+CONFIG_CHUNK = 50
+SYMBOL_BATCH = 5
+
+# ============================================
+# Tasks and Leases
+# ============================================
+# A task is (config chunk, symbol batch). A worker that takes a task holds a
+# lease on it, renewed after every symbol. When the worker's connection
+# drops its leases are released at once; a worker that hangs loses its
+# lease when it expires, and the task goes back to the queue. Results are
+# deterministic, so the first completion of a task wins and any late
+# duplicate is discarded. Workers are preferably given tasks for symbol
+# batches they have already loaded.
+
+def make_tasks(configs: List[Dict], symbols: List[str], config_chunk: int = CONFIG_CHUNK,
+               symbol_batch: int = SYMBOL_BATCH) -> List[Tuple[range, List[str]]]:
+    """(config index range, symbols) per task, symbol-batch-major"""
+    return [(range(a, min(a + config_chunk, len(configs))), symbols[b:b + symbol_batch])
+            for b in range(0, len(symbols), symbol_batch)
+            for a in range(0, len(configs), config_chunk)]
+
+
+class TaskQueue:
+    """Pending, leased and finished task ids; every method is thread-safe"""
+
+    def __init__(self, tasks: List[Tuple[range, List[str]]], lease_seconds: float = LEASE_SECONDS):
+        self.tasks = tasks
+        self.lease_seconds = lease_seconds
+        self.pending = deque(range(len(tasks)))
+        self.leases: Dict[int, Tuple[int, float]] = {}  # task_id -> (worker, deadline)
+        self.done = set()
+        self.reissued = 0
+        self.loaded: Dict[int, set] = {}  # worker -> symbol batches it has run
+        self.lock = threading.Lock()
+
+    def _expire(self):
+        now = time.monotonic()
+        for task_id, (_, deadline) in list(self.leases.items()):
+            if deadline < now:
+                del self.leases[task_id]
+                self.pending.append(task_id)
+                self.reissued += 1
+
+    def lease(self, worker: int) -> Optional[int]:
+        """A task id for ``worker`` (None: nothing pending right now)"""
+        with self.lock:
+            self._expire()
+            while self.pending and self.pending[0] in self.done:
+                self.pending.popleft()
+            if not self.pending:
+                return None
+            known = self.loaded.get(worker, set())
+            task_id = next((t for t in self.pending
+                            if t not in self.done and tuple(self.tasks[t][1]) in known), self.pending[0])
+            self.pending.remove(task_id)
+            self.leases[task_id] = (worker, time.monotonic() + self.lease_seconds)
+            self.loaded.setdefault(worker, set()).add(tuple(self.tasks[task_id][1]))
+            return task_id
+
+    def renew(self, task_id: int, worker: int) -> bool:
+        """Extend the lease; False if the worker no longer holds it"""
+        with self.lock:
+            if self.leases.get(task_id, (None,))[0] != worker:
+                return False
+            self.leases[task_id] = (worker, time.monotonic() + self.lease_seconds)
+            return True
+
+    def complete(self, task_id: int) -> bool:
+        """Mark finished; False if another worker finished it first"""
+        with self.lock:
+            if task_id in self.done:
+                return False
+            self.done.add(task_id)
+            self.leases.pop(task_id, None)
+            return True
+
+    def release(self, worker: int):
+        """Requeue every task leased by a worker that went away"""
+        with self.lock:
+            for task_id, (holder, _) in list(self.leases.items()):
+                if holder == worker:
+                    del self.leases[task_id]
+                    self.pending.appendleft(task_id)
+                    self.reissued += 1
+
+    @property
+    def finished(self) -> bool:
+        with self.lock:
+            return len(self.done) == len(self.tasks)
+
+# ============================================
+# Coordinator
+# ============================================
+# One thread per worker connection answers requests:
+#   ('lease',)               -> ('task', task_id, configs, symbols) | ('wait', seconds) | ('stop',)
+#   ('renew', task_id)       -> bool
+#   ('result', task_id, {symbol: [result per config]}) -> bool (accepted)
+# Accepted results go through a queue to the main thread, the only writer
+# of the results database; config_metrics is rolled up once at the end.
+
+def _serve(conn, worker: int, tasks: TaskQueue, configs: List[Dict], results: queue.Queue):
+    try:
+        while True:
+            message = conn.recv()
+            kind = message[0]
+            if kind == 'lease':
+                task_id = tasks.lease(worker)
+                if task_id is not None:
+                    config_range, symbols = tasks.tasks[task_id]
+                    conn.send(('task', task_id, [configs[k] for k in config_range], symbols))
+                elif tasks.finished:
+                    conn.send(('stop',))
+                    return
+                else:
+                    conn.send(('wait', min(tasks.lease_seconds / 10, 0.5)))
+            elif kind == 'renew':
+                conn.send(tasks.renew(message[1], worker))
+            elif kind == 'result':
+                accepted = tasks.complete(message[1])
+                if accepted:
+                    results.put((message[1], message[2]))
+                conn.send(accepted)
+    except (EOFError, OSError):
+        pass  # worker died or disconnected
+    finally:
+        tasks.release(worker)
+        conn.close()
+
+
+def _accept(listener: Listener, tasks: TaskQueue, configs: List[Dict], results: queue.Queue):
+    worker = 0
+    while True:
+        try:
+            conn = listener.accept()
+        except OSError:
+            return  # listener closed
+        except Exception:
+            continue  # failed handshake (wrong authkey)
+        worker += 1
+        threading.Thread(target=_serve, args=(conn, worker, tasks, configs, results), daemon=True).start()
+
+
+def coordinate(configs: List[Dict], symbols: List[str], authkey: bytes, address: Tuple[str, int] = DEFAULT_ADDRESS,
+               run_name: str = 'queued sweep', db_path: str = results_store.RESULTS_DB,
+               config_chunk: int = CONFIG_CHUNK, symbol_batch: int = SYMBOL_BATCH,
+               lease_seconds: float = LEASE_SECONDS, ready: threading.Event = None) -> Dict:
+    """Serve the sweep's tasks until all are done, saving results as they arrive; returns run stats"""
+    tasks = TaskQueue(make_tasks(configs, symbols, config_chunk, symbol_batch), lease_seconds)
+    results: queue.Queue = queue.Queue()
+    conn = results_store.connect(db_path)
+    run_id = results_store.create_run(conn, run_name, kind='sweep', data_dir=base.DATA_DIR)
+
+    listener = Listener(address, authkey=authkey)
+    threading.Thread(target=_accept, args=(listener, tasks, configs, results), daemon=True).start()
+    if ready is not None:
+        ready.set()
+    saved = 0
+    try:
+        while saved < len(tasks.tasks):
+            try:
+                task_id, by_symbol = results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            config_range = tasks.tasks[task_id][0]
+            sweep = [{'config': configs[k],
+                      'symbols': {s: r[i] for s, r in by_symbol.items() if r is not None}}
+                     for i, k in enumerate(config_range)]
+            results_store.save_sweep(conn, run_id, sweep, rollup=False)
+            saved += 1
+        results_store.rollup(conn, run_id)
+    finally:
+        listener.close()
+        conn.close()
+    return {'run_id': run_id, 'tasks': len(tasks.tasks), 'reissued': tasks.reissued}
+
+# ============================================
+# Worker
+# ============================================
+
+def work(authkey: bytes, address: Tuple[str, int] = DEFAULT_ADDRESS, data_dir: str = base.DATA_DIR) -> int:
+    """Run tasks from a coordinator until it says stop; returns the number of tasks completed.
+
+    Symbol data is read from this machine's ``data_dir`` and kept for later
+    tasks on the same symbols.
+    """
+    conn = Client(address, authkey=authkey)
+    features: Dict[str, batch_engine.SymbolFeatures] = {}
+    completed = 0
+    try:
+        while True:
+            conn.send(('lease',))
+            message = conn.recv()
+            if message[0] == 'stop':
+                return completed
+            if message[0] == 'wait':
+                time.sleep(message[1])
+                continue
+            _, task_id, configs, symbols = message
+            by_symbol = {}
+            for symbol in symbols:
+                if symbol not in features:
+                    file_path = os.path.join(data_dir, f"{symbol}.json")
+                    if os.path.exists(file_path):
+                        series = load_series(file_path)
+                        features[symbol] = batch_engine.SymbolFeatures(series, load_sessions(file_path, series))
+                by_symbol[symbol] = (batch_engine.run_batch(symbol, configs, data_dir, features[symbol])
+                                     if symbol in features else None)
+                conn.send(('renew', task_id))
+                conn.recv()
+            conn.send(('result', task_id, by_symbol))
+            completed += conn.recv()
+    except (EOFError, OSError):
+        return completed  # coordinator finished and closed the connection
+    finally:
+        conn.close()
+
+# ============================================
+# Local Benchmark
+# ============================================
+
+def run_local(configs: List[Dict], symbols: List[str], workers: int, kill_one: bool = False,
+              address: Tuple[str, int] = DEFAULT_ADDRESS, authkey: bytes = None, **options) -> Dict:
+    """Coordinator in this process plus ``workers`` worker processes on localhost.
+
+    Without an ``authkey`` a random one is made for this run, which only
+    the processes started here know; that fallback is loopback-only.
+    """
+    if authkey is None:
+        if address[0] not in LOOPBACK_HOSTS:
+            raise ValueError(f"An authkey is required to serve on {address[0]}")
+        authkey = secrets.token_bytes(32)
+    ready = threading.Event()
+    stats = {}
+    coordinator = threading.Thread(target=lambda: stats.update(coordinate(configs, symbols, authkey, address,
+                                                                          ready=ready, **options)))
+    coordinator.start()
+    ready.wait()
+    procs = [Process(target=work, args=(authkey, address)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    if kill_one:
+        time.sleep(1.0)
+        procs[0].kill()
+    coordinator.join()
+    for p in procs:
+        p.join()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed config sweep over a TCP work queue")
+    parser.add_argument('mode', choices=['coordinator', 'worker', 'local'])
+    parser.add_argument('--host', default=DEFAULT_ADDRESS[0])
+    parser.add_argument('--port', type=int, default=DEFAULT_ADDRESS[1])
+    parser.add_argument('--workers', type=int, default=4, help="local mode: worker processes to start")
+    parser.add_argument('--kill-one', action='store_true', help="local mode: kill a worker mid-sweep")
+    parser.add_argument('--lease', type=float, default=LEASE_SECONDS, help="lease length in seconds")
+    args = parser.parse_args()
+    address = (args.host, args.port)
+    authkey = env_authkey()
+    if authkey is None and (args.mode != 'local' or args.host not in LOOPBACK_HOSTS):
+        parser.error(f"set {AUTHKEY_ENV} to a shared secret for {args.mode} mode on {args.host} "
+                     f"(the same value on the coordinator and every worker)")
+
+    if args.mode == 'worker':
+        print(f"👷 Worker connecting to {args.host}:{args.port}")
+        print(f"✅ {work(authkey, address)} tasks completed")
+        return
+
+    symbols = list_symbols(base.DATA_DIR)
+    configs = batch_engine.demo_configs()
+    print("=" * 70)
+    print("QUEUED SWEEP - 8-FILTER STRATEGY")
+    print("=" * 70)
+    print(f"\nSymbols: {len(symbols)}, Configs: {len(configs)}, "
+          f"Tasks: {len(make_tasks(configs, symbols))} ({CONFIG_CHUNK} configs x {SYMBOL_BATCH} symbols)")
+
+    t0 = time.perf_counter()
+    if args.mode == 'coordinator':
+        print(f"📡 Serving on {args.host}:{args.port} - start workers with: sweep_queue.py worker --host ...")
+        stats = coordinate(configs, symbols, authkey, address, run_name='queued sweep', lease_seconds=args.lease)
+    else:
+        stats = run_local(configs, symbols, args.workers, args.kill_one, address, authkey,
+                          run_name=f'queued sweep ({args.workers} local workers)', lease_seconds=args.lease)
+    elapsed = time.perf_counter() - t0
+    units = len(symbols) * len(configs)
+    print(f"\n⏱️ {stats['tasks']} tasks in {elapsed:.2f}s ({units / elapsed:,.0f} config-symbol units/s), "
+          f"{stats['reissued']} reissued")
+    print(f"💾 Saved run #{stats['run_id']} to {results_store.RESULTS_DB}")
+
+
+if __name__ == "__main__":
+    main()
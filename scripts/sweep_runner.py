@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Resumable Sweep Runner
+Checkpoints every finished (config, symbol) unit so interrupted sweeps pick up where they stopped
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+import batch_engine
+import results_store
+import validate_upgraded as base
+from candle_series import list_symbols
+
+CHECKPOINT_DIR = "results/checkpoints"
+
+# ============================================
+# Work List
+# ============================================
+# A sweep is identified by its configs, symbols and data dir, so re-running
+# the same command finds the same checkpoint directory. Units are ordered
+# deterministically and shard i of n takes every n-th unit starting at i;
+# each shard appends finished units to its own JSON-lines file.
+
+def sweep_id(configs: List[Dict], symbols: List[str], data_dir: str) -> str:
+    payload = json.dumps({'configs': [results_store.config_hash(c) for c in configs],
+                          'symbols': symbols, 'data_dir': data_dir}, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def work_units(configs: List[Dict], symbols: List[str]) -> List[Tuple[str, str]]:
+    """All (config_hash, symbol) units, symbol-major so a shard's units batch per symbol.
+
+    A config listed twice is one unit per symbol; merge() gives both entries its results.
+    """
+    hashes = list(dict.fromkeys(results_store.config_hash(c) for c in configs))
+    return [(h, symbol) for symbol in symbols for h in hashes]
+
+
+def shard_units(units: List[Tuple[str, str]], shard_index: int, shard_count: int) -> List[Tuple[str, str]]:
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} out of range for {shard_count} shards")
+    return units[shard_index::shard_count]
+
+# ============================================
+# Checkpoints
+# ============================================
+
+def checkpoint_path(sweep_dir: str, shard_index: int, shard_count: int) -> str:
+    return os.path.join(sweep_dir, f"shard_{shard_index:03d}_of_{shard_count:03d}.jsonl")
+
+
+def read_checkpoints(sweep_dir: str) -> List[Dict]:
+    """All finished units from every shard file (lines torn by a crash are skipped)"""
+    records = []
+    if not os.path.isdir(sweep_dir):
+        return records
+    for name in sorted(os.listdir(sweep_dir)):
+        if not name.endswith('.jsonl'):
+            continue
+        with open(os.path.join(sweep_dir, name)) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def _ends_torn(path: str) -> bool:
+    """Whether the file's last line was cut short (no trailing newline)"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return False
+    with open(path, 'rb') as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+def _append(path: str, records: List[Dict]):
+    """Append finished units and fsync, so a crash loses at most the current symbol"""
+    torn = _ends_torn(path)
+    with open(path, 'a') as f:
+        if torn:
+            f.write("\n")  # end the torn line so the new records start on their own
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+# ============================================
+# Runner
+# ============================================
+
+def run_shard(configs: List[Dict], symbols: List[str], shard_index: int = 0, shard_count: int = 1,
+              data_dir: str = base.DATA_DIR, checkpoint_dir: str = CHECKPOINT_DIR,
+              run_batch: Callable = batch_engine.run_batch) -> Dict:
+    """Run this shard's unfinished units; returns counts of done/skipped/computed units"""
+    sweep_dir = os.path.join(checkpoint_dir, sweep_id(configs, symbols, data_dir))
+    os.makedirs(sweep_dir, exist_ok=True)
+    with open(os.path.join(sweep_dir, 'sweep.json'), 'w') as f:
+        json.dump({'configs': configs, 'symbols': symbols, 'data_dir': data_dir}, f)
+
+    done: Set[Tuple[str, str]] = {(r['config_hash'], r['symbol']) for r in read_checkpoints(sweep_dir)}
+    units = shard_units(work_units(configs, symbols), shard_index, shard_count)
+    pending = [u for u in units if u not in done]
+
+    by_hash = {results_store.config_hash(c): c for c in configs}
+    by_symbol: Dict[str, List[str]] = {}
+    for h, symbol in pending:
+        by_symbol.setdefault(symbol, []).append(h)
+
+    path = checkpoint_path(sweep_dir, shard_index, shard_count)
+    computed = 0
+    for symbol, hashes in by_symbol.items():
+        results = run_batch(symbol, [by_hash[h] for h in hashes], data_dir)
+        if results is None:
+            # No usable data: record empty units so restarts don't retry them
+            results = [None] * len(hashes)
+        _append(path, [{'config_hash': h, 'symbol': symbol, 'result': r} for h, r in zip(hashes, results)])
+        computed += len(hashes)
+
+    return {'sweep_dir': sweep_dir, 'units': len(units), 'skipped': len(units) - len(pending),
+            'computed': computed}
+
+
+def merge(sweep_dir: str) -> List[Dict]:
+    """Combine all shard checkpoints into run_sweep-style entries (config, symbols, aggregates)"""
+    with open(os.path.join(sweep_dir, 'sweep.json')) as f:
+        meta = json.load(f)
+
+    expected = set(work_units(meta['configs'], meta['symbols']))
+    by_hash: Dict[str, Dict] = {h: {} for h, _ in expected}
+    done = set()
+    for record in read_checkpoints(sweep_dir):
+        unit = (record['config_hash'], record['symbol'])
+        if unit not in expected:
+            continue  # stray record (config or symbol not in this sweep)
+        done.add(unit)
+        if record['result'] is not None:
+            by_hash[unit[0]][unit[1]] = record['result']
+
+    missing = expected - done
+    if missing:
+        raise RuntimeError(f"{len(missing)} units not finished yet in {sweep_dir}")
+
+    # One entry per config as listed, duplicates included (as run_sweep returns them)
+    sweep = [{'config': c, 'symbols': dict(by_hash[results_store.config_hash(c)])} for c in meta['configs']]
+    for entry in sweep:
+        entry.update(batch_engine.aggregate(list(entry['symbols'].values())))
+    return sweep
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumable, shardable config sweep")
+    parser.add_argument('--shard', type=int, default=0, help="shard index (0-based)")
+    parser.add_argument('--shards', type=int, default=1, help="total number of shards")
+    parser.add_argument('--merge', action='store_true', help="merge all shards and save to the results database")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("RESUMABLE SWEEP - 8-FILTER STRATEGY")
+    print("=" * 70)
+
+    symbols = list_symbols(base.DATA_DIR)
+    configs = batch_engine.demo_configs()
+    sweep_dir = os.path.join(CHECKPOINT_DIR, sweep_id(configs, symbols, base.DATA_DIR))
+
+    if args.merge:
+        sweep = merge(sweep_dir)
+        conn = results_store.connect()
+        run_id = results_store.create_run(conn, f'sweep {os.path.basename(sweep_dir)}', kind='sweep',
+                                          data_dir=base.DATA_DIR)
+        results_store.save_sweep(conn, run_id, sweep)
+        conn.close()
+        print(f"\n💾 Merged {len(sweep)} configs x {len(symbols)} symbols into run #{run_id}")
+        return
+
+    t0 = time.perf_counter()
+    stats = run_shard(configs, symbols, args.shard, args.shards)
+    print(f"\nShard {args.shard + 1}/{args.shards}: {stats['units']} units | "
+          f"{stats['skipped']} already done | {stats['computed']} computed in {time.perf_counter() - t0:.2f}s")
+    print(f"📁 Checkpoints: {stats['sweep_dir']}")
+
+
+if __name__ == "__main__":
+    main()
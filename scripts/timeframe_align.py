@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Multi-Timeframe Alignment
+Maps every intraday bar to the last completed higher-timeframe bar (no lookahead) in one searchsorted
+"""
+
+import os
+import time
+from typing import Dict
+
+import numpy as np
+
+from candle_series import CandleSeries, IST_OFFSET, list_symbols, load_series
+from vector_indicators import window_adx, window_ema
+
+SESSION_CLOSE = 15 * 3600 + 30 * 60  # NSE 15:30 IST, seconds after midnight
+
+DAILY_DIR = "data/tv_data_daily"
+INTRADAY_DIR = "data/tv_data_15min"
+
+# ============================================
+# Bar Close Times
+# ============================================
+# Both stores stamp bars with their start time. What matters for lookahead
+# is when a bar's values are final: a daily bar stamped 09:15 is only known
+# at the 15:30 close, an intraday bar at start + width.
+
+def bar_close_times(epochs: np.ndarray, width: int = None) -> np.ndarray:
+    """Close epoch per bar: start + width capped at the session close (width None = daily bar)"""
+    local = np.asarray(epochs, dtype=np.int64) + IST_OFFSET
+    session_close = local - local % 86400 + SESSION_CLOSE
+    if width is None:
+        close = session_close
+    else:
+        close = np.minimum(local + width, session_close)
+    return close - IST_OFFSET
+
+# ============================================
+# Alignment Index
+# ============================================
+
+class TimeframeAlignment:
+    """For each lower-timeframe bar, the index of the last higher bar completed before it closes.
+
+    A higher bar counts only if it closed strictly before the lower bar's
+    close (the 15:15-15:30 bar does not yet see that day's daily bar, whose
+    official close is published after 15:30). Bars before the first
+    completed higher bar map to -1.
+    """
+
+    def __init__(self, lower_close: np.ndarray, higher_close: np.ndarray):
+        self.index = np.searchsorted(higher_close, lower_close, side='left') - 1
+        self.valid = self.index >= 0
+        self._list = None
+
+    @classmethod
+    def between(cls, lower: CandleSeries, lower_width: int, higher: CandleSeries,
+                higher_width: int = None) -> 'TimeframeAlignment':
+        return cls(bar_close_times(lower.epoch, lower_width), bar_close_times(higher.epoch, higher_width))
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, g: int) -> int:
+        """O(1) higher-bar index for lower bar g (list lookup, fast from Python loops)"""
+        if self._list is None:
+            self._list = self.index.tolist()
+        return self._list[g]
+
+    def broadcast(self, values: np.ndarray, fill=np.nan) -> np.ndarray:
+        """Higher-timeframe values on the lower timeline (``fill`` where none is complete yet)"""
+        values = np.asarray(values)
+        if len(values) == 0:
+            return np.full(len(self.index), fill)
+        return np.where(self.valid, values[np.maximum(self.index, 0)], fill)
+
+# ============================================
+# Daily Context
+# ============================================
+
+def daily_trend_features(daily: CandleSeries, fast: int = 9, slow: int = 21, window: int = 30) -> Dict[str, np.ndarray]:
+    """Per daily bar: trend (+1 up, -1 down, 0 neutral, EMA fast/slow + close vs slow) and ADX"""
+    fast_ema = window_ema(daily.close, fast, window)
+    slow_ema = window_ema(daily.close, slow, window)
+    close = daily.close
+    trend = np.zeros(len(close), dtype=np.int8)
+    trend[(fast_ema > slow_ema) & (close > slow_ema)] = 1
+    trend[(fast_ema < slow_ema) & (close < slow_ema)] = -1
+    return {'trend': trend, 'adx': window_adx(daily.high, daily.low, daily.close, window=window)}
+
+
+def daily_context(intraday: CandleSeries, intraday_width: int, daily: CandleSeries) -> Dict[str, np.ndarray]:
+    """Daily trend and ADX of the last completed day, on the intraday timeline"""
+    align = TimeframeAlignment.between(intraday, intraday_width, daily)
+    features = daily_trend_features(daily)
+    return {
+        'daily_index': align.index,
+        'daily_trend': align.broadcast(features['trend'], fill=0).astype(np.int8),
+        'daily_adx': align.broadcast(features['adx']),
+    }
+
+
+def main():
+    print("=" * 70)
+    print("MULTI-TIMEFRAME ALIGNMENT - 15-MIN BARS → LAST COMPLETED DAILY BAR")
+    print("=" * 70)
+    symbols = [s for s in list_symbols(INTRADAY_DIR) if os.path.exists(os.path.join(DAILY_DIR, f"{s}.json"))]
+
+    for symbol in symbols[:5]:
+        intraday = load_series(os.path.join(INTRADAY_DIR, f"{symbol}.json"))
+        daily = load_series(os.path.join(DAILY_DIR, f"{symbol}.json"))
+        t0 = time.perf_counter()
+        context = daily_context(intraday, 15 * 60, daily)
+        elapsed = (time.perf_counter() - t0) * 1000
+        trend = context['daily_trend']
+        print(f"{symbol:<12} {len(intraday):>6} bars | built in {elapsed:5.1f}ms | daily trend "
+              f"up {np.mean(trend == 1) * 100:4.1f}% down {np.mean(trend == -1) * 100:4.1f}% | "
+              f"mean daily ADX {np.nanmean(context['daily_adx']):.1f}")
+
+
+if __name__ == "__main__":
+    main()
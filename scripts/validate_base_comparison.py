@@ -1,9 +1,12 @@
 
 import os
-import json
 from typing import List, Dict, Tuple
 from datetime import datetime
 
+from candle_series import load_series
+from cost_models import SellSideSTT
+from strategy_engine import RiskLimits, RiskSizing, SessionCloseExit, Strategy, run_strategy
+
 # ============================================
 # BASE CONFIG (Before Upgrades)
 # ============================================
@@ -33,78 +36,52 @@ def calculate_atr(candles: List[Dict], period: int = 14) -> float:
         tr_sum += tr
     return tr_sum / (len(candles) - 1)
 
-def process_symbol_base(symbol: str) -> Dict:
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    if not os.path.exists(file_path): return None
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    days_data = data.get('days', {})
-    sorted_days = sorted(days_data.keys())
-    
-    all_candles = []
-    day_indices = []
-    for dk in sorted_days:
-        s = len(all_candles)
-        all_candles.extend(days_data[dk])
-        day_indices.append((s, len(all_candles), dk))
-    
-    trades, wins = 0, 0
-    pnl, gross_profit, gross_loss = 0, 0, 0
-    equity = INITIAL_CAPITAL
-    
-    for d_start, d_end, dk in day_indices:
-        day_candles = all_candles[d_start:d_end]
-        if len(day_candles) < 20: continue
+class BaseStrategy(Strategy):
+    """Unfiltered EMA direction at every bar, first signal of the day held to the close"""
+
+    min_session_bars = 20
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        if not os.path.exists(file_path): return None
+        self.series = load_series(file_path)
+        return self.series.rows, self.series.day_bounds
+
+    def bar_range(self, start: int, end: int) -> range:
+        return range(max(start, 40), end - 1)
+
+    def on_bar(self, g_idx: int, ctx: Dict):
+        lookback = self.series.lookback(g_idx, 40)
+        closes = [c['close'] for c in lookback]
+        fast_ema = calculate_ema(closes, EMA_FAST)
+        slow_ema = calculate_ema(closes, EMA_SLOW)
+        
+        # Simple Entry - NO FILTERS, filled at the close
+        trend = 'UP' if fast_ema > slow_ema else 'DOWN'
+        entry_price = closes[-1]
         
-        for i in range(len(day_candles) - 1):
-            g_idx = d_start + i
-            if g_idx < 40: continue
-            
-            lookback = all_candles[g_idx-40:g_idx+1]
-            closes = [c['close'] for c in lookback]
-            fast_ema = calculate_ema(closes, EMA_FAST)
-            slow_ema = calculate_ema(closes, EMA_SLOW)
-            last_close = closes[-1]
-            
-            # Simple Entry - NO FILTERS
-            trend = 'UP' if fast_ema > slow_ema else 'DOWN'
-            entry_price = last_close
-            
-            # Simple Stop - 1.5 ATR
-            atr = calculate_atr(lookback)
-            if atr <= 0: continue
-            stop = entry_price - atr * 2.0 if trend == 'UP' else entry_price + atr * 2.0
-            risk = abs(entry_price - stop)
-            if risk <= 0: continue
-            
-            # Position
-            qty = int((equity * RISK_PER_TRADE) / risk)
-            if qty <= 0: continue
-            
-            # Exit at EOD (Simple)
-            exit_price = day_candles[-1]['close']
-            
-            # PnL
-            trade_pnl = (exit_price - entry_price) * qty if trend == 'UP' else (entry_price - exit_price) * qty
-            sell_val = exit_price * qty if trend == 'UP' else entry_price * qty
-            costs = (BROKERAGE * 2) + (sell_val * STT) + (entry_price * qty * SLIPPAGE_PCT)
-            net = trade_pnl - costs
-            
-            trades += 1
-            pnl += net
-            equity += net
-            if net > 0:
-                wins += 1
-                gross_profit += net
-            else:
-                gross_loss += abs(net)
-            
-            break # One trade per day per symbol for base test
-            
+        # Simple Stop - 2 ATR
+        atr = calculate_atr(lookback)
+        if atr <= 0: return None
+        stop = entry_price - atr * 2.0 if trend == 'UP' else entry_price + atr * 2.0
+        return {'direction': trend, 'entry_price': entry_price, 'stop': stop, 'slip': 0, 'atr': atr}
+
+
+def process_symbol_base(symbol: str) -> Dict:
+    # Exit at EOD; one trade per day per symbol for base test; slippage charged as a cost
+    result = run_strategy(
+        BaseStrategy(), symbol,
+        sizing=RiskSizing(RISK_PER_TRADE),
+        exit_policy=SessionCloseExit(),
+        cost_model=SellSideSTT(BROKERAGE, STT, entry_slippage_pct=SLIPPAGE_PCT),
+        initial_capital=INITIAL_CAPITAL,
+        limits=RiskLimits(max_trades_per_day=1),
+    )
+    if result is None:
+        return None
     return {
-        'trades': trades, 'wins': wins, 'pnl': pnl, 
-        'gross_profit': gross_profit, 'gross_loss': gross_loss
+        'trades': result['trades'], 'wins': result['wins'], 'pnl': result['pnl'], 
+        'gross_profit': result['gross_profit'], 'gross_loss': result['gross_loss']
     }
 
 def main():
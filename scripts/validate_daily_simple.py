@@ -6,8 +6,14 @@ Simplified entry logic for daily timeframe
 
 import json
 import os
+import sys
 from typing import List, Dict
 
+from candle_series import CandleSeries, parse_epochs
+from candle_stream import CHUNK_SIZE, CandleStream, date_filtered, iter_json_candles
+from cost_models import PnlSTT
+from strategy_engine import ChandelierStop, RiskSizing, Strategy, run_strategy
+
 INITIAL_CAPITAL = 500000
 RISK_PER_TRADE = 0.01  # 1% risk for daily (less frequent trades)
 SLIPPAGE_PCT = 0.001
@@ -19,6 +25,8 @@ EMA_SLOW = 21
 TRAILING_ATR_MULT = 2.0
 
 DATA_DIR = "data/tv_data_daily"
+SESSION_CLOSE_OFFSET = 6 * 3600 + 15 * 60  # daily bars are stamped 09:15; decisions happen at the 15:30 close
+LOOKBACK_BARS = 30  # indicator window; all a streaming run needs to keep
 
 def calculate_ema(prices: List[float], period: int) -> float:
     if len(prices) < period:
@@ -83,170 +91,137 @@ def calculate_adx(candles: List[Dict], period: int = 14) -> float:
     dx = (abs(plus_di - minus_di) / di_sum) * 100
     return dx
 
-def validate_daily(symbol: str, start_date: str, end_date: str):
-    """Validate on daily data with simplified logic"""
-    print(f"\n{'='*70}")
-    print(f"DAILY OPTIMIZED STRATEGY: {symbol}")
-    print(f"Period: {start_date} to {end_date}")
-    print(f"{'='*70}")
-    
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    candles = [c for c in data['candles'] 
-               if start_date <= c['timestamp'][:10] <= end_date]
-    
-    if len(candles) < 50:
-        print(f"❌ Not enough data")
-        return None
-    
-    print(f"📅 Trading days: {len(candles)}")
-    print(f"💰 Price: ₹{candles[0]['close']:.2f} → ₹{candles[-1]['close']:.2f}")
-    buy_hold = ((candles[-1]['close'] - candles[0]['close']) / candles[0]['close'] * 100)
-    print(f"📈 Buy & Hold: {buy_hold:.1f}%")
-    
-    # Backtest with SIMPLE daily logic
-    trades = 0
-    wins = 0
-    pnl = 0
-    equity = INITIAL_CAPITAL
-    peak = INITIAL_CAPITAL
-    max_dd = 0
-    total_r = 0
-    
-    in_position = False
-    entry_price = 0
-    entry_trend = ''
-    stop_loss = 0
-    qty = 0
-    
-    for i in range(EMA_SLOW + 5, len(candles)):
-        lookback = candles[max(0, i - 30):i]
+# ============================================
+# Strategy
+# ============================================
+
+class DailyCrossoverStrategy(Strategy):
+    """One position at a time: EMA 9/21 trend entries, ADX >= 20 gate on every bar
+
+    With ``chunk_size`` the history is streamed through a CandleStream in
+    chunks of that many bars instead of being loaded whole. In memory every
+    bar is its own session (one trading day), so runs can be resumed or
+    restarted from a snapshot at any day boundary.
+    """
+
+    def __init__(self, start_date: str, end_date: str, chunk_size: int = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunk_size = chunk_size
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        if self.chunk_size:
+            candles = date_filtered(iter_json_candles(file_path), self.start_date, self.end_date)
+            self.candles = CandleStream(candles, self.chunk_size, keep=LOOKBACK_BARS)
+            return self.candles, self.candles.sessions(f"{self.start_date}..{self.end_date}")
         
-        closes = [c['close'] for c in lookback]
-        fast_ema = calculate_ema(closes, EMA_FAST)
-        slow_ema = calculate_ema(closes, EMA_SLOW)
-        current_close = candles[i]['close']
-        atr = calculate_atr(lookback)
-        adx = calculate_adx(lookback)
+        with open(file_path, 'r') as f:
+            data = json.load(f)
         
-        # Skip if ADX < 20 (choppy)
-        if adx < 20:
-            continue
+        candles = [c for c in data['candles'] 
+                   if self.start_date <= c['timestamp'][:10] <= self.end_date]
         
-        # Entry logic - simple EMA crossover
-        if not in_position:
-            # Long entry
-            if fast_ema > slow_ema and current_close > fast_ema:
-                entry_trend = 'UP'
-                entry_price = current_close * (1 + SLIPPAGE_PCT)
-                stop_loss = current_close - atr * 2
-                risk = entry_price - stop_loss
-                
-                if risk > 0:
-                    risk_amount = equity * RISK_PER_TRADE
-                    qty = int(risk_amount / risk)
-                    
-                    if qty > 0:
-                        in_position = True
-                        trades += 1
-            
-            # Short entry
-            elif fast_ema < slow_ema and current_close < fast_ema:
-                entry_trend = 'DOWN'
-                entry_price = current_close * (1 - SLIPPAGE_PCT)
-                stop_loss = current_close + atr * 2
-                risk = stop_loss - entry_price
-                
-                if risk > 0:
-                    risk_amount = equity * RISK_PER_TRADE
-                    qty = int(risk_amount / risk)
-                    
-                    if qty > 0:
-                        in_position = True
-                        trades += 1
+        if len(candles) < 50:
+            print(f"❌ Not enough data")
+            return None
+        self.candles = candles
+        self.close_times = None
+        self.describe_data()
+        return candles, [(i, i + 1, c['timestamp'][:10]) for i, c in enumerate(candles)]
+
+    def describe_data(self):
+        candles = self.candles
+        first = candles.first if isinstance(candles, CandleStream) else candles[0]
+        first_close, last_close = first['close'], candles[-1]['close']
+        print(f"📅 Trading days: {len(candles)}")
+        print(f"💰 Price: ₹{first_close:.2f} → ₹{last_close:.2f}")
+        buy_hold = ((last_close - first_close) / first_close * 100)
+        print(f"📈 Buy & Hold: {buy_hold:.1f}%")
+
+    def bar_range(self, start: int, end: int) -> range:
+        return range(max(start, EMA_SLOW + 5), end)
+
+    def bar_context(self, i: int, position):
+        # Indicators from the 30 bars before i (the current bar is excluded)
+        lookback = self.candles[max(0, i - 30):i]
         
-        # Exit logic - trailing stop
-        else:
-            current_high = candles[i]['high']
-            current_low = candles[i]['low']
-            
-            if entry_trend == 'UP':
-                # Update trailing stop
-                new_stop = current_high - atr * TRAILING_ATR_MULT
-                if new_stop > stop_loss:
-                    stop_loss = new_stop
-                
-                # Check if stopped out
-                if current_low <= stop_loss:
-                    exit_price = max(stop_loss, candles[i]['open']) * (1 - SLIPPAGE_PCT)
-                    trade_pnl = (exit_price - entry_price) * qty
-                    costs = BROKERAGE * 2 + abs(trade_pnl) * STT
-                    net = trade_pnl - costs
-                    
-                    r_multiple = net / (equity * RISK_PER_TRADE)
-                    total_r += r_multiple
-                    
-                    pnl += net
-                    equity += net
-                    
-                    if equity > peak:
-                        peak = equity
-                    dd = (peak - equity) / peak
-                    if dd > max_dd:
-                        max_dd = dd
-                    
-                    if net > 0:
-                        wins += 1
-                    
-                    in_position = False
-            
-            else:  # DOWN
-                # Update trailing stop
-                new_stop = current_low + atr * TRAILING_ATR_MULT
-                if new_stop < stop_loss:
-                    stop_loss = new_stop
-                
-                # Check if stopped out
-                if current_high >= stop_loss:
-                    exit_price = min(stop_loss, candles[i]['open']) * (1 + SLIPPAGE_PCT)
-                    trade_pnl = (entry_price - exit_price) * qty
-                    costs = BROKERAGE * 2 + abs(trade_pnl) * STT
-                    net = trade_pnl - costs
-                    
-                    r_multiple = net / (equity * RISK_PER_TRADE)
-                    total_r += r_multiple
-                    
-                    pnl += net
-                    equity += net
-                    
-                    if equity > peak:
-                        peak = equity
-                    dd = (peak - equity) / peak
-                    if dd > max_dd:
-                        max_dd = dd
-                    
-                    if net > 0:
-                        wins += 1
-                    
-                    in_position = False
-    
-    # Close any open position
-    if in_position:
-        exit_price = candles[-1]['close']
-        if entry_trend == 'UP':
-            trade_pnl = (exit_price - entry_price) * qty
-        else:
-            trade_pnl = (entry_price - exit_price) * qty
+        # Skip if ADX < 20 (choppy) - no entries and no stop updates
+        if calculate_adx(lookback) < 20:
+            return None
         
-        costs = BROKERAGE * 2 + abs(trade_pnl) * STT
-        net = trade_pnl - costs
-        pnl += net
-        equity += net
+        closes = [c['close'] for c in lookback]
+        return {
+            'fast_ema': calculate_ema(closes, EMA_FAST),
+            'slow_ema': calculate_ema(closes, EMA_SLOW),
+            'atr': calculate_atr(lookback),
+        }
+
+    def bar_time(self, i: int) -> int:
+        if self.chunk_size:
+            return int(parse_epochs([self.candles[i]['timestamp']])[0]) + SESSION_CLOSE_OFFSET
+        if self.close_times is None:
+            epochs = parse_epochs([c['timestamp'] for c in self.candles])
+            self.close_times = (epochs + SESSION_CLOSE_OFFSET).tolist()
+        return self.close_times[i]
+
+    def data_hash(self, stop: int) -> str:
+        return CandleSeries.from_candles('', self.candles[:stop]).fingerprint()
+
+    def on_bar(self, i: int, ctx: Dict):
+        fast_ema, slow_ema, atr = ctx['fast_ema'], ctx['slow_ema'], ctx['atr']
+        current_close = self.candles[i]['close']
         
-        if net > 0:
-            wins += 1
+        # Long entry
+        if fast_ema > slow_ema and current_close > fast_ema:
+            return {'direction': 'UP', 'entry_price': current_close * (1 + SLIPPAGE_PCT),
+                    'stop': current_close - atr * 2, 'slip': 0, 'atr': atr}
+        
+        # Short entry
+        if fast_ema < slow_ema and current_close < fast_ema:
+            return {'direction': 'DOWN', 'entry_price': current_close * (1 - SLIPPAGE_PCT),
+                    'stop': current_close + atr * 2, 'slip': 0, 'atr': atr}
+        return None
+
+
+def engine_components() -> Dict:
+    """Sizing, exits and costs of the daily strategy (run_strategy keyword args);
+    an open position is closed at the last bar"""
+    return {
+        'sizing': RiskSizing(RISK_PER_TRADE),
+        'exit_policy': ChandelierStop(TRAILING_ATR_MULT, SLIPPAGE_PCT, close_at_end=True),
+        'cost_model': PnlSTT(BROKERAGE, STT),
+    }
+
+
+def validate_daily(symbol: str, start_date: str, end_date: str, chunk_size: int = None):
+    """Validate on daily data with simplified logic
+
+    Pass ``chunk_size`` to stream the history in bounded memory; the
+    results are identical to the in-memory run.
+    """
+    print(f"\n{'='*70}")
+    print(f"DAILY OPTIMIZED STRATEGY: {symbol}")
+    print(f"Period: {start_date} to {end_date}")
+    print(f"{'='*70}")
+    
+    # Backtest with SIMPLE daily logic
+    strategy = DailyCrossoverStrategy(start_date, end_date, chunk_size)
+    result = run_strategy(strategy, symbol, initial_capital=INITIAL_CAPITAL, **engine_components())
+    if result is None:
+        return None
+    candles = strategy.candles
+    if chunk_size:
+        # Data stats are only known once the stream has been read
+        if len(candles) < 50:
+            print(f"❌ Not enough data")
+            return None
+        strategy.describe_data()
+    trades = result['trades']
+    wins = result['wins']
+    pnl = result['pnl']
+    max_dd = result['max_dd']
+    total_r = result['total_r']
     
     # Results
     win_rate = (wins / trades * 100) if trades > 0 else 0
@@ -272,7 +247,7 @@ def validate_daily(symbol: str, start_date: str, end_date: str):
         'monthly_return': monthly_return
     }
 
-def main():
+def main(chunk_size: int = None):
     print("=" * 70)
     print("DAILY-OPTIMIZED STRATEGY (SIMPLE EMA CROSSOVER + ADX FILTER)")
     print("=" * 70)
@@ -283,13 +258,13 @@ def main():
     
     # Test periods
     print("\n🚀 TEST 1: COVID RALLY (Mar-Sep 2020)")
-    covid = validate_daily('RELIANCE', '2020-03-23', '2020-09-14')
+    covid = validate_daily('RELIANCE', '2020-03-23', '2020-09-14', chunk_size)
     
     print("\n\n🚀 TEST 2: 2005-2006 RALLY")
-    rally = validate_daily('RELIANCE', '2005-11-11', '2006-05-10')
+    rally = validate_daily('RELIANCE', '2005-11-11', '2006-05-10', chunk_size)
     
     print("\n\n🚀 TEST 3: FULL 20-YEAR PERIOD")
-    full = validate_daily('RELIANCE', '2005-11-11', '2026-02-02')
+    full = validate_daily('RELIANCE', '2005-11-11', '2026-02-02', chunk_size)
     
     # Summary
     print("\n" + "=" * 70)
@@ -311,4 +286,4 @@ def main():
             print(f"\n⚠️ Below target. Daily data may not be ideal for this strategy.")
 
 if __name__ == "__main__":
-    main()
+    main(chunk_size=CHUNK_SIZE if '--stream' in sys.argv else None)
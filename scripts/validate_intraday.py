@@ -9,6 +9,10 @@ import os
 from datetime import datetime
 from typing import List, Dict, Tuple
 
+from cost_models import PnlSTT
+from strategy_engine import RiskLimits, RiskSizing, Strategy, TrailingStopExit, run_strategy
+from window_extrema import RangeExtrema
+
 # Configuration
 INITIAL_CAPITAL = 500000
 RISK_PER_TRADE = 0.003  # 0.3%
@@ -76,118 +80,87 @@ def detect_trend(candles: List[Dict]) -> str:
         return 'DOWN'
     return 'NEUTRAL'
 
+# ============================================
+# Strategy
+# ============================================
+
+class IntradayTrendStrategy(Strategy):
+    """EMA trend entries within each day; lookbacks never cross the day boundary"""
+
+    min_session_bars = 75
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        if not os.path.exists(file_path):
+            print(f"  ❌ File not found: {file_path}")
+            return None
+        
+        # Load data
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        
+        days_data = data.get('days', {})
+        sorted_days = sorted(days_data.keys())
+        print(f"  📅 {len(sorted_days)} trading days")
+        
+        # Days back to back in one list; sessions are the day index ranges
+        self.candles = []
+        sessions = []
+        for day_key in sorted_days:
+            start = len(self.candles)
+            self.candles.extend(days_data[day_key])
+            sessions.append((start, len(self.candles), day_key))
+        return self.candles, sessions
+
+    def on_session(self, start: int, end: int, key: str) -> bool:
+        self.day_start = start
+        self.extrema = RangeExtrema.from_candles(self.candles[start:end])
+        return True
+
+    def bar_range(self, start: int, end: int) -> range:
+        return range(start + EMA_SLOW + 30, end - 5)
+
+    def on_bar(self, g: int, ctx: Dict):
+        i = g - self.day_start
+        lookback = self.candles[self.day_start + max(0, i - 60):g + 1]
+        trend = detect_trend(lookback)
+        
+        if trend == 'NEUTRAL':
+            return None
+        
+        # Entry
+        entry = self.candles[g]['close']
+        slip = entry * SLIPPAGE_PCT
+        entry_price = entry + slip if trend == 'UP' else entry - slip
+        
+        # Stop loss
+        atr = calculate_atr(lookback)
+        swing_high = self.extrema.swing_high(i, 10)
+        swing_low = self.extrema.swing_low(i, 10)
+        stop = swing_low - atr * 0.5 if trend == 'UP' else swing_high + atr * 0.5
+        
+        return {'direction': trend, 'entry_price': entry_price, 'stop': stop, 'slip': slip, 'atr': atr}
+
+
 def process_symbol(symbol: str) -> Dict:
     """Process one symbol and return results"""
     print(f"\nProcessing {symbol}...")
     
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    if not os.path.exists(file_path):
-        print(f"  ❌ File not found: {file_path}")
+    result = run_strategy(
+        IntradayTrendStrategy(), symbol,
+        sizing=RiskSizing(RISK_PER_TRADE),
+        exit_policy=TrailingStopExit(TRAILING_ATR_MULT, max_hold_bars=40),
+        cost_model=PnlSTT(BROKERAGE, STT),
+        initial_capital=INITIAL_CAPITAL,
+        limits=RiskLimits(max_trades_per_day=MAX_TRADES_PER_DAY),
+    )
+    if result is None:
         return None
     
-    # Load data
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    days_data = data.get('days', {})
-    sorted_days = sorted(days_data.keys())
-    
-    print(f"  📅 {len(sorted_days)} trading days")
-    
-    # Process each day
-    trades = 0
-    wins = 0
-    pnl = 0
-    equity = INITIAL_CAPITAL
-    peak = INITIAL_CAPITAL
-    max_dd = 0
-    daily_returns = {}
-    
-    for day_key in sorted_days:
-        day_candles = days_data[day_key]
-        
-        if len(day_candles) < 75:
-            continue
-        
-        day_trades = 0
-        
-        for i in range(EMA_SLOW + 30, len(day_candles) - 5):
-            if day_trades >= MAX_TRADES_PER_DAY:
-                break
-            
-            lookback = day_candles[max(0, i - 60):i + 1]
-            trend = detect_trend(lookback)
-            
-            if trend == 'NEUTRAL':
-                continue
-            
-            # Entry
-            last_candle = day_candles[i]
-            entry = last_candle['close']
-            slip = entry * SLIPPAGE_PCT
-            entry_price = entry + slip if trend == 'UP' else entry - slip
-            
-            # Stop loss
-            atr = calculate_atr(lookback)
-            swing_high = max(c['high'] for c in lookback[-10:])
-            swing_low = min(c['low'] for c in lookback[-10:])
-            
-            stop = swing_low - atr * 0.5 if trend == 'UP' else swing_high + atr * 0.5
-            risk = abs(entry_price - stop)
-            
-            if risk <= 0:
-                continue
-            
-            # Position sizing
-            risk_amount = equity * RISK_PER_TRADE
-            qty = int(risk_amount / risk)
-            
-            if qty <= 0:
-                continue
-            
-            # Find exit with trailing stop
-            exit_price = day_candles[-1]['close']
-            trailing_stop = stop
-            trail_dist = atr * TRAILING_ATR_MULT
-            
-            for j in range(i + 1, min(i + 40, len(day_candles))):
-                c = day_candles[j]
-                
-                if trend == 'UP':
-                    if c['high'] > entry_price + trail_dist:
-                        trailing_stop = max(trailing_stop, c['high'] - trail_dist)
-                    if c['low'] <= trailing_stop:
-                        exit_price = max(trailing_stop, c['open']) - slip
-                        break
-                else:
-                    if c['low'] < entry_price - trail_dist:
-                        trailing_stop = min(trailing_stop, c['low'] + trail_dist)
-                    if c['high'] >= trailing_stop:
-                        exit_price = min(trailing_stop, c['open']) + slip
-                        break
-            
-            # Calculate P&L
-            trade_pnl = (exit_price - entry_price) * qty if trend == 'UP' else (entry_price - exit_price) * qty
-            costs = BROKERAGE * 2 + abs(trade_pnl) * STT
-            net = trade_pnl - costs
-            
-            trades += 1
-            day_trades += 1
-            pnl += net
-            equity += net
-            
-            if equity > peak:
-                peak = equity
-            dd = (peak - equity) / peak
-            if dd > max_dd:
-                max_dd = dd
-            
-            if net > 0:
-                wins += 1
-            
-            daily_returns[day_key] = daily_returns.get(day_key, 0) + net
-    
     # Calculate metrics
+    trades = result['trades']
+    wins = result['wins']
+    pnl = result['pnl']
     win_rate = (wins / trades * 100) if trades > 0 else 0
     total_return = (pnl / INITIAL_CAPITAL * 100)
     avg_trade = pnl / trades if trades > 0 else 0
@@ -201,9 +174,9 @@ def process_symbol(symbol: str) -> Dict:
         'win_rate': win_rate,
         'pnl': pnl,
         'total_return': total_return,
-        'max_dd': max_dd * 100,
+        'max_dd': result['max_dd'] * 100,
         'avg_trade': avg_trade,
-        'trading_days': len(daily_returns)
+        'trading_days': len(result['daily_returns'])
     }
 
 def main():
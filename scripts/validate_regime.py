@@ -8,6 +8,10 @@ import json
 import os
 from typing import List, Dict, Tuple
 
+from cost_models import PnlSTT
+from strategy_engine import RiskSizing, Strategy, TrailingStopExit, run_strategy
+from window_extrema import RangeExtrema
+
 # Configuration
 INITIAL_CAPITAL = 500000
 RISK_PER_TRADE = 0.003
@@ -252,124 +256,107 @@ def detect_trend_and_pullback(candles: List[Dict]):
 # Validation with Regime Detection
 # ============================================
 
-def validate_with_regime(symbol: str, start_date: str, end_date: str):
-    """Validate with adaptive regime-based filters"""
-    print(f"\n{'='*70}")
-    print(f"REGIME-ADAPTIVE VALIDATION: {symbol}")
-    print(f"Period: {start_date} to {end_date}")
-    print(f"{'='*70}")
-    
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    candles = [c for c in data['candles'] 
-               if start_date <= c['timestamp'][:10] <= end_date]
-    
-    if len(candles) < 100:
-        print(f"❌ Not enough data")
-        return None
-    
-    print(f"📅 Trading days: {len(candles)}")
-    print(f"💰 Price: ₹{candles[0]['close']:.2f} → ₹{candles[-1]['close']:.2f}")
-    buy_hold = ((candles[-1]['close'] - candles[0]['close']) / candles[0]['close'] * 100)
-    print(f"📈 Buy & Hold: {buy_hold:.1f}%")
-    
-    # Track regime stats
-    regime_days = {'TRENDING': 0, 'NORMAL': 0, 'CHOPPY': 0}
-    regime_trades = {'TRENDING': 0, 'NORMAL': 0, 'CHOPPY': 0}
-    
-    # Backtest
-    trades = 0
-    wins = 0
-    pnl = 0
-    equity = INITIAL_CAPITAL
-    peak = INITIAL_CAPITAL
-    max_dd = 0
-    total_r = 0
-    
-    for i in range(EMA_SLOW + 30, len(candles) - 1):
+# ============================================
+# Strategy
+# ============================================
+
+class RegimeAdaptiveStrategy(Strategy):
+    """Pullback entries whose slope/quality thresholds follow the ADX regime"""
+
+    def __init__(self, start_date: str, end_date: str):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.regime_days = {'TRENDING': 0, 'NORMAL': 0, 'CHOPPY': 0}
+        self.regime_trades = {'TRENDING': 0, 'NORMAL': 0, 'CHOPPY': 0}
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        
+        candles = [c for c in data['candles'] 
+                   if self.start_date <= c['timestamp'][:10] <= self.end_date]
+        
+        if len(candles) < 100:
+            print(f"❌ Not enough data")
+            return None
+        self.candles = candles
+        self.extrema = RangeExtrema.from_candles(candles)
+        
+        print(f"📅 Trading days: {len(candles)}")
+        print(f"💰 Price: ₹{candles[0]['close']:.2f} → ₹{candles[-1]['close']:.2f}")
+        buy_hold = ((candles[-1]['close'] - candles[0]['close']) / candles[0]['close'] * 100)
+        print(f"📈 Buy & Hold: {buy_hold:.1f}%")
+        return candles, [(0, len(candles), f"{self.start_date}..{self.end_date}")]
+
+    def bar_range(self, start: int, end: int) -> range:
+        return range(EMA_SLOW + 30, end - 1)
+
+    def on_bar(self, i: int, ctx: Dict):
+        candles = self.candles
         lookback = candles[max(0, i - 60):i + 1]
         
         # Detect regime
         regime_info = detect_regime(lookback)
-        regime_days[regime_info['regime']] += 1
+        self.regime_days[regime_info['regime']] += 1
         
         # Skip if choppy
         if not regime_info['should_trade']:
-            continue
+            return None
         
         # Apply regime-specific filters
         if not is_trend_strong(lookback, regime_info['min_ema_slope']):
-            continue
+            return None
         
         trend, is_pullback = detect_trend_and_pullback(lookback)
         if trend == 'NEUTRAL' or not is_pullback:
-            continue
+            return None
         
         quality = calculate_trade_quality(lookback)
         if quality < regime_info['min_trade_score']:
-            continue
+            return None
         
-        # Execute trade
         entry = candles[i]['close']
         slip = entry * SLIPPAGE_PCT
         entry_price = entry + slip if trend == 'UP' else entry - slip
         
         atr = calculate_atr(lookback)
-        swing_high = max(c['high'] for c in lookback[-10:])
-        swing_low = min(c['low'] for c in lookback[-10:])
-        
+        swing_high = self.extrema.swing_high(i, 10)
+        swing_low = self.extrema.swing_low(i, 10)
         stop = swing_low - atr * 0.5 if trend == 'UP' else swing_high + atr * 0.5
-        risk = abs(entry_price - stop)
-        if risk <= 0:
-            continue
-        
-        risk_amount = equity * RISK_PER_TRADE
-        qty = int(risk_amount / risk)
-        if qty <= 0:
-            continue
-        
-        # Find exit
-        exit_price = candles[-1]['close']
-        trailing_stop = stop
-        trail_dist = atr * TRAILING_ATR_MULT
-        
-        for j in range(i + 1, min(i + 20, len(candles))):
-            c = candles[j]
-            if trend == 'UP':
-                if c['high'] > entry_price + trail_dist:
-                    trailing_stop = max(trailing_stop, c['high'] - trail_dist)
-                if c['low'] <= trailing_stop:
-                    exit_price = max(trailing_stop, c['open']) - slip
-                    break
-            else:
-                if c['low'] < entry_price - trail_dist:
-                    trailing_stop = min(trailing_stop, c['low'] + trail_dist)
-                if c['high'] >= trailing_stop:
-                    exit_price = min(trailing_stop, c['open']) + slip
-                    break
-        
-        trade_pnl = (exit_price - entry_price) * qty if trend == 'UP' else (entry_price - exit_price) * qty
-        costs = BROKERAGE * 2 + abs(trade_pnl) * STT
-        net = trade_pnl - costs
-        
-        r_multiple = net / risk_amount
-        total_r += r_multiple
-        
-        trades += 1
-        regime_trades[regime_info['regime']] += 1
-        pnl += net
-        equity += net
-        
-        if equity > peak:
-            peak = equity
-        dd = (peak - equity) / peak
-        if dd > max_dd:
-            max_dd = dd
         
-        if net > 0:
-            wins += 1
+        return {'direction': trend, 'entry_price': entry_price, 'stop': stop, 'slip': slip, 'atr': atr,
+                'regime': regime_info['regime']}
+
+    def on_trade(self, signal: Dict, trade: Dict):
+        self.regime_trades[signal['regime']] += 1
+
+
+def validate_with_regime(symbol: str, start_date: str, end_date: str):
+    """Validate with adaptive regime-based filters"""
+    print(f"\n{'='*70}")
+    print(f"REGIME-ADAPTIVE VALIDATION: {symbol}")
+    print(f"Period: {start_date} to {end_date}")
+    print(f"{'='*70}")
+    
+    strategy = RegimeAdaptiveStrategy(start_date, end_date)
+    result = run_strategy(
+        strategy, symbol,
+        sizing=RiskSizing(RISK_PER_TRADE),
+        exit_policy=TrailingStopExit(TRAILING_ATR_MULT, max_hold_bars=20),
+        cost_model=PnlSTT(BROKERAGE, STT),
+        initial_capital=INITIAL_CAPITAL,
+    )
+    if result is None:
+        return None
+    candles = strategy.candles
+    regime_days = strategy.regime_days
+    regime_trades = strategy.regime_trades
+    trades = result['trades']
+    wins = result['wins']
+    pnl = result['pnl']
+    max_dd = result['max_dd']
+    total_r = result['total_r']
     
     # Results
     win_rate = (wins / trades * 100) if trades > 0 else 0
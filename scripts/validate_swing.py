@@ -1,9 +1,15 @@
 
 import os
+import sys
 import json
 from typing import List, Dict, Tuple
 from datetime import datetime
 
+from candle_stream import CHUNK_SIZE, CandleStream, iter_json_candles
+from cost_models import TurnoverSTT
+from strategy_engine import ActivatedTrailingStop, RiskSizing, Strategy, run_strategy
+from window_extrema import RangeExtrema
+
 # ============================================
 # SWING TRADING CONFIG (Daily Bars)
 # ============================================
@@ -34,93 +40,89 @@ def calculate_atr(candles: List[Dict], period: int = 14) -> float:
         tr_sum += tr
     return tr_sum / (len(candles) - 1)
 
-def process_symbol_swing(symbol: str) -> Dict:
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    if not os.path.exists(file_path): return None
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    # Daily data is usually a simple list, not nested by day
-    candles = data if isinstance(data, list) else data.get('candles', [])
-    if not candles: return None
-    
-    trades, wins = 0, 0
-    pnl, gross_profit, gross_loss = 0, 0, 0
-    equity = INITIAL_CAPITAL
-    
-    in_position = False
-    entry_price = 0
-    stop_loss = 0
-    qty = 0
-    trend = ""
-    
-    for i in range(EMA_SLOW + 5, len(candles)):
-        curr = candles[i]
+class SwingPullbackStrategy(Strategy):
+    """Long-only daily swing: EMA 20/50 trend with a 3-day dip below the fast EMA
+
+    With ``chunk_size`` the history is streamed in chunks, keeping only the
+    EMA_SLOW-bar lookback between them.
+    """
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = chunk_size
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        if not os.path.exists(file_path): return None
+        if self.chunk_size:
+            self.candles = CandleStream(iter_json_candles(file_path), self.chunk_size, keep=EMA_SLOW)
+            self.extrema = None
+            return self.candles, self.candles.sessions(symbol)
         
-        if not in_position:
-            # Entry Logic (8-Filter Logic Simplified for Daily)
-            lookback = candles[i-EMA_SLOW:i+1]
-            closes = [c['close'] for c in lookback]
-            fast_ema = calculate_ema(closes, EMA_FAST)
-            slow_ema = calculate_ema(closes, EMA_SLOW)
-            atr = calculate_atr(lookback)
-            
-            # Trend Check
-            if fast_ema > slow_ema and curr['close'] > fast_ema:
-                # UP Trend Potential
-                # Pullback: price dipped near fast EMA in last 3 days
-                recent_low = min(c['low'] for c in candles[i-3:i])
-                if recent_low < fast_ema:
-                    in_position = True
-                    trend = "UP"
-                    entry_price = curr['close'] * (1 + SLIPPAGE_PCT)
-                    stop_loss = entry_price - atr * 2.0
-                    risk = entry_price - stop_loss
-                    qty = int((equity * RISK_PER_TRADE) / risk) if risk > 0 else 0
-                    if qty <= 0: in_position = False
-            
-            elif fast_ema < slow_ema and curr['close'] < fast_ema:
-                # DOWN Trend Potential (Shorting - if allowed)
-                pass 
-
-        else:
-            # Management Logic
-            lookback = candles[i-14:i+1]
-            atr = calculate_atr(lookback)
-            
-            # Trail Stop
-            if trend == "UP":
-                if curr['high'] > entry_price + atr * TRAILING_ATR_MULT:
-                    stop_loss = max(stop_loss, curr['high'] - atr * TRAILING_ATR_MULT)
-                
-                # Check Exit
-                if curr['low'] <= stop_loss:
-                    exit_price = min(stop_loss, curr['open'])
-                    net_pnl = (exit_price - entry_price) * qty
-                    costs = (entry_price + exit_price) * qty * STT
-                    net = net_pnl - costs
-                    
-                    trades += 1
-                    pnl += net
-                    equity += net
-                    if net > 0:
-                        wins += 1
-                        gross_profit += net
-                    else:
-                        gross_loss += abs(net)
-                    in_position = False
-            
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        
+        # Daily data is usually a simple list, not nested by day
+        candles = data if isinstance(data, list) else data.get('candles', [])
+        if not candles: return None
+        self.candles = candles
+        self.extrema = RangeExtrema.from_candles(candles)
+        return candles, [(0, len(candles), symbol)]
+
+    def bar_range(self, start: int, end: int) -> range:
+        return range(max(start, EMA_SLOW + 5), end)
+
+    def bar_context(self, i: int, position):
+        if position is None:
+            return {}
+        # Management ATR over the last 15 bars
+        return {'atr': calculate_atr(self.candles[i-14:i+1])}
+
+    def on_bar(self, i: int, ctx: Dict):
+        # Entry Logic (8-Filter Logic Simplified for Daily)
+        curr = self.candles[i]
+        lookback = self.candles[i-EMA_SLOW:i+1]
+        closes = [c['close'] for c in lookback]
+        fast_ema = calculate_ema(closes, EMA_FAST)
+        slow_ema = calculate_ema(closes, EMA_SLOW)
+        
+        # Trend Check; shorts are not taken
+        if fast_ema > slow_ema and curr['close'] > fast_ema:
+            # Pullback: price dipped near fast EMA in last 3 days
+            if self.extrema is not None:
+                recent_low = self.extrema.lowest(i - 3, i)
+            else:
+                recent_low = min(c['low'] for c in self.candles[i - 3:i])
+            if recent_low < fast_ema:
+                atr = calculate_atr(lookback)
+                entry_price = curr['close'] * (1 + SLIPPAGE_PCT)
+                return {'direction': 'UP', 'entry_price': entry_price, 'stop': entry_price - atr * 2.0,
+                        'slip': 0, 'atr': atr}
+        return None
+
+
+def process_symbol_swing(symbol: str, chunk_size: int = None) -> Dict:
+    # Positions still open at the end of the data are not counted
+    strategy = SwingPullbackStrategy(chunk_size)
+    result = run_strategy(
+        strategy, symbol,
+        sizing=RiskSizing(RISK_PER_TRADE),
+        exit_policy=ActivatedTrailingStop(TRAILING_ATR_MULT),
+        cost_model=TurnoverSTT(STT),
+        initial_capital=INITIAL_CAPITAL,
+    )
+    if result is None or len(strategy.candles) == 0:
+        return None
     return {
-        'symbol': symbol, 'trades': trades, 'wins': wins, 'pnl': pnl, 
-        'gross_profit': gross_profit, 'gross_loss': gross_loss, 'equity': equity
+        'symbol': symbol, 'trades': result['trades'], 'wins': result['wins'], 'pnl': result['pnl'], 
+        'gross_profit': result['gross_profit'], 'gross_loss': result['gross_loss'], 'equity': result['equity']
     }
 
-def main():
+def main(chunk_size: int = None):
     symbols = [f.replace('.json', '') for f in os.listdir(DATA_DIR) if f.endswith('.json')]
     results = []
     print(f"Testing SWING Strategy on {len(symbols)} symbols...")
     for s in sorted(symbols):
-        res = process_symbol_swing(s)
+        res = process_symbol_swing(s, chunk_size)
         if res: results.append(res)
     
     total_pnl = sum(r['pnl'] for r in results)
@@ -140,4 +142,4 @@ def main():
     print(f"Profit Factor: {(total_gp/total_gl) if total_gl > 0 else 0:.2f}")
 
 if __name__ == "__main__":
-    main()
+    main(chunk_size=CHUNK_SIZE if '--stream' in sys.argv else None)
@@ -4,11 +4,27 @@ FULL Upgraded Strategy Validator - All 8 Risk Filters
 Tests complete upgraded strategy on 5-minute TradingView data
 """
 
-import json
 import os
+import sys
+from bisect import bisect_left
 from datetime import datetime
+from itertools import islice
 from typing import List, Dict, Tuple
 
+import numpy as np
+
+from candle_series import load_series
+from checkpoint_store import load_checkpoint, save_checkpoint
+from filter_pipeline import FilterPipeline, FilterStage
+from filter_profiler import FilterProfiler, now_ns
+from session_summary import load_sessions
+from timeframe_align import daily_context
+from vector_indicators import LOOKBACK_WINDOW, trade_quality, window_adx, window_ema
+from window_extrema import RangeExtrema
+import results_store
+from cost_models import SellSideSTT
+from strategy_engine import RiskLimits, RiskSizing, Strategy, TrailingStopExit, run_strategy
+
 # ============================================
 # Configuration
 # ============================================
@@ -33,8 +49,12 @@ EMA_FAST = 15
 EMA_SLOW = 25
 PULLBACK_ATR = 1.0  # Adjusted from 3.0 for viability in 15-min trends
 TRAILING_ATR_MULT = 2.0
+MIN_DAILY_ADX = 20  # Higher-timeframe gate (--daily-filter)
 
 DATA_DIR = "data/tv_data_15min"
+DAILY_DATA_DIR = "data/tv_data_daily"
+BAR_SECONDS = 15 * 60
+PROFILE_DIR = "profile_output"
 
 # ============================================
 # Indicator Functions
@@ -59,10 +79,11 @@ def calculate_atr(candles: List[Dict], period: int = 14) -> float:
         return 0
     
     true_ranges = []
-    for i in range(1, len(candles)):
-        high = candles[i]['high']
-        low = candles[i]['low']
-        prev_close = candles[i-1]['close']
+    # Pairwise iteration works on lists and zero-copy CandleWindow views alike
+    for prev, cur in zip(candles, islice(candles, 1, None)):
+        high = cur['high']
+        low = cur['low']
+        prev_close = prev['close']
         
         tr = max(
             high - low,
@@ -103,12 +124,12 @@ def calculate_adx(candles: List[Dict], period: int = 14) -> float:
     plus_dm = []
     minus_dm = []
     
-    for i in range(1, len(candles)):
-        high = candles[i]['high']
-        low = candles[i]['low']
-        prev_high = candles[i-1]['high']
-        prev_low = candles[i-1]['low']
-        prev_close = candles[i-1]['close']
+    for prev, cur in zip(candles, islice(candles, 1, None)):
+        high = cur['high']
+        low = cur['low']
+        prev_high = prev['high']
+        prev_low = prev['low']
+        prev_close = prev['close']
         
         tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
         true_ranges.append(tr)
@@ -313,7 +334,6 @@ def detect_trend_and_pullback(candles: List[Dict]) -> Tuple[str, bool]:
     fast_ema = calculate_ema(closes, EMA_FAST)
     slow_ema = calculate_ema(closes, EMA_SLOW)
     current_close = closes[-1]
-    atr = calculate_atr(candles)
     
     # Trend detection
     trend = 'NEUTRAL'
@@ -322,7 +342,6 @@ def detect_trend_and_pullback(candles: List[Dict]) -> Tuple[str, bool]:
     elif fast_ema < slow_ema and current_close < slow_ema:
         trend = 'DOWN'
     
-    atr = calculate_atr(candles)
     is_pullback = False
     
     if trend == 'UP':
@@ -334,250 +353,313 @@ def detect_trend_and_pullback(candles: List[Dict]) -> Tuple[str, bool]:
     
     return trend, is_pullback
 
+# ============================================
+# Entry Filter Pipeline
+# ============================================
+# Each stage reads the bar context dict and may publish values for later
+# stages. Costs are relative ns/call from `validate_upgraded.py --profile`;
+# the pipeline runs cheap independent checks (candle body, trend) before ADX.
+
+def _filter_candle_body(ctx: Dict) -> bool:
+    """Doji bars can never pass the colour check in either direction"""
+    candle = ctx['candle']
+    return candle['close'] != candle['open']
+
+def _filter_regime(ctx: Dict) -> bool:
+    ctx['regime_info'] = detect_regime(ctx['lookback'])
+    return ctx['regime_info']['should_trade']
+
+def _filter_trend_pullback(ctx: Dict) -> bool:
+    trend, is_pullback = detect_trend_and_pullback(ctx['lookback'])
+    ctx['trend'] = trend
+    return trend != 'NEUTRAL' and is_pullback
+
+def _filter_candle_color(ctx: Dict) -> bool:
+    """Confirmation candle must close in the trend direction"""
+    candle = ctx['candle']
+    if ctx['trend'] == 'UP':
+        return candle['close'] > candle['open']
+    return candle['close'] < candle['open']
+
+def _filter_entry_confirmation(ctx: Dict) -> bool:
+    confirmed, _, _ = has_entry_confirmation(ctx['lookback'], ctx['trend'])
+    return confirmed
+
+def _filter_quality(ctx: Dict) -> bool:
+    ctx['quality_score'] = calculate_trade_quality(ctx['lookback'])
+    return ctx['quality_score'] >= ctx['regime_info']['min_trade_score']
+
+# Vector forms of the same stages over every bar (UpgradedStrategy.entry_features),
+# bit-exact with the scalar checks above on full 61-bar lookbacks
+
+def _vector_candle_body(f: Dict) -> np.ndarray:
+    return f['close'] != f['open']
+
+def _vector_regime(f: Dict) -> np.ndarray:
+    adx = f['adx']
+    f['regime_info'] = {'min_trade_score': np.where(adx >= 25, 0.4, np.where(adx >= 15, 0.6, 0.0))}
+    return adx >= 15
+
+def _vector_trend_pullback(f: Dict) -> np.ndarray:
+    close, fast, slow = f['close'], f['ema_fast'], f['ema_slow']
+    up = (fast > slow) & (close > slow)
+    down = ~up & (fast < slow) & (close < slow)
+    f['trend'] = np.where(up, 1, np.where(down, -1, 0))
+    pullback = np.where(up, (close < fast) & (close > slow), (close > fast) & (close < slow))
+    return (up | down) & pullback
+
+def _vector_candle_color(f: Dict) -> np.ndarray:
+    return np.where(f['trend'] == 1, f['close'] > f['open'], f['close'] < f['open'])
+
+def _vector_entry_confirmation(f: Dict) -> np.ndarray:
+    return np.where(f['trend'] == 1, f['close'] > f['prev_high'], f['close'] < f['prev_low'])
+
+def _vector_quality(f: Dict) -> np.ndarray:
+    return f['quality'] >= f['regime_info']['min_trade_score']
+
+ENTRY_FILTER_STAGES = [
+    FilterStage('candle_body', _filter_candle_body, cost=0.5, vector=_vector_candle_body),
+    FilterStage('regime', _filter_regime, cost=145, provides=['regime_info'], vector=_vector_regime),
+    FilterStage('trend_pullback', _filter_trend_pullback, cost=100, provides=['trend'],
+                vector=_vector_trend_pullback),
+    FilterStage('candle_color', _filter_candle_color, cost=0.5, requires=['trend'], vector=_vector_candle_color),
+    FilterStage('entry_confirmation', _filter_entry_confirmation, cost=1, requires=['trend'],
+                vector=_vector_entry_confirmation),
+    FilterStage('quality', _filter_quality, cost=35, requires=['regime_info'], vector=_vector_quality),
+]
+
+ENTRY_FILTERS = FilterPipeline(ENTRY_FILTER_STAGES)
+
+def _filter_daily_trend(ctx: Dict) -> bool:
+    """Trade only with the last completed day's trend, and only when that day trends (ADX)"""
+    direction = 1 if ctx['trend'] == 'UP' else -1
+    return ctx['daily_trend'] == direction and ctx['daily_adx'] >= MIN_DAILY_ADX
+
+def _vector_daily_trend(f: Dict) -> np.ndarray:
+    return (f['daily_trend'] == np.where(f['trend'] == 1, 1, -1)) & (f['daily_adx'] >= MIN_DAILY_ADX)
+
+# Optional higher-timeframe stage; pipelines containing it make the
+# strategy load the daily store and align it to the 15-min bars
+DAILY_TREND_STAGE = FilterStage('daily_trend', _filter_daily_trend, cost=0.5, requires=['trend'],
+                                vector=_vector_daily_trend)
+MTF_ENTRY_FILTERS = FilterPipeline(ENTRY_FILTER_STAGES + [DAILY_TREND_STAGE])
+
+# Skip counter credited when a stage rejects a bar
+FILTER_SKIP_COUNTERS = {
+    'trend_pullback': 'trend_gate_skips',
+    'entry_confirmation': 'entry_confirmation_skips',
+    'quality': 'quality_score_skips',
+    'daily_trend': 'daily_trend_skips',
+}
+
 # ============================================
 # Main Processing
 # ============================================
 
-def process_symbol_with_filters(symbol: str) -> Dict:
-    """Process one symbol with ALL 8 risk filters"""
-    print(f"\nProcessing {symbol}...")
-    
-    file_path = os.path.join(DATA_DIR, f"{symbol}.json")
-    if not os.path.exists(file_path):
-        print(f"  ❌ File not found")
-        return None
-    
-    with open(file_path, 'r') as f:
-        data = json.load(f)
-    
-    days_data = data.get('days', {})
-    sorted_days = sorted(days_data.keys())
-    
-    # Flatten candles for continuous technical context across days
-    all_candles = []
-    day_indices = [] # (start_idx, end_idx, day_key)
-    for dk in sorted_days:
-        s_idx = len(all_candles)
-        all_candles.extend(days_data[dk])
-        day_indices.append((s_idx, len(all_candles), dk))
-        
-    print(f"  📅 {len(sorted_days)} trading days")
-    
-    # Tracking
-    trades = 0
-    wins = 0
-    pnl = 0
-    equity = INITIAL_CAPITAL
-    peak = INITIAL_CAPITAL
-    rolling_peak = INITIAL_CAPITAL
-    max_dd = 0
-    
-    daily_returns = {}
-    total_r_multiple = 0
-    
-    # Risk metrics
-    volatility_skips = 0
-    trend_gate_skips = 0
-    entry_confirmation_skips = 0
-    quality_score_skips = 0
-    daily_loss_breaches = 0
-    kill_switch_triggers = 0
-    
-    gross_profit = 0
-    gross_loss = 0
-    
-    # Kill switch state
-    kill_switch_active = False
-    kill_switch_end_day = 0
-    
-    for day_idx, (d_start, d_end, day_key) in enumerate(day_indices):
-        day_candles = all_candles[d_start:d_end]
-        
-        if len(day_candles) < 20: # Slightly relaxed for truncated days
-            continue
-        
-        # Reset daily counters
-        daily_pnl = 0
-        day_trades = 0
+class UpgradedStrategy(Strategy):
+    """Pullback entries behind the entry filter pipeline and the first-hour volatility filter"""
+
+    min_session_bars = 20  # Slightly relaxed for truncated days
+
+    def __init__(self, symbol: str, filters: FilterPipeline = ENTRY_FILTERS, profiler: FilterProfiler = None):
+        self.symbol = symbol
+        self.filters = filters
+        self.profiler = profiler
+        self.volatility_skips = 0
+        self.filter_skips = {name: 0 for name in FILTER_SKIP_COUNTERS.values()}
+
+    def load(self, symbol: str):
+        file_path = os.path.join(DATA_DIR, f"{symbol}.json")
+        if not os.path.exists(file_path):
+            print(f"  ❌ File not found")
+            return None
         
-        # UPGRADE #6: Kill Switch Check
-        if kill_switch_active:
-            if day_idx < kill_switch_end_day:
-                continue
-            else:
-                kill_switch_active = False
+        # Flat array-backed series for continuous technical context across days;
+        # windows are zero-copy views, so per-bar lookbacks do not allocate lists
+        self.series = load_series(file_path)
+        self.extrema = RangeExtrema(self.series.high, self.series.low)
+        # Volatility filter inputs for the whole history in one array comparison
+        sessions = load_sessions(file_path, self.series)
+        self.day_index = {start: d for d, start in enumerate(sessions.start.tolist())}
+        self.day_atr = sessions.atr.tolist()
+        self.low_vol_days = sessions.low_volatility(MIN_FIRST_HOUR_RANGE_ATR).tolist()
+        self.close_times = None
+        self.candidates = None
+        self.daily = None
+        self.daily_trend = self.daily_adx = None
+        if any(stage.name == DAILY_TREND_STAGE.name for stage in self.filters.stages):
+            # Last completed daily bar per 15-min bar, as lists for O(1) scalar lookups
+            daily_path = os.path.join(DAILY_DATA_DIR, f"{symbol}.json")
+            self.daily = daily_context(self.series, BAR_SECONDS, load_series(daily_path))
+            self.daily_trend = self.daily['daily_trend'].tolist()
+            self.daily_adx = self.daily['daily_adx'].tolist()
+        print(f"  📅 {len(self.series.day_bounds)} trading days")
+        return self.series.rows, self.series.day_bounds
+
+    def on_session(self, start: int, end: int, day_key: str) -> bool:
+        # UPGRADE #2: Volatility Filter (first hour)
+        profiler = self.profiler
+        if profiler is not None: t0 = now_ns()
+        day = self.day_index[start]
+        low_vol = self.low_vol_days[day]
+        if profiler is not None: profiler.record('volatility', not low_vol, now_ns() - t0)
         
-        # Check for new kill switch trigger
-        rolling_dd = (rolling_peak - equity) / rolling_peak if rolling_peak > 0 else 0
-        if rolling_dd >= KILL_SWITCH_DD:
-            kill_switch_active = True
-            kill_switch_end_day = day_idx + KILL_SWITCH_DAYS
-            kill_switch_triggers += 1
-            print(f"  🛑 Kill switch triggered on {day_key} (DD: {rolling_dd*100:.1f}%)")
-            continue
+        if low_vol:
+            if self.symbol == "RELIANCE":
+                print(f"  [DEBUG] {day_key}: Low volatility skip (range < {self.day_atr[day] * MIN_FIRST_HOUR_RANGE_ATR:.2f})")
+            self.volatility_skips += 1
+            return False
+        return True
+
+    def bar_range(self, start: int, end: int) -> range:
+        # Need minimum history for valid EMAs/indicators; last bar has no exit bars
+        return range(max(start, 60), end - 1)
+
+    def entry_features(self) -> Dict:
+        """Whole-history arrays read by the vector forms of the entry filters"""
+        series = self.series
+        close = series.close
+        features = {
+            'open': series.open, 'high': series.high, 'low': series.low, 'close': close,
+            'prev_high': np.concatenate(([np.inf], series.high[:-1])),
+            'prev_low': np.concatenate(([-np.inf], series.low[:-1])),
+            'adx': window_adx(series.high, series.low, close),
+        }
+        if EMA_SLOW + 5 > LOOKBACK_WINDOW:
+            # Lookback too short for the slow EMA: the scalar checks never see a trend
+            features['ema_fast'] = features['ema_slow'] = np.full(len(close), np.nan)
+            features['quality'] = np.zeros(len(close))
+        else:
+            features['ema_fast'] = window_ema(close, EMA_FAST)
+            features['ema_slow'] = window_ema(close, EMA_SLOW)
+            features['quality'] = trade_quality(close, series.high, series.low, series.volume,
+                                                features['ema_fast'], features['ema_slow'], separation_scale=200)
+        if self.daily is not None:
+            features['daily_trend'] = self.daily['daily_trend']
+            features['daily_adx'] = self.daily['daily_adx']
+        return features
+
+    def candidate_bars(self, bars: range) -> List[int]:
+        if self.candidates is None:
+            # Which stage rejects each bar; only bars no vectorized stage rejects get a visit.
+            # Skip counters of the other bars are credited from per-stage running counts.
+            first, names = self.filters.rejections(self.entry_features(), len(self.series))
+            self.candidates = np.flatnonzero(first < 0).tolist()
+            self.skip_counts = [
+                (counter, np.concatenate(([0], np.cumsum(first == names.index(stage)))).tolist())
+                for stage, counter in FILTER_SKIP_COUNTERS.items() if stage in names
+            ]
+        lo = bisect_left(self.candidates, bars.start)
+        return self.candidates[lo:bisect_left(self.candidates, bars.stop, lo)]
+
+    def skip_bars(self, start: int, stop: int):
+        for counter, counts in self.skip_counts:
+            self.filter_skips[counter] += counts[stop] - counts[start]
+
+    def data_hash(self, stop: int) -> str:
+        return self.series.fingerprint(stop)
+
+    def save_state(self) -> Dict:
+        return {'volatility_skips': self.volatility_skips, 'filter_skips': dict(self.filter_skips)}
+
+    def restore_state(self, saved: Dict):
+        self.volatility_skips = saved['volatility_skips']
+        self.filter_skips = dict(saved['filter_skips'])
+
+    def bar_time(self, g_idx: int) -> int:
+        if self.close_times is None:
+            self.close_times = (self.series.epoch + BAR_SECONDS).tolist()
+        return self.close_times[g_idx]
+
+    def on_bar(self, g_idx: int, ctx: Dict):
+        # Continuous technical context looking back into previous days
+        lookback = self.series.lookback(g_idx, 60)
         
-        # Update rolling peak
-        if equity > rolling_peak:
-            rolling_peak = equity
+        # Regime (ADX), trend/pullback, confirmation candle (#4) and
+        # quality score (#7, regime-adaptive threshold), cheapest first
+        last_candle = lookback[-1]
+        ctx = {'lookback': lookback, 'candle': last_candle}
+        if self.daily_trend is not None:
+            ctx['daily_trend'] = self.daily_trend[g_idx]
+            ctx['daily_adx'] = self.daily_adx[g_idx]
+        failed = self.filters.run(ctx, self.profiler)
+        if failed is not None:
+            counter = FILTER_SKIP_COUNTERS.get(failed)
+            if counter:
+                self.filter_skips[counter] += 1
+            return None
+        trend = ctx['trend']
         
-        # UPGRADE #2: Volatility Filter (first hour)
-        first_hour = day_candles[:4]  # 4 * 15min = 1 hour
-        atr_full_day = calculate_atr(day_candles)
+        entry = last_candle['close']
+        slip = entry * SLIPPAGE_PCT
+        entry_price = entry + slip if trend == 'UP' else entry - slip
         
-        if is_low_volatility_day(first_hour, atr_full_day):
-            if symbol == "RELIANCE":
-                print(f"  [DEBUG] {day_key}: Low volatility skip (range < {atr_full_day * MIN_FIRST_HOUR_RANGE_ATR:.2f})")
-            volatility_skips += 1
-            continue
+        atr = calculate_atr(lookback)
+        swing_high = self.extrema.swing_high(g_idx, 10)
+        swing_low = self.extrema.swing_low(g_idx, 10)
+        stop = swing_low - atr * 0.5 if trend == 'UP' else swing_high + atr * 0.5
         
-        # Process candles
-        for i in range(len(day_candles) - 1):
-            # UPGRADE #1: Max trades per day
-            if day_trades >= MAX_TRADES_PER_DAY:
-                break
-            
-            # UPGRADE #1: Daily loss limit
-            daily_loss_limit = equity * MAX_DAILY_LOSS
-            if daily_pnl <= -daily_loss_limit:
-                daily_loss_breaches += 1
-                break
-            
-            # Continuous technical context looking back into previous days
-            g_idx = d_start + i
-            if g_idx < 60: continue # Need minimum history for valid EMAs/indicators
-            lookback = all_candles[g_idx - 60 : g_idx + 1]
-            
-            # DETECT REGIME AND GET ADAPTIVE FILTERS
-            regime_info = detect_regime(lookback)
-            
-            if not regime_info['should_trade']:
-                continue
-            
-            # Update global thresholds based on regime
-            current_min_trade_score = regime_info['min_trade_score']
-            
-            trend, is_pullback = detect_trend_and_pullback(lookback)
-            
-            if trend == 'NEUTRAL' or not is_pullback:
-                continue
-            
-            # Confirmation candle
-            last_candle = day_candles[i]
-            if trend == 'UP' and last_candle['close'] <= last_candle['open']:
-                continue
-            if trend == 'DOWN' and last_candle['close'] >= last_candle['open']:
-                continue
-            
-            # UPGRADE #4: Entry Confirmation (RE-ENABLED)
-            confirmed, pullback_high, pullback_low = has_entry_confirmation(lookback, trend)
-            if not confirmed:
-                entry_confirmation_skips += 1
-                continue
-            
-            # UPGRADE #7: Quality Scoring (with adaptive threshold)
-            quality_score = calculate_trade_quality(lookback)
-            if quality_score < current_min_trade_score:
-                quality_score_skips += 1
-                continue
-
-            
-            # Execute trade
-            entry = last_candle['close']
-            slip = entry * SLIPPAGE_PCT
-            entry_price = entry + slip if trend == 'UP' else entry - slip
-            
-            atr = calculate_atr(lookback)
-            swing_high = max(c['high'] for c in lookback[-10:])
-            swing_low = min(c['low'] for c in lookback[-10:])
-            
-            stop = swing_low - atr * 0.5 if trend == 'UP' else swing_high + atr * 0.5
-            risk = abs(entry_price - stop)
-            
-            if risk <= 0:
-                continue
-            
-            # Position sizing
-            risk_amount = equity * RISK_PER_TRADE
-            qty = int(risk_amount / risk)
-            
-            if qty <= 0:
-                continue
-            
-            # UPGRADE #5: Smart Trailing Stop + Break-Even at +1R
-            exit_price = day_candles[-1]['close']
-            trailing_stop = stop
-            trail_dist = atr * TRAILING_ATR_MULT
-            be_triggered = False
-            
-            # Cost buffer: brokerage + approx slippage/tax (approx 0.1% or 0.1R)
-            cost_buffer = entry_price * 0.001 
-            be_level = entry_price + cost_buffer if trend == 'UP' else entry_price - cost_buffer
-
-            for j in range(i + 1, min(i + 40, len(day_candles))):
-                c = day_candles[j]
-                
-                # Check for +1R Break-Even trigger using High/Low (not close)
-                if not be_triggered:
-                    best_pnl_r = ((c['high'] - entry_price) / risk) if trend == 'UP' else ((entry_price - c['low']) / risk)
-                    if best_pnl_r >= 1.0:
-                        be_triggered = True
-                        if trend == 'UP':
-                            trailing_stop = max(trailing_stop, be_level)
-                        else:
-                            trailing_stop = min(trailing_stop, be_level)
-
-                if trend == 'UP':
-                    if c['high'] > entry_price + trail_dist:
-                        trailing_stop = max(trailing_stop, c['high'] - trail_dist)
-                    if c['low'] <= trailing_stop:
-                        exit_price = max(trailing_stop, c['open']) - slip
-                        break
-                else:
-                    if c['low'] < entry_price - trail_dist:
-                        trailing_stop = min(trailing_stop, c['low'] + trail_dist)
-                    if c['high'] >= trailing_stop:
-                        exit_price = min(trailing_stop, c['open']) + slip
-                        break
-            
-            # P&L and Reality-Based Costs
-            trade_pnl = (exit_price - entry_price) * qty if trend == 'UP' else (entry_price - exit_price) * qty
-            # STT is 0.025% on the SELL side value (turnover)
-            sell_value = exit_price * qty if trend == 'UP' else entry_price * qty
-            costs = (BROKERAGE * 2) + (sell_value * STT)
-            net = trade_pnl - costs
-            
-            # UPGRADE #8: R-Multiple Tracking
-            r_multiple = net / risk_amount
-            total_r_multiple += r_multiple
-            
-            trades += 1
-            day_trades += 1
-            pnl += net
-            daily_pnl += net
-            equity += net
-            
-            if equity > peak:
-                peak = equity
-            dd = (peak - equity) / peak
-            if dd > max_dd:
-                max_dd = dd
-            
-            if net > 0:
-                wins += 1
-                gross_profit += net
-            else:
-                gross_loss += abs(net)
-            
-            daily_returns[day_key] = daily_returns.get(day_key, 0) + net
+        return {'direction': trend, 'entry_price': entry_price, 'stop': stop, 'slip': slip, 'atr': atr}
+
+
+def engine_components() -> Dict:
+    """Sizing, exits, costs and limits of the 8-filter strategy (run_strategy keyword args)
+
+    UPGRADE #1 daily limits and #6 kill switch in the engine; #5 trailing
+    stop with break-even at +1R (cost buffer ~0.1%); STT on the sell side.
+    """
+    return {
+        'sizing': RiskSizing(RISK_PER_TRADE),
+        'exit_policy': TrailingStopExit(TRAILING_ATR_MULT, max_hold_bars=40, break_even_r=1.0),
+        'cost_model': SellSideSTT(BROKERAGE, STT),
+        'limits': RiskLimits(MAX_TRADES_PER_DAY, MAX_DAILY_LOSS, KILL_SWITCH_DD, KILL_SWITCH_DAYS),
+    }
+
+
+def process_symbol_with_filters(symbol: str, profiler: FilterProfiler = None,
+                                filters: FilterPipeline = ENTRY_FILTERS, incremental: bool = False) -> Dict:
+    """Process one symbol with ALL 8 risk filters
+
+    Pass a FilterProfiler to record per-stage counts and timings. Skip
+    counters are credited to the first stage that rejects a bar in the
+    pipeline's evaluation order; pass
+    FilterPipeline(ENTRY_FILTER_STAGES, reorder=False) for the original
+    regime-first attribution. With incremental=True the run resumes from
+    the checkpoint of the previous incremental run of the same config (if
+    the data it covered is unchanged) and saves a new one.
+    """
+    print(f"\nProcessing {symbol}...")
+    if profiler is not None:
+        profiler.start_symbol(symbol)
+    
+    strategy = UpgradedStrategy(symbol, filters, profiler)
+    resume = None
+    if incremental:
+        config = checkpoint_config(filters)
+        resume = load_checkpoint('validate_upgraded', symbol, config)
+    result = run_strategy(strategy, symbol, initial_capital=INITIAL_CAPITAL, profiler=profiler,
+                          resume=resume, checkpoint=incremental, **engine_components())
+    if result is None:
+        return None
+    if incremental:
+        save_checkpoint('validate_upgraded', symbol, config, result['checkpoint'])
+        if result['resumed_from']:
+            new_sessions = result['checkpoint']['sessions'] - result['resumed_from']
+            print(f"  ⏩ Resumed after {resume['last_session'][2]}: {new_sessions} new sessions simulated")
     
     # Calculate metrics
+    trades = result['trades']
+    wins = result['wins']
+    pnl = result['pnl']
+    filter_skips = strategy.filter_skips
     win_rate = (wins / trades * 100) if trades > 0 else 0
     total_return = (pnl / INITIAL_CAPITAL * 100)
     avg_trade = pnl / trades if trades > 0 else 0
-    avg_r = total_r_multiple / trades if trades > 0 else 0
+    avg_r = result['total_r'] / trades if trades > 0 else 0
     
     print(f"  ✅ Trades: {trades}, Win Rate: {win_rate:.1f}%, PnL: ₹{pnl:,.0f}, Return: {total_return:.1f}%")
-    print(f"     Skips: Vol={volatility_skips}, Trend={trend_gate_skips}, Entry={entry_confirmation_skips}, Quality={quality_score_skips}")
+    print(f"     Skips: Vol={strategy.volatility_skips}, Trend={filter_skips['trend_gate_skips']}, "
+          f"Entry={filter_skips['entry_confirmation_skips']}, Quality={filter_skips['quality_score_skips']}")
     
     return {
         'symbol': symbol,
@@ -586,24 +668,65 @@ def process_symbol_with_filters(symbol: str) -> Dict:
         'win_rate': win_rate,
         'pnl': pnl,
         'total_return': total_return,
-        'max_dd': max_dd * 100,
+        'max_dd': result['max_dd'] * 100,
         'avg_trade': avg_trade,
         'avg_r_multiple': avg_r,
-        'trading_days': len(daily_returns),
+        'trading_days': len(result['daily_returns']),
+        'daily_returns': result['daily_returns'],
+        'trade_log': result['trade_log'],
         'risk_metrics': {
-            'volatility_skips': volatility_skips,
-            'trend_gate_skips': trend_gate_skips,
-            'entry_confirmation_skips': entry_confirmation_skips,
-            'quality_score_skips': quality_score_skips,
-            'daily_loss_breaches': daily_loss_breaches,
-            'kill_switch_triggers': kill_switch_triggers,
-            'gross_profit': gross_profit,
-            'gross_loss': gross_loss
+            'volatility_skips': strategy.volatility_skips,
+            'trend_gate_skips': filter_skips['trend_gate_skips'],
+            'entry_confirmation_skips': filter_skips['entry_confirmation_skips'],
+            'quality_score_skips': filter_skips['quality_score_skips'],
+            'daily_trend_skips': filter_skips['daily_trend_skips'],
+            'daily_loss_breaches': result['daily_loss_breaches'],
+            'kill_switch_triggers': result['kill_switch_triggers'],
+            'gross_profit': result['gross_profit'],
+            'gross_loss': result['gross_loss']
         }
     }
 
-def main():
-    """Main validation with ALL 8 risk filters"""
+def strategy_config(daily_filter: bool = False) -> Dict:
+    """Strategy parameters, as recorded with saved results"""
+    config = {
+        'risk_per_trade': RISK_PER_TRADE,
+        'max_trades_per_day': MAX_TRADES_PER_DAY,
+        'max_daily_loss': MAX_DAILY_LOSS,
+        'kill_switch_dd': KILL_SWITCH_DD,
+        'kill_switch_days': KILL_SWITCH_DAYS,
+        'min_first_hour_range_atr': MIN_FIRST_HOUR_RANGE_ATR,
+        'ema_fast': EMA_FAST,
+        'ema_slow': EMA_SLOW,
+        'trailing_atr_mult': TRAILING_ATR_MULT,
+        'slippage_pct': SLIPPAGE_PCT,
+        'brokerage': BROKERAGE,
+        'stt': STT,
+    }
+    if daily_filter:
+        config['min_daily_adx'] = MIN_DAILY_ADX
+    return config
+
+
+def checkpoint_config(filters: FilterPipeline) -> Dict:
+    """Everything a saved checkpoint depends on (parameters and filter order, which moves skip counts)"""
+    daily_filter = any(stage.name == DAILY_TREND_STAGE.name for stage in filters.stages)
+    return {**strategy_config(daily_filter), 'filter_order': filters.describe(),
+            'initial_capital': INITIAL_CAPITAL}
+
+
+def main(profile: bool = False, save: bool = False, daily_filter: bool = False, incremental: bool = False):
+    """Main validation with ALL 8 risk filters
+
+    With profile=True, writes a per-filter summary table and a
+    flamegraph-compatible folded trace to PROFILE_DIR. With save=True,
+    stores the run in the results database (results_store.RESULTS_DB).
+    With daily_filter=True, entries must also agree with the last
+    completed daily bar's trend (MTF_ENTRY_FILTERS). With incremental=True,
+    each symbol resumes from its checkpoint (checkpoint_store) and only
+    the days appended since the previous incremental run are simulated.
+    """
+    filters = MTF_ENTRY_FILTERS if daily_filter else ENTRY_FILTERS
     print("=" * 70)
     print("FULL UPGRADED STRATEGY VALIDATION - ALL 8 RISK FILTERS")
     print("=" * 70)
@@ -617,15 +740,20 @@ def main():
     print(f"  #3 Trend Gate: Min {MIN_EMA_SLOPE * 100}% EMA slope")
     print(f"  #4 Entry Confirmation: Pullback break required")
     print(f"  #7 Quality Score: Min {MIN_TRADE_SCORE * 100}%")
+    if daily_filter:
+        print(f"  Daily Trend Gate: last completed day trending, ADX ≥ {MIN_DAILY_ADX}")
+    print(f"  Filter order: {filters.describe()}")
     
     symbols = [f.replace('.json', '') for f in os.listdir(DATA_DIR) 
                if f.endswith('.json') and f != 'summary.json' and f != 'all_symbols.json']
     
     print(f"\nProcessing {len(symbols)} symbols...")
     
+    profiler = FilterProfiler() if profile else None
+    
     results = []
     for symbol in sorted(symbols):
-        result = process_symbol_with_filters(symbol)
+        result = process_symbol_with_filters(symbol, profiler, filters, incremental)
         if result:
             results.append(result)
     
@@ -666,6 +794,8 @@ def main():
     print(f"  Trend Gate Skips: {total_trend_skips}")
     print(f"  Entry Confirmation Skips: {total_entry_skips}")
     print(f"  Quality Score Skips: {total_quality_skips}")
+    if daily_filter:
+        print(f"  Daily Trend Skips: {sum(r['risk_metrics']['daily_trend_skips'] for r in results)}")
     print(f"  Kill Switch Triggers: {total_kill_switches}")
     
     # Top performers
@@ -676,7 +806,23 @@ def main():
     for r in top_5:
         print(f"{r['symbol']:12} | Trades: {r['trades']:3} | Return: {r['total_return']:6.1f}% | Win Rate: {r['win_rate']:5.1f}% | Avg R: {r['avg_r_multiple']:5.2f}R")
     
+    if profiler is not None:
+        print("\n" + "-" * 70)
+        print("FILTER PROFILE")
+        print("-" * 70)
+        print(profiler.summary_table())
+        summary_path, folded_path = profiler.write(PROFILE_DIR)
+        print(f"\n⏱️ Profile saved to {summary_path} (flamegraph trace: {folded_path})")
+    
+    if save:
+        conn = results_store.connect()
+        run_id = results_store.create_run(conn, 'validate_upgraded', data_dir=DATA_DIR)
+        results_store.save_results(conn, run_id, strategy_config(daily_filter), results)
+        conn.close()
+        print(f"\n💾 Saved run #{run_id} to {results_store.RESULTS_DB}")
+    
     print("\n✅ Full validation complete!")
 
 if __name__ == "__main__":
-    main()
+    main(profile='--profile' in sys.argv, save='--save' in sys.argv,
+         daily_filter='--daily-filter' in sys.argv, incremental='--incremental' in sys.argv)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Vectorized Indicators
+Whole-series NumPy versions of the validators' lookback-window indicators
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# The validators evaluate indicators on a fixed lookback window per bar
+# (e.g. candles[g-60:g+1]) rather than as one running series. The functions
+# here compute, for every bar g, the value the scalar function returns on
+# that window. Arithmetic is done column by column across all windows in
+# the same order as the scalar loops, so results match them exactly (the
+# scalar code's sum() is a plain left-to-right float sum on Python 3.11).
+# Bars without a full window are NaN.
+
+LOOKBACK_WINDOW = 61  # candles[g-60:g+1]
+
+# ============================================
+# Helpers
+# ============================================
+
+def _seq_sum(views: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """Left-to-right sum of columns start..stop-1, like sum() over each row"""
+    acc = views[:, start].copy()
+    for j in range(start + 1, stop):
+        acc = acc + views[:, j]
+    return acc
+
+
+def _place(n: int, values: np.ndarray, first: int) -> np.ndarray:
+    """Full-length float array with values from index ``first`` on, NaN before"""
+    out = np.full(n, np.nan)
+    out[first:first + len(values)] = values
+    return out
+
+
+def _wilder_columns(views: np.ndarray, period: int) -> list:
+    """wilder_smooth() applied to every row; returns the smoothed columns"""
+    smoothed = [_seq_sum(views, 0, period) / period]
+    for j in range(period, views.shape[1]):
+        smoothed.append((smoothed[-1] * (period - 1) + views[:, j]) / period)
+    return smoothed
+
+# ============================================
+# Per-bar Components
+# ============================================
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """TR of bar p against bar p-1, for p = 1..n-1 (length n-1)"""
+    h, l, pc = high[1:], low[1:], close[:-1]
+    return np.maximum(np.maximum(h - l, np.abs(h - pc)), np.abs(l - pc))
+
+
+def directional_movement(high: np.ndarray, low: np.ndarray):
+    """(+DM, -DM) of bar p against bar p-1, for p = 1..n-1"""
+    up_move = high[1:] - high[:-1]
+    down_move = low[:-1] - low[1:]
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    return plus_dm, minus_dm
+
+# ============================================
+# Windowed Indicators
+# ============================================
+
+def window_ema(values: np.ndarray, period: int, window: int = LOOKBACK_WINDOW) -> np.ndarray:
+    """calculate_ema(values[g-window+1:g+1], period) for every bar g (SMA-seeded)"""
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < window:
+        return np.full(n, np.nan)
+    if window < period:
+        return _place(n, np.zeros(n - window + 1), window - 1)
+
+    views = sliding_window_view(values, window)
+    multiplier = 2 / (period + 1)
+    ema = _seq_sum(views, 0, period) / period
+    for j in range(period, window):
+        ema = (views[:, j] - ema) * multiplier + ema
+    return _place(n, ema, window - 1)
+
+
+def window_atr(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+               period: int = 14, window: int = LOOKBACK_WINDOW) -> np.ndarray:
+    """calculate_atr(candles[g-window+1:g+1], period) for every bar g"""
+    n = len(close)
+    if n < window or window < period + 1:
+        return np.full(n, np.nan)
+    tr_views = sliding_window_view(true_range(high, low, close), period)
+    atr = _seq_sum(tr_views, 0, period) / period
+    # tr_views row r covers pairs r+1..r+period, i.e. ends at bar r+period
+    return _place(n, atr[window - 1 - period:], window - 1)
+
+
+def window_adx(high: np.ndarray, low: np.ndarray, close: np.ndarray,
+               period: int = 14, window: int = LOOKBACK_WINDOW) -> np.ndarray:
+    """calculate_adx(candles[g-window+1:g+1], period) for every bar g"""
+    n = len(close)
+    pairs = window - 1
+    if n < window or pairs < 2 * period - 1:
+        return np.full(n, np.nan) if n < window else _place(n, np.zeros(n - window + 1), window - 1)
+
+    tr = sliding_window_view(true_range(high, low, close), pairs)
+    plus_dm, minus_dm = directional_movement(high, low)
+    plus_dm = sliding_window_view(plus_dm, pairs)
+    minus_dm = sliding_window_view(minus_dm, pairs)
+
+    smooth_tr = _wilder_columns(tr, period)
+    smooth_plus = _wilder_columns(plus_dm, period)
+    smooth_minus = _wilder_columns(minus_dm, period)
+
+    dx_columns = []
+    for st, sp, sm in zip(smooth_tr, smooth_plus, smooth_minus):
+        nonzero = st != 0
+        safe_tr = np.where(nonzero, st, 1.0)
+        plus_di = np.where(nonzero, (sp / safe_tr) * 100, 0.0)
+        minus_di = np.where(nonzero, (sm / safe_tr) * 100, 0.0)
+        di_sum = plus_di + minus_di
+        safe_sum = np.where(di_sum == 0, 1.0, di_sum)
+        dx_columns.append(np.where(di_sum == 0, 0.0, (np.abs(plus_di - minus_di) / safe_sum) * 100))
+
+    dx = np.column_stack(dx_columns)
+    adx = _wilder_columns(dx, period)[-1]
+    return _place(n, adx, window - 1)
+
+
+def rolling_max(values: np.ndarray, length: int) -> np.ndarray:
+    """max(values[g-length+1:g+1]) for every bar g (NaN before the first full window)"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < length:
+        return np.full(len(values), np.nan)
+    return _place(len(values), sliding_window_view(values, length).max(axis=1), length - 1)
+
+
+def rolling_min(values: np.ndarray, length: int) -> np.ndarray:
+    """min(values[g-length+1:g+1]) for every bar g (NaN before the first full window)"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < length:
+        return np.full(len(values), np.nan)
+    return _place(len(values), sliding_window_view(values, length).min(axis=1), length - 1)
+
+
+def rolling_sum(values: np.ndarray, length: int) -> np.ndarray:
+    """sum(values[g-length+1:g+1]) for every bar g via a cumulative sum (exact for integer volumes)"""
+    values = np.asarray(values)
+    out = np.full(len(values), np.nan)
+    if len(values) < length:
+        return out
+    csum = np.concatenate((np.zeros(1, dtype=values.dtype), np.cumsum(values)))
+    out[length - 1:] = csum[length:] - csum[:-length]
+    return out
+
+# ============================================
+# Composite Scores
+# ============================================
+
+def trade_quality(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray,
+                  fast_ema: np.ndarray, slow_ema: np.ndarray, separation_scale: float) -> np.ndarray:
+    """calculate_trade_quality(lookback) for every bar, from precomputed window EMA arrays.
+
+    separation_scale is the EMA-separation multiplier of the variant being
+    matched: 200 in validate_upgraded, 100 in validate_regime.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+
+    # 1. Trend strength (EMA separation)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        separation = np.where(slow_ema > 0, np.abs(fast_ema - slow_ema) / slow_ema, 0.0)
+    trend_strength = np.minimum(separation * separation_scale, 1.0)
+
+    # 2. Pullback depth within the last 10 bars' range
+    swing_high = rolling_max(high, 10)
+    swing_low = rolling_min(low, 10)
+    range_val = swing_high - swing_low
+    has_range = range_val > 0
+    safe_range = np.where(has_range, range_val, 1.0)
+    depth = np.maximum((swing_high - close) / safe_range, (close - swing_low) / safe_range)
+    pullback_score = np.where(depth <= 0.5, depth * 2, np.maximum(0, 1 - (depth - 0.5) * 2))
+    pullback_score = np.where(has_range, pullback_score, 0.0)
+
+    # 3. Volume vs the previous 19 bars' mean
+    prior_sum = np.full(n, np.nan)
+    prior_sum[1:] = rolling_sum(volume, 19)[:-1]
+    avg_volume = prior_sum / 19
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_ratio = np.where(avg_volume > 0, np.asarray(volume) / avg_volume, 1.0)
+    volume_score = np.minimum(volume_ratio / 2, 1.0)
+
+    score = trend_strength * 0.4 + pullback_score * 0.4 + volume_score * 0.2
+    # Same NaN prefix as the EMA arrays (bars without a full lookback window)
+    score[np.isnan(fast_ema) | np.isnan(slow_ema)] = np.nan
+    return score
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Sliding-Window Extrema
+Monotonic deque (streaming) and sparse table (O(1) range max/min) for swing and Donchian levels
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# ============================================
+# Streaming: Monotonic Deque
+# ============================================
+
+class MonotonicDeque:
+    """Max (or min) of the last ``length`` pushed values, amortised O(1) per push.
+
+    The deque holds (index, value) pairs whose values are strictly
+    decreasing (for max), so the front is always the window extreme.
+    """
+
+    def __init__(self, length: int, mode: str = 'max'):
+        if mode not in ('max', 'min'):
+            raise ValueError(f"mode must be 'max' or 'min', got {mode!r}")
+        self.length = length
+        self.is_max = mode == 'max'
+        self.items = deque()
+        self.count = 0
+
+    def push(self, value: float) -> float:
+        """Add the next value and return the extreme of the current window"""
+        items = self.items
+        if self.is_max:
+            while items and items[-1][1] <= value:
+                items.pop()
+        else:
+            while items and items[-1][1] >= value:
+                items.pop()
+        items.append((self.count, value))
+        self.count += 1
+        if items[0][0] <= self.count - 1 - self.length:
+            items.popleft()
+        return items[0][1]
+
+    @property
+    def value(self) -> float:
+        return self.items[0][1]
+
+# ============================================
+# Batch: Sparse Table
+# ============================================
+
+class SparseTable:
+    """Range max (or min) over a fixed array in O(1) per query after O(n log n) build.
+
+    Level k holds the extreme of every run of 2**k values; any range is
+    covered by two (overlapping) runs of the largest power of two that fits.
+    """
+
+    def __init__(self, values, mode: str = 'max'):
+        if mode not in ('max', 'min'):
+            raise ValueError(f"mode must be 'max' or 'min', got {mode!r}")
+        self.op = np.maximum if mode == 'max' else np.minimum
+        self.pick = max if mode == 'max' else min
+        levels = [np.asarray(values, dtype=np.float64)]
+        span = 1
+        while span * 2 <= len(levels[0]):
+            prev = levels[-1]
+            levels.append(self.op(prev[:-span], prev[span:]))
+            span *= 2
+        self.levels = levels
+        self.n = len(levels[0])
+        self._lists = None
+
+    def query(self, start: int, stop: int) -> float:
+        """Extreme of values[start:stop] (start < stop) as a Python float"""
+        if self._lists is None:
+            # Scalar lookups from Python loops are faster on lists than on arrays
+            self._lists = [level.tolist() for level in self.levels]
+        k = (stop - start).bit_length() - 1
+        level = self._lists[k]
+        return self.pick(level[start], level[stop - (1 << k)])
+
+    def query_many(self, starts: np.ndarray, stops: np.ndarray) -> np.ndarray:
+        """Vectorised query() over arrays of ranges"""
+        starts = np.asarray(starts, dtype=np.int64)
+        stops = np.asarray(stops, dtype=np.int64)
+        ks = np.floor(np.log2(stops - starts)).astype(np.int64)
+        out = np.empty(len(starts))
+        for k in np.unique(ks).tolist():
+            sel = ks == k
+            level = self.levels[k]
+            out[sel] = self.op(level[starts[sel]], level[stops[sel] - (1 << k)])
+        return out
+
+    def trailing(self, length: int) -> np.ndarray:
+        """Extreme of values[g-length+1:g+1] for every g (NaN before the first full window)"""
+        out = np.full(self.n, np.nan)
+        if length > self.n:
+            return out
+        k = length.bit_length() - 1
+        span = 1 << k
+        level = self.levels[k]
+        # Window ending at g = run starting at g-length+1 and run ending at g
+        out[length - 1:] = self.op(level[:self.n - length + 1], level[length - span:self.n - span + 1])
+        return out
+
+# ============================================
+# Candle Helpers
+# ============================================
+
+class RangeExtrema:
+    """High/low sparse tables over one symbol's candles, for swing and channel levels"""
+
+    def __init__(self, highs, lows):
+        self.highs = SparseTable(highs, 'max')
+        self.lows = SparseTable(lows, 'min')
+        self._channels: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_candles(cls, candles: List[Dict]) -> 'RangeExtrema':
+        return cls([c['high'] for c in candles], [c['low'] for c in candles])
+
+    def highest(self, start: int, stop: int) -> float:
+        """max(high) over candles[start:stop]"""
+        return self.highs.query(max(start, 0), stop)
+
+    def lowest(self, start: int, stop: int) -> float:
+        """min(low) over candles[start:stop]"""
+        return self.lows.query(max(start, 0), stop)
+
+    def swing_high(self, idx: int, bars: int = 10) -> float:
+        """max(c['high'] for c in candles[idx-bars+1:idx+1]), i.e. lookback[-bars:] ending at idx"""
+        return self.highs.query(max(idx - bars + 1, 0), idx + 1)
+
+    def swing_low(self, idx: int, bars: int = 10) -> float:
+        return self.lows.query(max(idx - bars + 1, 0), idx + 1)
+
+    def donchian(self, length: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(upper, lower) Donchian channel over the trailing ``length`` bars for every bar"""
+        if length not in self._channels:
+            self._channels[length] = (self.highs.trailing(length), self.lows.trailing(length))
+        return self._channels[length]